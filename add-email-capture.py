@@ -1,6 +1,22 @@
 import os
 import re
 
+from sitepipeline.assets import has_asset_reference, load_manifest, script_tag
+from sitepipeline.transaction import Transaction, dry_run_mode, write_text
+
+def email_capture_tag(manifest=None):
+    """Points at the fingerprinted copy once build-assets.py has run"""
+    return script_tag('email-capture.js', defer=True, manifest=manifest)
+
+def add_email_capture_to_content(content, manifest=None):
+    """Insert the email-capture script before </body>; returns (content, added)"""
+    # Check if email-capture.js (or a hashed copy) is already included
+    if '</body>' not in content or has_asset_reference(content, 'email-capture.js'):
+        return content, False
+
+    # Add the script right before </body>
+    return content.replace('</body>', f'    {email_capture_tag(manifest)}\n</body>'), True
+
 def add_email_capture_script():
     # Find all HTML files
     html_files = []
@@ -14,6 +30,7 @@ def add_email_capture_script():
 
     updated_files = []
     skipped_files = []
+    manifest = load_manifest()
 
     for file_path in html_files:
         try:
@@ -21,21 +38,15 @@ def add_email_capture_script():
                 content = f.read()
 
             # Check if email-capture.js is already included
-            if 'email-capture.js' in content:
+            if has_asset_reference(content, 'email-capture.js'):
                 skipped_files.append(file_path)
                 continue
 
             # Find the </body> tag and add the script before it
-            if '</body>' in content:
-                # Add the script right before </body>
-                new_content = content.replace(
-                    '</body>',
-                    '    <script src="/email-capture.js" defer></script>\n</body>'
-                )
-
+            new_content, added = add_email_capture_to_content(content, manifest)
+            if added:
                 # Write the updated content
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    f.write(new_content)
+                write_text(file_path, new_content)
 
                 updated_files.append(file_path)
                 print(f'Updated: {file_path}')
@@ -49,4 +60,5 @@ def add_email_capture_script():
     print(f'Total HTML files processed: {len(html_files)}')
 
 if __name__ == '__main__':
-    add_email_capture_script()
\ No newline at end of file
+    with Transaction(dry_run=dry_run_mode()):
+        add_email_capture_script()
\ No newline at end of file
@@ -4,44 +4,50 @@ Add purple circle background to favicon
 """
 
 from PIL import Image, ImageDraw
-import requests
 import io
 
-def add_purple_background(image_url, output_path):
-    """Add a purple circle background to the favicon"""
-    try:
-        # Download the image
-        response = requests.get(image_url)
-        response.raise_for_status()
+from sitecore import load_script
 
-        # Open the image
-        original = Image.open(io.BytesIO(response.content))
+# Dark purple (#2A0134)
+PURPLE_COLOR = (42, 1, 52, 255)
+
+def build_background_icon(original, color=PURPLE_COLOR):
+    """Original image centered on a filled circle, as an RGBA image"""
+    # Convert to RGBA if not already
+    if original.mode != 'RGBA':
+        original = original.convert('RGBA')
+
+    # Get image size - use the larger dimension for the circle
+    width, height = original.size
+    size = max(width, height)
 
-        # Convert to RGBA if not already
-        if original.mode != 'RGBA':
-            original = original.convert('RGBA')
+    # Create a new image with the circle size
+    new_image = Image.new('RGBA', (size, size), (0, 0, 0, 0))
 
-        # Get image size - use the larger dimension for the circle
-        width, height = original.size
-        size = max(width, height)
+    # Create a drawing context
+    draw = ImageDraw.Draw(new_image)
 
-        # Create a new image with the circle size
-        new_image = Image.new('RGBA', (size, size), (0, 0, 0, 0))
+    # Draw circle background
+    draw.ellipse([0, 0, size-1, size-1], fill=color)
 
-        # Create a drawing context
-        draw = ImageDraw.Draw(new_image)
+    # Calculate position to center the original image
+    x = (size - width) // 2
+    y = (size - height) // 2
 
-        # Draw purple circle background
-        # Using dark purple color (#2A0134)
-        purple_color = (42, 1, 52, 255)  # RGBA
-        draw.ellipse([0, 0, size-1, size-1], fill=purple_color)
+    # Paste the original image on top of the circle
+    new_image.paste(original, (x, y), original)
+    return new_image
 
-        # Calculate position to center the original image
-        x = (size - width) // 2
-        y = (size - height) // 2
+def add_purple_background(image_url, output_path):
+    """Add a purple circle background to the favicon"""
+    try:
+        # Source comes from the shared download cache; the network is only used on a miss
+        source = load_script('build-icons.py').SourceCache().fetch(image_url)
+
+        # Open the image
+        original = Image.open(io.BytesIO(source))
 
-        # Paste the original image on top of the purple circle
-        new_image.paste(original, (x, y), original)
+        new_image = build_background_icon(original)
 
         # Save the result
         new_image.save(output_path, 'PNG', optimize=True)
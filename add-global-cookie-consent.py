@@ -8,46 +8,61 @@ import os
 import re
 import glob
 
-def add_cookie_consent_to_file(file_path):
+from sitepipeline.assets import has_asset_reference, load_manifest, script_tag, stylesheet_tag
+from sitepipeline.transaction import Transaction, dry_run_mode, write_text
+
+# Point at the fingerprinted copies once build-assets.py has run
+# cookie-consent.js holds the banner back until this stylesheet has loaded, so it need not block the first render
+def cookie_consent_css(manifest=None):
+    return stylesheet_tag('assets/cookie-consent.css', manifest, deferred=True)
+
+def cookie_consent_js(manifest=None):
+    return script_tag('assets/cookie-consent.js', manifest=manifest)
+
+def add_cookie_consent_to_content(content, manifest=None):
+    """Add the cookie consent stylesheet and script tags to page content"""
+    # Check if cookie consent is already added (hashed or not)
+    has_css = has_asset_reference(content, 'assets/cookie-consent.css')
+    has_js = has_asset_reference(content, 'assets/cookie-consent.js')
+    if has_css and has_js:
+        return content
+
+    # Find the head section to add CSS
+    if not has_css:
+        head_pattern = r'(<head[^>]*>)'
+        if re.search(head_pattern, content, re.IGNORECASE):
+            content = re.sub(
+                head_pattern,
+                lambda match: f'{match.group(1)}\n    {cookie_consent_css(manifest)}',
+                content,
+                flags=re.IGNORECASE
+            )
+
+    # Find the body end to add JavaScript
+    if not has_js:
+        body_end_pattern = r'(</body>)'
+        if re.search(body_end_pattern, content, re.IGNORECASE):
+            content = re.sub(
+                body_end_pattern,
+                lambda match: f'    {cookie_consent_js(manifest)}\n{match.group(1)}',
+                content,
+                flags=re.IGNORECASE
+            )
+
+    return content
+
+def add_cookie_consent_to_file(file_path, manifest=None):
     """Add the global cookie consent system to a single HTML file"""
     try:
         with open(file_path, 'r', encoding='utf-8') as f:
             content = f.read()
 
         original_content = content
-
-        # Check if cookie consent is already added
-        if 'cookie-consent.css' in content and 'cookie-consent.js' in content:
-            return False
-
-        # Find the head section to add CSS
-        css_link = '<link rel="stylesheet" href="/assets/cookie-consent.css">'
-        if css_link not in content:
-            head_pattern = r'(<head[^>]*>)'
-            if re.search(head_pattern, content, re.IGNORECASE):
-                content = re.sub(
-                    head_pattern,
-                    r'\1\n    ' + css_link,
-                    content,
-                    flags=re.IGNORECASE
-                )
-
-        # Find the body end to add JavaScript
-        js_script = '<script src="/assets/cookie-consent.js"></script>'
-        if js_script not in content:
-            body_end_pattern = r'(</body>)'
-            if re.search(body_end_pattern, content, re.IGNORECASE):
-                content = re.sub(
-                    body_end_pattern,
-                    '    ' + js_script + '\n' + r'\1',
-                    content,
-                    flags=re.IGNORECASE
-                )
+        content = add_cookie_consent_to_content(content, manifest)
 
         # Only write if content changed
         if content != original_content:
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(content)
+            write_text(file_path, content)
             return True
         return False
 
@@ -63,6 +78,7 @@ def main():
     html_files = glob.glob("**/*.html", recursive=True)
 
     modified_files = []
+    manifest = load_manifest()
 
     for file_path in html_files:
         # Skip template files
@@ -70,7 +86,7 @@ def main():
             continue
 
         print(f"Processing: {file_path}")
-        if add_cookie_consent_to_file(file_path):
+        if add_cookie_consent_to_file(file_path, manifest):
             modified_files.append(file_path)
 
     print(f"\nGlobal cookie consent implementation complete!")
@@ -85,4 +101,5 @@ def main():
     return len(modified_files)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    with Transaction(dry_run=dry_run_mode()):
+        main()
\ No newline at end of file
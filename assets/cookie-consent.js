@@ -132,10 +132,23 @@
         }));
     }
 
+    // Pages load cookie-consent.css with media="print" onload, so it may still be
+    // in flight at DOMContentLoaded; wait for it rather than show an unstyled banner
+    function whenStylesReady(callback) {
+        const link = Array.from(document.querySelectorAll('link[rel="stylesheet"]'))
+            .find(node => /\/cookie-consent(\.[0-9a-f]+)?\.css(\?|$)/.test(node.getAttribute('href') || ''));
+        if (!link || link.media !== 'print') {
+            callback();
+            return;
+        }
+        link.addEventListener('load', callback, { once: true });
+        link.addEventListener('error', callback, { once: true });
+    }
+
     function init() {
         // Only show banner if consent hasn't been given
         if (!hasConsented()) {
-            showBanner();
+            whenStylesReady(showBanner);
         }
     }
 
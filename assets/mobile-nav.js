@@ -0,0 +1,65 @@
+/**
+ * Global header mobile menu
+ * Toggle button, tap-to-open dropdowns, close on outside click and on resize to desktop
+ */
+document.addEventListener('DOMContentLoaded', function() {
+    const mobileToggle = document.querySelector('.mobile-menu-toggle');
+    const navLinks = document.querySelector('.nav-links');
+    const dropdowns = document.querySelectorAll('.dropdown');
+
+    // Mobile menu toggle button
+    if (mobileToggle && navLinks) {
+        mobileToggle.addEventListener('click', function(e) {
+            e.preventDefault();
+            e.stopPropagation();
+            navLinks.classList.toggle('active');
+            this.textContent = navLinks.classList.contains('active') ? '✕' : '☰';
+        });
+    }
+
+    // Mobile dropdown toggles
+    dropdowns.forEach(dropdown => {
+        const dropdownLink = dropdown.querySelector('a');
+        if (dropdownLink) {
+            dropdownLink.addEventListener('click', function(e) {
+                if (window.innerWidth <= 768) {
+                    e.preventDefault();
+                    dropdowns.forEach(otherDropdown => {
+                        if (otherDropdown !== dropdown) {
+                            otherDropdown.classList.remove('mobile-open');
+                        }
+                    });
+                    dropdown.classList.toggle('mobile-open');
+                }
+            });
+        }
+    });
+
+    // Close mobile menu when clicking outside
+    document.addEventListener('click', function(e) {
+        if (window.innerWidth <= 768 && navLinks) {
+            if (!e.target.closest('nav') && !e.target.closest('.mobile-menu-toggle')) {
+                navLinks.classList.remove('active');
+                if (mobileToggle) {
+                    mobileToggle.textContent = '☰';
+                }
+                dropdowns.forEach(dropdown => {
+                    dropdown.classList.remove('mobile-open');
+                });
+            }
+        }
+    });
+
+    // Close mobile menu on window resize
+    window.addEventListener('resize', function() {
+        if (window.innerWidth > 768 && navLinks) {
+            navLinks.classList.remove('active');
+            if (mobileToggle) {
+                mobileToggle.textContent = '☰';
+            }
+            dropdowns.forEach(dropdown => {
+                dropdown.classList.remove('mobile-open');
+            });
+        }
+    });
+});
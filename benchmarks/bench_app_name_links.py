@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Benchmark: add_app_name_links single-pass matcher vs the original per-app loop
+Run from the site root: python benchmarks/bench_app_name_links.py
+"""
+
+import argparse
+import glob
+import importlib.util
+import os
+import re
+import sys
+import time
+
+SITE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SITE_ROOT)
+
+def load_linking_module():
+    """Import implement-internal-linking.py (hyphenated, so not importable by name)"""
+    path = os.path.join(SITE_ROOT, 'implement-internal-linking.py')
+    spec = importlib.util.spec_from_file_location('implement_internal_linking', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def legacy_add_app_name_links(content, current_page_info, app_reviews):
+    """The original add_app_name_links loop, kept verbatim as the baseline"""
+    if current_page_info['type'] == 'review':
+        current_app = current_page_info.get('app', '')
+        apps_to_link = {k: v for k, v in app_reviews.items() if k != current_app}
+    else:
+        apps_to_link = app_reviews
+
+    for app_name, review_url in apps_to_link.items():
+        patterns = [
+            rf'\b({re.escape(app_name)})\b(?!\s*review)(?!</a>)(?![^<]*</a>)',
+            rf'\b({re.escape(app_name)})\'s\s+(\w+)',
+            rf'(unlike\s+{re.escape(app_name)})\b',
+            rf'(compared\s+to\s+{re.escape(app_name)})\b',
+        ]
+
+        for i, pattern in enumerate(patterns):
+            match = re.search(pattern, content, re.IGNORECASE)
+            if match and f'href="{review_url}"' not in content:
+                if i == 0:
+                    replacement = f'<a href="{review_url}">{match.group(1)}</a>'
+                elif i == 1:
+                    replacement = f'<a href="{review_url}">{match.group(1)}\'s</a> {match.group(2)}'
+                else:
+                    replacement = f'<a href="{review_url}">{match.group(1)}</a>'
+
+                content = re.sub(pattern, replacement, content, count=1, flags=re.IGNORECASE)
+                break
+
+    return content
+
+def time_call(func, repeat):
+    """Best-of-N wall time in milliseconds"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeat', type=int, default=3, help='runs per file (best time is kept)')
+    parser.add_argument('--top', type=int, default=10, help='slowest files to list')
+    args = parser.parse_args()
+
+    linking = load_linking_module()
+    os.chdir(SITE_ROOT)
+
+    html_files = sorted(f for f in glob.glob("**/*.html", recursive=True) if 'TEMPLATE' not in f.upper())
+
+    rows = []
+    mismatches = []
+
+    for file_path in html_files:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            content = f.read()
+        page_info = linking.get_current_page_info(file_path)
+
+        legacy_ms, legacy_out = time_call(
+            lambda: legacy_add_app_name_links(content, page_info, linking.APP_REVIEWS), args.repeat)
+        matcher_ms, matcher_out = time_call(
+            lambda: linking.add_app_name_links(content, page_info), args.repeat)
+
+        rows.append((file_path, len(content), legacy_ms, matcher_ms))
+        if legacy_out != matcher_out:
+            mismatches.append(file_path)
+
+    print("add_app_name_links benchmark")
+    print("=" * 78)
+    print(f"{'file':<48} {'KB':>6} {'loop ms':>9} {'new ms':>8} {'x':>5}")
+    for file_path, size, legacy_ms, matcher_ms in sorted(rows, key=lambda r: r[2], reverse=True)[:args.top]:
+        print(f"{file_path[:48]:<48} {size / 1024:>6.1f} {legacy_ms:>9.2f} {matcher_ms:>8.2f} "
+              f"{legacy_ms / max(matcher_ms, 1e-6):>5.0f}")
+
+    legacy_total = sum(r[2] for r in rows)
+    matcher_total = sum(r[3] for r in rows)
+    print("-" * 78)
+    print(f"Files: {len(rows)}")
+    print(f"Per-file mean: loop {legacy_total / len(rows):.2f} ms, matcher {matcher_total / len(rows):.2f} ms")
+    print(f"Site total: loop {legacy_total:.0f} ms, matcher {matcher_total:.0f} ms "
+          f"({legacy_total / max(matcher_total, 1e-6):.0f}x)")
+    print(f"Identical output: {len(rows) - len(mismatches)}/{len(rows)} files")
+    for file_path in mismatches:
+        print(f"  - differs: {file_path}")
+
+if __name__ == "__main__":
+    main()
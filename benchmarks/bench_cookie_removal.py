@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Benchmark: structural remove_cookie_code vs the original whole-page regex pass
+Run from the site root: python benchmarks/bench_cookie_removal.py [--largest 8] [--budget 2]
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+
+SITE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SITE_ROOT)
+
+from sitecore import find_html_files, load_script
+
+def legacy_remove_cookie_code(content):
+    """The original remove_cookie_code, kept verbatim as the baseline"""
+    changes_made = []
+
+    # 1. Remove all cookie-related HTML elements
+    html_patterns = [
+        # Cookie consent popups with various IDs
+        r'<div\s+id=["\']cookieConsent["\'][^>]*>.*?</div>\s*(?=\n|\r|\s*<)',
+        r'<div\s+id=["\']cookieBanner["\'][^>]*>.*?</div>\s*(?=\n|\r|\s*<)',
+        # Any div with cookie/consent classes
+        r'<div[^>]*class=["\'][^"\']*(?:cookie|consent)[^"\']*["\'][^>]*>.*?</div>\s*(?=\n|\r|\s*<)',
+        # Comments about cookie consent
+        r'<!--.*?[Cc]ookie.*?[Cc]onsent.*?-->',
+        r'<!--.*?[Cc]onsent.*?[Cc]ookie.*?-->',
+    ]
+
+    for pattern in html_patterns:
+        matches = re.findall(pattern, content, re.DOTALL | re.IGNORECASE)
+        if matches:
+            content = re.sub(pattern, '', content, flags=re.DOTALL | re.IGNORECASE)
+            changes_made.append(f"Removed {len(matches)} cookie HTML elements")
+
+    # 2. Remove all cookie-related CSS
+    css_patterns = [
+        # Cookie consent CSS blocks
+        r'/\*[^*]*[Cc]ookie[^*]*[Cc]onsent[^*]*\*/.*?(?=\n\s*/\*|\n\s*[.#@]|\n\s*</style>|\n\s*$)',
+        r'\.cookie-[^{]*\{[^}]*\}',
+        r'\.consent-[^{]*\{[^}]*\}',
+        r'#cookieConsent[^{]*\{[^}]*\}',
+        r'#cookieBanner[^{]*\{[^}]*\}',
+        # Cookie hidden class
+        r'\.cookie-hidden\s*\{[^}]*\}',
+    ]
+
+    for pattern in css_patterns:
+        matches = re.findall(pattern, content, re.DOTALL | re.IGNORECASE)
+        if matches:
+            content = re.sub(pattern, '', content, flags=re.DOTALL | re.IGNORECASE)
+            changes_made.append(f"Removed {len(matches)} cookie CSS rules")
+
+    # 3. Remove all cookie-related JavaScript functions
+    js_function_patterns = [
+        # Individual function removals
+        r'function\s+(?:accept|reject|decline)(?:All)?Cookies?\s*\([^)]*\)\s*\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}',
+        r'function\s+(?:hide|show)Cookie(?:Popup|Banner)\s*\([^)]*\)\s*\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}',
+        r'function\s+checkCookieConsent\s*\([^)]*\)\s*\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}',
+        r'function\s+showCookieBanner\s*\([^)]*\)\s*\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}',
+        # Wrapper functions
+        r'function\s+(?:acceptCookies|rejectCookies|declineCookies)\s*\([^)]*\)\s*\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}',
+    ]
+
+    for pattern in js_function_patterns:
+        matches = re.findall(pattern, content, re.DOTALL | re.IGNORECASE)
+        if matches:
+            content = re.sub(pattern, '', content, flags=re.DOTALL | re.IGNORECASE)
+            changes_made.append(f"Removed {len(matches)} cookie JavaScript functions")
+
+    # 4. Remove cookie-related event listeners and scripts
+    js_script_patterns = [
+        # Event listeners for cookie functions
+        r'document\.addEventListener\(["\'](?:DOMContentLoaded|click)["\'],\s*(?:checkCookieConsent|acceptCookies|rejectCookies)[^)]*\)[^;]*;?',
+        r'window\.addEventListener\(["\'](?:DOMContentLoaded|load)["\'],\s*(?:checkCookieConsent|function[^}]*cookie[^}]*)[^)]*\)[^;]*;?',
+        # Button event listeners
+        r'(?:acceptBtn|rejectBtn|declineBtn)\.addEventListener\([^)]+\)[^;]*;?',
+        # Cookie-related IIFEs and script blocks
+        r'\(function\(\)\s*\{\s*["\']use strict["\'];[^}]*(?:cookie|consent)[^}]*\}\)\(\);?',
+        # Simple click handlers
+        r'// (?:Simple|Removed)[^\n]*(?:cookie|consent)[^\n]*\n',
+    ]
+
+    for pattern in js_script_patterns:
+        matches = re.findall(pattern, content, re.DOTALL | re.IGNORECASE)
+        if matches:
+            content = re.sub(pattern, '', content, flags=re.DOTALL | re.IGNORECASE)
+            changes_made.append(f"Removed {len(matches)} cookie JavaScript handlers")
+
+    # 5. Remove cookie-related comments and cleanup
+    comment_patterns = [
+        r'//[^\n]*(?:[Cc]ookie|[Cc]onsent)[^\n]*\n?',
+        r'/\*[^*]*(?:[Cc]ookie|[Cc]onsent)[^*]*\*/',
+        # Empty script tags
+        r'<script[^>]*>\s*</script>',
+        # Multiple empty lines
+        r'\\n\\s*\\n\\s*\\n',
+    ]
+
+    for pattern in comment_patterns:
+        matches = re.findall(pattern, content, re.IGNORECASE)
+        if matches:
+            content = re.sub(pattern, lambda m: '\\n' if '\\n' in pattern else '', content, flags=re.IGNORECASE)
+            changes_made.append(f"Cleaned up {len(matches)} cookie comments/whitespace")
+
+    # 6. Clean up onclick handlers in HTML
+    onclick_patterns = [
+        r'onclick=["\'](?:accept|reject|decline)(?:All)?Cookies\(\)["\']',
+    ]
+
+    for pattern in onclick_patterns:
+        matches = re.findall(pattern, content, re.IGNORECASE)
+        if matches:
+            content = re.sub(pattern, '', content, flags=re.IGNORECASE)
+            changes_made.append(f"Removed {len(matches)} onclick cookie handlers")
+
+    # 7. Final cleanup - remove empty lines and fix spacing
+    content = re.sub(r'\\n\\s*\\n\\s*\\n+', '\\n\\n', content)  # Multiple empty lines
+    content = re.sub(r'\\s*\\n\\s*\\n\\s*</script>', '\\n</script>', content)  # Empty script tags
+    content = re.sub(r'<script>\\s*</script>', '', content)  # Completely empty scripts
+
+    return content, changes_made
+
+def adversarial_pages(size_kb):
+    """Inputs that make unanchored lazy patterns rescan the rest of the page from every start"""
+    repeat = size_kb * 1024
+    return {
+        'unclosed <!-- cookie comments': '<html><body>' + '<!-- cookie ' * (repeat // 12) + '</body></html>',
+        'unclosed cookie divs': '<html><body>' + '<div class="cookie">x ' * (repeat // 22) + '</body></html>',
+        'unterminated "use strict" IIFEs': '<script>' + '(function(){"use strict"; cookie ' * (repeat // 33) + '</script>',
+        'unclosed consent CSS comment': '<style>' + '/* cookie consent */ .a{}\n' * (repeat // 27) + '</style>',
+    }
+
+def timed(func, content, cookies, budget):
+    """(ms, timed_out) for one call, interrupted once it passes the budget"""
+    start = time.perf_counter()
+    try:
+        with cookies.TimeBudget(budget, 'benchmark'):
+            func(content)
+    except cookies.CookieRemovalTimeout:
+        return (time.perf_counter() - start) * 1000, True
+    return (time.perf_counter() - start) * 1000, False
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--largest', type=int, default=8, help='how many of the largest real pages to time')
+    parser.add_argument('--adversarial-kb', type=int, default=128, help='size of each synthetic worst-case page')
+    parser.add_argument('--budget', type=float, default=2.0, help='seconds before a call is abandoned')
+    args = parser.parse_args()
+
+    os.chdir(SITE_ROOT)
+    cookies = load_script('nuke-all-cookie-code.py')
+
+    pages = []
+    for file_path in find_html_files('.'):
+        with open(file_path, 'r', encoding='utf-8') as f:
+            pages.append((file_path, f.read()))
+    pages.sort(key=lambda page: len(page[1]), reverse=True)
+
+    cases = pages[:args.largest] + list(adversarial_pages(args.adversarial_kb).items())
+
+    print("remove_cookie_code benchmark")
+    print("=" * 92)
+    print(f"{'page':<50} {'KB':>6} {'legacy ms':>12} {'new ms':>10} {'x':>6}")
+    worst_new = 0.0
+    for name, content in cases:
+        legacy_ms, legacy_timeout = timed(legacy_remove_cookie_code, content, cookies, args.budget)
+        new_ms, new_timeout = timed(cookies.remove_cookie_code, content, cookies, args.budget)
+        worst_new = max(worst_new, new_ms)
+        legacy_col = f">{args.budget * 1000:.0f}" if legacy_timeout else f"{legacy_ms:.2f}"
+        new_col = f">{args.budget * 1000:.0f}" if new_timeout else f"{new_ms:.2f}"
+        print(f"{name[:50]:<50} {len(content) / 1024:>6.1f} {legacy_col:>12} {new_col:>10} "
+              f"{legacy_ms / max(new_ms, 1e-6):>6.1f}")
+
+    print("-" * 92)
+    print(f"Slowest structural run: {worst_new:.1f} ms (budget {args.budget * 1000:.0f} ms)")
+    sys.exit(1 if worst_new > args.budget * 1000 else 0)
+
+if __name__ == "__main__":
+    main()
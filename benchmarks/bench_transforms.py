@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Benchmark every per-page HTML transform against a synthetic site
+Run from anywhere: python benchmarks/bench_transforms.py --pages 1000 10000 [--compare old.json]
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from contextlib import redirect_stdout
+
+from synthetic_site import SITE_ROOT, generate_site, load_templates
+
+import sitecore
+from sitecore import load_script
+
+RESULTS_DIR = os.path.join(SITE_ROOT, 'benchmarks', 'results')
+
+def build_transforms():
+    """(name, callable(ctx)) for every transform worth timing
+
+    Each callable gets a per-page context with the inputs the function
+    expects already computed (page info, category, parsed document), so the
+    timing covers only the function itself.
+    """
+    seo = load_script('implement-technical-seo.py')
+    linking = load_script('implement-internal-linking.py')
+    advanced = load_script('implement-advanced-linking.py')
+    cookies = load_script('nuke-all-cookie-code.py')
+    validator = load_script('validate-internal-links.py')
+    analytics = load_script('fix-analytics.py')
+    email = load_script('add-email-capture.py')
+    consent = load_script('add-global-cookie-consent.py')
+    navigation = load_script('fix_all_navigation.py')
+    old_navigation = load_script('remove_old_navigation.py')
+
+    optimizer = seo.TechnicalSEOOptimizer()
+
+    return [
+        ('sitecore.Document', lambda ctx: sitecore.Document(ctx['content'])),
+        ('seo.extract_page_info', lambda ctx: optimizer.extract_page_info(ctx['content'])),
+        ('seo.add_missing_meta_tags', lambda ctx: optimizer.add_missing_meta_tags(ctx['content'], ctx['page_info'])),
+        ('seo.add_canonical_tag', lambda ctx: optimizer.add_canonical_tag(ctx['content'], ctx['file_path'])),
+        ('seo.add_open_graph_tags', lambda ctx: optimizer.add_open_graph_tags(ctx['content'], ctx['page_info'], ctx['file_path'])),
+        ('seo.add_twitter_cards', lambda ctx: optimizer.add_twitter_cards(ctx['content'], ctx['page_info'])),
+        ('seo.optimize_images', lambda ctx: optimizer.optimize_images(ctx['content'], ctx['page_info'])),
+        ('seo.add_security_headers', lambda ctx: optimizer.add_security_headers(ctx['content'])),
+        ('seo.fix_external_links', lambda ctx: optimizer.fix_external_links(ctx['content'])),
+        ('seo.validate_schema_markup', lambda ctx: optimizer.validate_schema_markup(ctx['content'])),
+        ('seo.optimize_content', lambda ctx: optimizer.optimize_content(ctx['content'], ctx['file_path'])),
+        ('linking.add_breadcrumb_navigation', lambda ctx: linking.add_breadcrumb_navigation(ctx['content'], ctx['link_info'])),
+        ('linking.add_category_page_links', lambda ctx: linking.add_category_page_links(ctx['content'], ctx['link_info'])),
+        ('linking.add_app_name_links', lambda ctx: linking.add_app_name_links(ctx['content'], ctx['link_info'])),
+        ('linking.add_related_content_section', lambda ctx: linking.add_related_content_section(ctx['content'], ctx['link_info'])),
+        ('linking.apply_internal_linking', lambda ctx: linking.apply_internal_linking(ctx['content'], ctx['file_path'])),
+        ('advanced.add_cross_category_connections', lambda ctx: advanced.add_cross_category_connections(ctx['content'], ctx['category'])),
+        ('advanced.add_store_size_segmentation', lambda ctx: advanced.add_store_size_segmentation(ctx['content'])),
+        ('advanced.add_integration_ecosystem_links', lambda ctx: advanced.add_integration_ecosystem_links(ctx['content'])),
+        ('advanced.add_hub_page_connections', lambda ctx: advanced.add_hub_page_connections(ctx['content'], ctx['file_path'])),
+        ('advanced.enhance_related_sections', lambda ctx: advanced.enhance_related_sections(ctx['content'])),
+        ('advanced.apply_advanced_linking', lambda ctx: advanced.apply_advanced_linking(ctx['content'], ctx['file_path'])),
+        ('cookies.remove_cookie_code', lambda ctx: cookies.remove_cookie_code(ctx['content'])),
+        ('navigation.remove_old_navigation_css', lambda ctx: old_navigation.remove_old_navigation_css(ctx['content'])),
+        ('navigation.add_navigation_to_content', lambda ctx: navigation.add_navigation_to_content(ctx['content'])),
+        ('analytics.fix_analytics_content', lambda ctx: analytics.fix_analytics_content(ctx['content'])),
+        ('email.add_email_capture_to_content', lambda ctx: email.add_email_capture_to_content(ctx['content'])),
+        ('consent.add_cookie_consent_to_content', lambda ctx: consent.add_cookie_consent_to_content(ctx['content'])),
+        ('validator.extract_internal_links', lambda ctx: validator.extract_internal_links(ctx['doc'], ctx['file_path'])),
+        ('validator.check_link_density', lambda ctx: validator.check_link_density(ctx['doc'])),
+        ('validator.validate_content_flow', lambda ctx: validator.validate_content_flow(ctx['doc'])),
+    ], {
+        'seo': optimizer,
+        'linking': linking,
+        'advanced': advanced,
+    }
+
+def page_context(file_path, content, modules):
+    """Inputs for every transform, computed outside the timed region"""
+    return {
+        'file_path': file_path,
+        'content': content,
+        'page_info': modules['seo'].extract_page_info(content),
+        'link_info': modules['linking'].get_current_page_info(file_path),
+        'category': modules['advanced'].get_page_category(file_path),
+        'doc': sitecore.Document(content, file_path),
+    }
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))]
+
+def summarize(samples_ms):
+    values = sorted(samples_ms)
+    total_s = sum(values) / 1000
+    return {
+        'pages': len(values),
+        'p50_ms': round(percentile(values, 0.50), 4),
+        'p95_ms': round(percentile(values, 0.95), 4),
+        'mean_ms': round(sum(values) / max(len(values), 1), 4),
+        'max_ms': round(values[-1] if values else 0.0, 4),
+        'pages_per_sec': round(len(values) / total_s, 1) if total_s else None,
+    }
+
+def run_size(pages, seed, transforms, modules, templates):
+    """Time every transform on every synthetic page; returns the per-size results record"""
+    samples = {name: [] for name, _ in transforms}
+    total_bytes = 0
+
+    with open(os.devnull, 'w') as devnull:
+        for index, (file_path, content) in enumerate(generate_site(pages, seed, templates)):
+            if index % 250 == 0:
+                print(f"  {pages} pages: {index}/{pages}", file=sys.stderr)
+            total_bytes += len(content)
+            ctx = page_context(file_path, content, modules)
+
+            # The transforms chat on stdout; keep the report readable
+            with redirect_stdout(devnull):
+                for name, func in transforms:
+                    sitecore.parse.cache_clear()  # no carry-over between transforms
+                    start = time.perf_counter()
+                    func(ctx)
+                    samples[name].append((time.perf_counter() - start) * 1000)
+
+    return {
+        'pages': pages,
+        'mean_page_kb': round(total_bytes / max(pages, 1) / 1024, 1),
+        'transforms': {name: summarize(values) for name, values in samples.items()},
+    }
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=SITE_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+def print_results(results):
+    for size in results['sizes']:
+        print(f"\nSynthetic site: {size['pages']} pages (mean {size['mean_page_kb']} KB/page)")
+        print("=" * 92)
+        print(f"{'transform':<46} {'p50 ms':>9} {'p95 ms':>9} {'mean ms':>9} {'max ms':>9} {'pages/s':>8}")
+        print("-" * 92)
+        for name, stats in size['transforms'].items():
+            print(f"{name[:46]:<46} {stats['p50_ms']:>9.3f} {stats['p95_ms']:>9.3f} {stats['mean_ms']:>9.3f} "
+                  f"{stats['max_ms']:>9.2f} {stats['pages_per_sec'] or 0:>8.0f}")
+
+def compare_results(results, baseline, tolerance, min_ms):
+    """Print p50/p95 deltas against a previous results file; returns the regressed transforms"""
+    regressions = []
+    baseline_sizes = {size['pages']: size for size in baseline.get('sizes', [])}
+
+    for size in results['sizes']:
+        old = baseline_sizes.get(size['pages'])
+        if not old:
+            print(f"\nNo baseline for {size['pages']} pages")
+            continue
+
+        print(f"\nCompared with {baseline.get('commit', '?')} at {size['pages']} pages (tolerance {tolerance:.0%})")
+        print(f"{'transform':<46} {'p50':>10} {'p95':>10}")
+        for name, stats in size['transforms'].items():
+            old_stats = old['transforms'].get(name)
+            if not old_stats:
+                print(f"{name[:46]:<46} {'new':>10} {'new':>10}")
+                continue
+            deltas = []
+            regressed = False
+            for key in ('p50_ms', 'p95_ms'):
+                before = old_stats[key]
+                delta = (stats[key] - before) / before if before else 0.0
+                deltas.append(delta)
+                # Sub-min_ms functions are all timer noise in relative terms
+                regressed |= delta > tolerance and stats[key] - before > min_ms
+            flag = ''
+            if regressed:
+                flag = '  REGRESSION'
+                regressions.append((size['pages'], name))
+            print(f"{name[:46]:<46} {deltas[0]:>+10.1%} {deltas[1]:>+10.1%}{flag}")
+
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--pages', type=int, nargs='+', default=[1000], help='site sizes to run (default: 1000)')
+    parser.add_argument('--seed', type=int, default=0, help='synthetic site seed (default: 0)')
+    parser.add_argument('--only', help='only time transforms whose name contains this text')
+    parser.add_argument('--output', help='results JSON path (default: benchmarks/results/transforms-<commit>.json)')
+    parser.add_argument('--compare', metavar='JSON', help='previous results file to diff against')
+    parser.add_argument('--tolerance', type=float, default=0.10, help='p50/p95 slowdown that counts as a regression')
+    parser.add_argument('--min-ms', type=float, default=0.05, help='ignore slowdowns smaller than this many ms')
+    args = parser.parse_args()
+
+    os.chdir(SITE_ROOT)
+    transforms, modules = build_transforms()
+    if args.only:
+        transforms = [(name, func) for name, func in transforms if args.only in name]
+
+    templates = load_templates()
+    commit = git_commit()
+    results = {
+        'commit': commit,
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'seed': args.seed,
+        'sizes': [run_size(pages, args.seed, transforms, modules, templates) for pages in args.pages],
+    }
+
+    print_results(results)
+
+    output = args.output or os.path.join(RESULTS_DIR, f'transforms-{commit}.json')
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=1)
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare_results(results, baseline, args.tolerance, args.min_ms)
+        if regressions:
+            print(f"\n{len(regressions)} transform(s) regressed beyond {args.tolerance:.0%}")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
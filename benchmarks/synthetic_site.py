@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Synthetic site generator for the benchmarks
+Builds N pages from the real page shapes (reviews, listicles, FAQs, blog posts) by reshuffling their paragraphs
+"""
+
+import argparse
+import os
+import random
+import sys
+
+SITE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SITE_ROOT)
+
+from sitecore import Document, find_html_files
+
+PAGE_KINDS = ('review', 'listicle', 'faq', 'blog')
+
+def page_kind(file_path):
+    """Which page shape a real page is, or None for one-offs (home, legal, archives)"""
+    parts = file_path.split('/')
+    if parts[0] == 'faqs' and len(parts) > 2:
+        return 'faq'
+    if parts[0] == 'blog' and len(parts) > 2:
+        return 'blog'
+    if parts[0].endswith('-review'):
+        return 'review'
+    if parts[0].startswith('best-'):
+        return 'listicle'
+    return None
+
+def synthetic_path(kind, template_path, index):
+    """A file path with the same shape as the template, so path-driven rules behave alike"""
+    slug = template_path.split('/')[-2]
+    if kind == 'review':
+        return f"{slug[:-len('-review')]}-{index}-review/index.html"
+    if kind == 'listicle':
+        return f"{slug}-{index}/index.html"
+    if kind == 'faq':
+        return f"faqs/{slug}-{index}/index.html"
+    return f"blog/{slug}-{index}/index.html"
+
+def load_templates(root=SITE_ROOT):
+    """Real pages grouped by kind: {kind: [(file_path, content)]}"""
+    templates = {kind: [] for kind in PAGE_KINDS}
+    for file_path in find_html_files(root):
+        kind = page_kind(file_path)
+        if kind:
+            with open(os.path.join(root, file_path), 'r', encoding='utf-8') as f:
+                templates[kind].append((file_path, f.read()))
+    return templates
+
+def shuffle_paragraphs(content, rng):
+    """Same markup skeleton, paragraph bodies permuted among themselves"""
+    doc = Document(content)
+    paragraphs = [node for node in doc.paragraphs if node.close_start > node.open_end]
+    bodies = [doc.inner(node) for node in paragraphs]
+    rng.shuffle(bodies)
+
+    edit = doc.edit()
+    for node, body in zip(paragraphs, bodies):
+        edit.replace(node.open_end, node.close_start, body)
+    return edit.render()
+
+def generate_site(pages, seed=0, templates=None):
+    """Yield (file_path, content) for pages synthetic pages, one at a time
+
+    Pages are produced lazily so a 10k-page run never holds the whole site
+    in memory. Kinds rotate so every shape is equally represented.
+    """
+    templates = templates or load_templates()
+    kinds = [kind for kind in PAGE_KINDS if templates[kind]]
+    rng = random.Random(seed)
+
+    for index in range(pages):
+        kind = kinds[index % len(kinds)]
+        template_path, content = rng.choice(templates[kind])
+        yield synthetic_path(kind, template_path, index), shuffle_paragraphs(content, rng)
+
+def write_site(output_dir, pages, seed=0):
+    """Materialize a synthetic site on disk (for scripts that walk the filesystem)"""
+    count = 0
+    for file_path, content in generate_site(pages, seed):
+        full_path = os.path.join(output_dir, file_path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        with open(full_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        count += 1
+    return count
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('output_dir', help='directory to write the synthetic site into')
+    parser.add_argument('--pages', type=int, default=1000, help='number of pages (default: 1000)')
+    parser.add_argument('--seed', type=int, default=0, help='random seed (default: 0)')
+    args = parser.parse_args()
+
+    count = write_site(args.output_dir, args.pages, args.seed)
+    print(f"Wrote {count} synthetic pages to {args.output_dir}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Second-run check: every page through the given stages twice, in memory; the second pass must change nothing
+Run from anywhere: python benchmarks/verify_idempotent_stages.py [navigation,seo | all]
+"""
+
+import argparse
+import os
+import sys
+from contextlib import redirect_stdout
+
+SITE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SITE_ROOT)
+
+from sitecore import find_html_files
+from sitepipeline.runner import process_page
+from sitepipeline.stages import get_stages
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('stages', nargs='?', default='all', help="comma-separated stage names, or 'all' (default)")
+    parser.add_argument('--root', default=SITE_ROOT, help='site root (default: this checkout)')
+    args = parser.parse_args()
+
+    stages = get_stages(args.stages)
+    changed_again = {stage.name: [] for stage in stages}
+    errors = 0
+    html_files = find_html_files(args.root)
+    for file_path in html_files:
+        with open(os.path.join(args.root, file_path), 'r', encoding='utf-8') as f:
+            content = f.read()
+        # Some scripts print per page; only the verdict matters here
+        with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+            content, _ = process_page(stages, content, file_path, args.root)
+            _, stage_results = process_page(stages, content, file_path, args.root)
+        for name, _, changed, _, error in stage_results:
+            if error:
+                print(f"  [ERROR] {name} on {file_path}: {error}")
+                errors += 1
+            elif changed:
+                changed_again[name].append(file_path)
+
+    print(f"{'stage':<18} {'pages changed on the second pass':>34}")
+    for name, pages in changed_again.items():
+        print(f"{name:<18} {len(pages):>34}  {', '.join(pages[:3])}{' ...' if len(pages) > 3 else ''}")
+
+    failing = [name for name, pages in changed_again.items() if pages]
+    print(f"\nPages: {len(html_files)}; "
+          + (f"not idempotent: {', '.join(failing)}" if failing else "every stage is a no-op on its own output"))
+    sys.exit(1 if failing or errors else 0)
+
+if __name__ == "__main__":
+    main()
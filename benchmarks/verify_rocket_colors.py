@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Golden-image check: vectorized enhance_pixels vs the original per-pixel loop
+Run from the site root: python benchmarks/verify_rocket_colors.py [--image favicon.png ...]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+from PIL import Image
+
+SITE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SITE_ROOT)
+
+from sitecore import load_script
+
+def legacy_enhance_pixels(data):
+    """The original nested loop from enhance_rocket_colors, kept verbatim as the golden reference"""
+    data = data.copy()
+    for y in range(data.shape[0]):
+        for x in range(data.shape[1]):
+            pixel = data[y, x]
+            if pixel[3] > 0:  # If not transparent
+                r, g, b, a = pixel
+
+                # Brighten overall
+                r = min(255, int(r * 1.3))
+                g = min(255, int(g * 1.3))
+                b = min(255, int(b * 1.3))
+
+                if g > r and g > b:
+                    g = min(255, int(g * 1.4))
+                    b = min(255, int(b * 1.2))
+                elif r > g and r > b:
+                    r = min(255, int(r * 1.4))
+                    g = min(255, int(g * 1.1))
+                elif b > r and b > g:
+                    b = min(255, int(b * 1.4))
+                    g = min(255, int(g * 1.1))
+
+                data[y, x] = [r, g, b, a]
+    return data
+
+def golden_images(size):
+    """Deterministic inputs: random noise, every 8-bit value per channel, and hue ties"""
+    rng = np.random.default_rng(20250929)
+    noise = rng.integers(0, 256, size=(size, size, 4), dtype=np.uint8)
+    noise[rng.random((size, size)) < 0.2, 3] = 0  # transparent patches
+
+    ramp = np.arange(256, dtype=np.uint8)
+    sweep = np.stack(np.meshgrid(ramp, ramp, indexing='ij'), axis=-1)
+    sweep = np.concatenate([sweep, 255 - sweep[..., :1], np.full((256, 256, 1), 255, np.uint8)], axis=-1)
+
+    ties = np.zeros((64, 64, 4), dtype=np.uint8)
+    ties[..., :3] = rng.integers(0, 256, size=(64, 64, 1), dtype=np.uint8)  # r == g == b
+    ties[..., 3] = 255
+    ties[::2, :, 1] = ties[::2, :, 0]  # r == g, blue varies
+    ties[::2, :, 2] = rng.integers(0, 256, size=(32, 64), dtype=np.uint8)
+
+    return {'noise': noise, 'channel-sweep': sweep, 'ties': ties}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--image', action='append', default=[], help='also check a real source image (repeatable)')
+    parser.add_argument('--size', type=int, default=512, help='edge length of the random noise image')
+    args = parser.parse_args()
+
+    rocket = load_script('enhance-rocket-colors.py')
+
+    cases = golden_images(args.size)
+    for path in args.image:
+        with Image.open(path) as image:
+            cases[path] = np.array(image.convert('RGBA'))
+
+    failures = 0
+    print(f"{'case':<32} {'pixels':>9} {'loop ms':>10} {'numpy ms':>9} {'x':>6}  result")
+    for name, data in cases.items():
+        start = time.perf_counter()
+        expected = legacy_enhance_pixels(data)
+        loop_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        actual = rocket.enhance_pixels(data)
+        numpy_ms = (time.perf_counter() - start) * 1000
+
+        identical = actual.dtype == expected.dtype and actual.tobytes() == expected.tobytes()
+        failures += not identical
+        print(f"{name[:32]:<32} {data.shape[0] * data.shape[1]:>9} {loop_ms:>10.1f} {numpy_ms:>9.2f} "
+              f"{loop_ms / max(numpy_ms, 1e-6):>6.0f}  {'identical' if identical else 'MISMATCH'}")
+
+    print(f"\n{len(cases) - failures}/{len(cases)} cases byte-for-byte identical")
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
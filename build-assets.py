@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Asset build stage: minified, content-hashed copies of the site's JS/CSS, and every page pointed at them
+Hashed files never change under the same name, so they can be served with Cache-Control: public, max-age=31536000, immutable
+"""
+
+import argparse
+import json
+import os
+
+from sitecore import find_html_files
+from sitepipeline.assets import (ASSET_PATTERNS, ASSET_SOURCES, MANIFEST_FILE, fingerprinted_name,
+                                 load_manifest, rewrite_asset_references)
+from sitepipeline.minify import minify
+from sitepipeline.parallel import add_jobs_argument, run_parallel
+from sitepipeline.transaction import Transaction, add_dry_run_argument, dry_run_mode, remove_file, write_text
+
+def build_asset(root, source):
+    """Minify one source and stage its hashed copy; returns (hashed name, source bytes, minified bytes, written)"""
+    with open(os.path.join(root, source), 'r', encoding='utf-8') as f:
+        content = f.read()
+    minified = minify(source, content)
+    hashed = fingerprinted_name(source, minified)
+    hashed_path = os.path.join(root, hashed)
+
+    written = not os.path.exists(hashed_path)
+    if written:
+        write_text(hashed_path, minified, [f"Built {hashed}"])
+    return hashed, len(content.encode('utf-8')), len(minified.encode('utf-8')), written
+
+def stale_copies(root, source, current):
+    """Earlier hashed copies of source that nothing should reference any more"""
+    directory = os.path.dirname(source)
+    pattern = ASSET_PATTERNS[source]
+    stale = []
+    for name in sorted(os.listdir(os.path.join(root, directory) or '.')):
+        relative = f'{directory}/{name}' if directory else name
+        if relative not in (source, current) and pattern.match(relative):
+            stale.append(relative)
+    return stale
+
+def rewrite_page(task):
+    """Point one page's asset tags at the hashed copies; returns the number of references changed"""
+    full_path, manifest = task
+    with open(full_path, 'r', encoding='utf-8') as f:
+        content = f.read()
+    new_content, changed = rewrite_asset_references(content, manifest)
+    if changed:
+        write_text(full_path, new_content, [f"Rewrote {changed} asset references"])
+    return changed
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Minify and fingerprint the site's JS/CSS and rewrite page references")
+    parser.add_argument('--root', default='.', help='site root (default: current directory)')
+    add_jobs_argument(parser)
+    add_dry_run_argument(parser)  # consumed by dry_run_mode() at the entry point; listed for --help
+    args = parser.parse_args(argv)
+
+    print("Building fingerprinted assets")
+    print("=" * 72)
+
+    manifest = {}
+    total_before = total_after = 0
+    print(f"{'source':<28} {'hashed copy':<36} {'bytes':>7} {'min':>7}")
+    for source in ASSET_SOURCES:
+        hashed, before, after, written = build_asset(args.root, source)
+        manifest[source] = hashed
+        total_before += before
+        total_after += after
+        print(f"{source:<28} {hashed:<36} {before:>7,} {after:>7,}{'  (new)' if written else ''}")
+        for stale in stale_copies(args.root, source, hashed):
+            remove_file(os.path.join(args.root, stale))
+            print(f"  removed stale copy {stale}")
+    print(f"Minified {total_before:,} -> {total_after:,} bytes ({100 - 100 * total_after / max(total_before, 1):.0f}% smaller)")
+
+    manifest_text = json.dumps(manifest, indent=2, sort_keys=True) + '\n'
+    if manifest != load_manifest(args.root):
+        write_text(os.path.join(args.root, MANIFEST_FILE), manifest_text, ["Updated asset manifest"])
+
+    # One pass over every page, all references at once
+    html_files = find_html_files(args.root)
+    tasks = [(os.path.join(args.root, file_path), manifest) for file_path in html_files]
+    pages_changed = references = 0
+    for (full_path, _), changed, error in run_parallel(rewrite_page, tasks, jobs=args.jobs):
+        if error:
+            print(f"Error processing {full_path}: {error}")
+            continue
+        if changed:
+            pages_changed += 1
+            references += changed
+
+    print(f"\nPages scanned: {len(html_files)}")
+    print(f"Pages updated: {pages_changed} ({references} asset references rewritten)")
+
+if __name__ == "__main__":
+    with Transaction(dry_run=dry_run_mode()):
+        main()
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Critical CSS build stage: each page's inline <head> styles split into what the first screen needs and the rest
+The critical rules stay inline; the full stylesheet moves to a fingerprinted file next to the page, loaded with
+media="print" onload so it no longer blocks rendering. Run it after scripts that edit inline CSS, or use --inline
+to put the full stylesheets back first. --inline restores the CSS minified, not the original block text, and
+leaves the cookie consent link deferred; for an exact undo, restore the split's run with python -m sitepipeline.
+"""
+
+import argparse
+import hashlib
+import os
+import re
+
+from sitecore import find_html_files, parse
+from sitepipeline.assets import asset_pattern, asset_source, fingerprinted_name
+from sitepipeline.critical import CRITICAL_ATTRIBUTE, FoldIndex, critical_css
+from sitepipeline.minify import minify_css
+from sitepipeline.parallel import add_jobs_argument, run_parallel
+from sitepipeline.transaction import Transaction, add_dry_run_argument, dry_run_mode, remove_file, write_text
+
+# Render-blocking stylesheets for markup a script adds; the script waits for the sheet (see assets/cookie-consent.js)
+DEFERRED_STYLESHEETS = ('assets/cookie-consent.css',)
+
+DEFER_ATTRIBUTES = 'media="print" onload="this.media=\'all\'"'
+
+def page_stylesheet(file_path, number):
+    """Source name of a page's nth <head> style block: blog/index.html -> blog/index.css, blog/index-2.css, ..."""
+    stem = os.path.splitext(file_path)[0]
+    return f'{stem}.css' if number == 1 else f'{stem}-{number}.css'
+
+def critical_digest(css):
+    return hashlib.sha256(css.encode('utf-8')).hexdigest()[:8]
+
+def local_path(root, href):
+    """File behind a root-relative stylesheet URL, or None for anything served from elsewhere"""
+    if not href or not href.startswith('/') or href.startswith('//'):
+        return None
+    return os.path.join(root, href.split('?')[0].lstrip('/'))
+
+def is_blocking(node):
+    media = (node.get('media') or 'all').lower()
+    return (node.get('rel') or '').lower() == 'stylesheet' and media not in ('print', 'none')
+
+def blocking_bytes(root, doc):
+    """Bytes of CSS the first render waits for: inline <head> styles plus each blocking local stylesheet once"""
+    total = sum(len(doc.inner(style).encode('utf-8')) for style in doc.find_all('style')
+                if doc.head is not None and style.start < doc.head.end)
+    fallbacks = doc.find_all('noscript')
+    seen = set()
+    for link in doc.find_all('link'):
+        if any(noscript.start < link.start < noscript.end for noscript in fallbacks):
+            continue
+        path = local_path(root, link.get('href'))
+        if is_blocking(link) and path and path not in seen and os.path.exists(path):
+            seen.add(path)
+            total += os.path.getsize(path)
+    return total
+
+def split_block(doc, style, index, number, file_path, root):
+    """(span to replace, new markup, page stylesheet name, its minified CSS) for one <head> style block"""
+    source = page_stylesheet(file_path, number)
+    start, end = style.start, style.end
+    if style.get(CRITICAL_ATTRIBUTE) is None:
+        full_css = minify_css(doc.inner(style))
+    else:
+        # Already split: the full stylesheet is the deferred file linked right after
+        if style.get(CRITICAL_ATTRIBUTE) != critical_digest(doc.inner(style)):
+            raise ValueError(f"critical CSS in {source} was edited since the split; run with --inline first")
+        pattern = asset_pattern(source)
+        link = next((node for node in doc.find_all('link') if node.start >= style.end
+                     and pattern.match(node.get('href') or '')), None)
+        path = link and local_path(root, link.get('href'))
+        if not path or not os.path.exists(path):
+            raise ValueError(f"page stylesheet for {source} is missing")
+        with open(path, 'r', encoding='utf-8') as f:
+            full_css = f.read()
+        noscript = next((node for node in doc.find_all('noscript') if node.start >= link.end), None)
+        end = noscript.end if noscript and not doc.text[link.end:noscript.start].strip() else link.end
+
+    hashed = fingerprinted_name(source, full_css)
+    critical = critical_css(full_css, index)
+    indent = doc.text[doc.text.rfind('\n', 0, start) + 1:start]
+    markup = (f'<style {CRITICAL_ATTRIBUTE}="{critical_digest(critical)}">{critical}</style>\n'
+              f'{indent}<link rel="stylesheet" href="/{hashed}" {DEFER_ATTRIBUTES}>\n'
+              f'{indent}<noscript><link rel="stylesheet" href="/{hashed}"></noscript>')
+    return (start, end), markup, hashed, full_css
+
+def inline_block(doc, style, number, file_path, root):
+    """(span, markup) putting a split block's full stylesheet back inline, or None for a block never split"""
+    if style.get(CRITICAL_ATTRIBUTE) is None:
+        return None
+    pattern = asset_pattern(page_stylesheet(file_path, number))
+    link = next((node for node in doc.find_all('link') if node.start >= style.end
+                 and pattern.match(node.get('href') or '')), None)
+    path = link and local_path(root, link.get('href'))
+    if not path or not os.path.exists(path):
+        raise ValueError(f"page stylesheet for {page_stylesheet(file_path, number)} is missing")
+    with open(path, 'r', encoding='utf-8') as f:
+        full_css = f.read()
+    noscript = next((node for node in doc.find_all('noscript') if node.start >= link.end), None)
+    end = noscript.end if noscript and not doc.text[link.end:noscript.start].strip() else link.end
+    return (style.start, end), f'<style>\n{full_css}</style>'
+
+def defer_stylesheets(doc, edit):
+    """Load DEFERRED_STYLESHEETS without blocking render, dropping repeat links to the same file; returns the count"""
+    seen = set()
+    changed = 0
+    for link in doc.find_all('link'):
+        if (link.get('rel') or '').lower() != 'stylesheet':
+            continue
+        source = asset_source(link.get('href') or '')
+        if source not in DEFERRED_STYLESHEETS:
+            continue
+        if source in seen:
+            line_start = doc.text.rfind('\n', 0, link.start) + 1
+            start = line_start if not doc.text[line_start:link.start].strip() else link.start
+            edit.replace(start, link.end + (doc.text[link.end:link.end + 1] == '\n' and start == line_start), '')
+            changed += 1
+        elif is_blocking(link):
+            opening = doc.text[link.start:link.open_end]
+            edit.replace(link.start, link.open_end, re.sub(r'\s*/?>$', f' {DEFER_ATTRIBUTES}>', opening))
+            changed += 1
+        seen.add(source)
+    return changed
+
+def process_page(task):
+    """Split one page's styles; returns (before bytes, after bytes, {page stylesheet: css}, deferred links)"""
+    root, file_path, inline = task
+    full_path = os.path.join(root, file_path)
+    with open(full_path, 'r', encoding='utf-8') as f:
+        content = f.read()
+    doc = parse(content)
+    before = blocking_bytes(root, doc)
+    head_styles = [style for style in doc.find_all('style') if doc.head is not None and style.start < doc.head.end]
+
+    edit = doc.edit()
+    stylesheets = {}
+    deferred = 0
+    if inline:
+        for number, style in enumerate(head_styles, 1):
+            block = inline_block(doc, style, number, file_path, root)
+            if block:
+                edit.replace(*block[0], block[1])
+    else:
+        index = FoldIndex(doc)
+        for number, style in enumerate(head_styles, 1):
+            span, markup, hashed, full_css = split_block(doc, style, index, number, file_path, root)
+            edit.replace(*span, markup)
+            stylesheets[hashed] = full_css
+        deferred = defer_stylesheets(doc, edit)
+
+    new_content = edit.render()
+    for hashed, css in stylesheets.items():
+        if not os.path.exists(os.path.join(root, hashed)):
+            write_text(os.path.join(root, hashed), css, [f"Built {hashed}"])
+    if new_content != content:
+        write_text(full_path, new_content, ["Inlined full stylesheet" if inline else "Split critical CSS"])
+
+    return before, blocking_bytes(root, parse(new_content)), sorted(stylesheets), deferred
+
+def stale_stylesheets(root, file_path, keep):
+    """Page stylesheets next to file_path that the page no longer links"""
+    directory = os.path.dirname(file_path)
+    stem = os.path.splitext(os.path.basename(file_path))[0]
+    pattern = re.compile(rf'^{re.escape(stem)}(?:-\d+)?\.[0-9a-f]+\.css$')
+    return [os.path.join(directory, name) for name in sorted(os.listdir(os.path.join(root, directory) or '.'))
+            if pattern.match(name) and os.path.join(directory, name) not in keep]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inline each page's critical CSS and defer the rest")
+    parser.add_argument('--root', default='.', help='site root (default: current directory)')
+    parser.add_argument('--inline', action='store_true',
+                        help='put each full page stylesheet back inline, minified; cookie consent links stay deferred '
+                             '(python -m sitepipeline restore --run RUN undoes a split exactly)')
+    add_jobs_argument(parser)
+    add_dry_run_argument(parser)  # consumed by dry_run_mode() at the entry point; listed for --help
+    args = parser.parse_args(argv)
+
+    print("Putting full stylesheets back inline" if args.inline else "Splitting critical CSS")
+    print("=" * 80)
+    print(f"{'page':<56} {'before':>10} {'after':>10} {'':>4}")
+
+    html_files = find_html_files(args.root)
+    tasks = [(args.root, file_path, args.inline) for file_path in html_files]
+    total_before = total_after = pages_changed = deferred_links = 0
+    for (_, file_path, _), outcome, error in run_parallel(process_page, tasks, jobs=args.jobs):
+        if error:
+            print(f"Error processing {file_path}: {error}")
+            continue
+        before, after, stylesheets, deferred = outcome
+        total_before += before
+        total_after += after
+        deferred_links += deferred
+        if before != after:
+            pages_changed += 1
+        change = f"{100 - 100 * after / before:.0f}%" if before else ''
+        print(f"{file_path:<56} {before:>10,} {after:>10,} {change:>4}")
+        for stale in stale_stylesheets(args.root, file_path, set(stylesheets) if not args.inline else set()):
+            remove_file(os.path.join(args.root, stale))
+
+    print(f"\nPages scanned: {len(html_files)}, first-render CSS changed on {pages_changed}")
+    change = 100 - 100 * total_after / max(total_before, 1)
+    print(f"First-render CSS: {total_before:,} -> {total_after:,} bytes "
+          f"({abs(change):.0f}% {'less' if change >= 0 else 'more'})")
+    if deferred_links:
+        print(f"Render-blocking links deferred or deduplicated: {deferred_links}")
+
+if __name__ == "__main__":
+    with Transaction(dry_run=dry_run_mode()):
+        main()
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Icon build stage: PNG, ICO (16/32/48), apple-touch and SVG variants from one decoded source
+Works offline from a local file or the content-addressed download cache; skips unchanged builds
+"""
+
+import argparse
+import base64
+import hashlib
+import io
+import json
+import os
+import sys
+
+from PIL import Image
+
+from sitecore import load_script
+
+SOURCE_URL = "https://imagedelivery.net/mYndgAUf_CYgFA1HoO_-GQ/43e7272a-fb53-44aa-f0f2-7656a83bc700/public"
+
+CACHE_DIR = os.path.join('.sitecache', 'icons')
+
+BUILD_VERSION = 2
+
+ICO_SIZES = [(16, 16), (32, 32), (48, 48)]
+APPLE_TOUCH_SIZE = (180, 180)
+SVG_SIZE = (64, 64)
+
+# Each variant renders the decoded source once and writes every output format from it
+VARIANTS = {
+    'with-background': {
+        'output': 'favicon-with-background',
+        'style': 'background',
+        'color': [42, 1, 52, 255],  # #2A0134 dark purple
+    },
+    'enhanced': {
+        'output': 'favicon-enhanced',
+        'style': 'enhanced',
+    },
+}
+
+# Scripts whose rendering code feeds into the build parameters
+RENDER_SCRIPTS = {
+    'background': 'add-favicon-background.py',
+    'enhanced': 'enhance-rocket-colors.py',
+}
+
+class SourceCache:
+    """Downloaded source images stored by content hash under .sitecache/icons/sources
+
+    urls.json maps each URL to the hash of the bytes it returned, so later
+    builds (and the older single-purpose scripts) never hit the network for a
+    URL that has been fetched once.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR):
+        self.dir = os.path.join(cache_dir, 'sources')
+        self.index_path = os.path.join(cache_dir, 'urls.json')
+
+    def _load_index(self):
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _blob_path(self, digest):
+        return os.path.join(self.dir, digest)
+
+    def lookup(self, url):
+        """Cached bytes for url, or None"""
+        digest = self._load_index().get(url)
+        if digest and os.path.exists(self._blob_path(digest)):
+            with open(self._blob_path(digest), 'rb') as f:
+                return f.read()
+        return None
+
+    def store(self, url, data):
+        digest = hashlib.sha256(data).hexdigest()
+        os.makedirs(self.dir, exist_ok=True)
+        with open(self._blob_path(digest), 'wb') as f:
+            f.write(data)
+
+        index = self._load_index()
+        index[url] = digest
+        tmp_path = self.index_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.index_path)
+        return digest
+
+    def fetch(self, url, offline=False):
+        """Bytes for url from the cache, downloading only on a miss when online"""
+        data = self.lookup(url)
+        if data is not None:
+            return data
+        if offline:
+            raise FileNotFoundError(f"{url} is not in the icon cache; pass --source FILE or run once with --fetch")
+
+        import requests  # only needed when priming the cache
+        response = requests.get(url)
+        response.raise_for_status()
+        self.store(url, response.content)
+        return response.content
+
+def read_source(source, offline=True, cache=None):
+    """Raw bytes of a local file or a (cached) URL"""
+    if source.startswith(('http://', 'https://')):
+        return (cache or SourceCache()).fetch(source, offline=offline)
+    with open(source, 'rb') as f:
+        return f.read()
+
+def build_params(name, variant):
+    """Everything besides the source that determines a variant's output bytes"""
+    render_script = os.path.join(os.path.dirname(os.path.abspath(__file__)), RENDER_SCRIPTS[variant['style']])
+    with open(render_script, 'rb') as f:
+        render_hash = hashlib.sha256(f.read()).hexdigest()
+    params = {
+        'version': BUILD_VERSION,
+        'variant': name,
+        'config': variant,
+        'ico_sizes': ICO_SIZES,
+        'apple_touch_size': APPLE_TOUCH_SIZE,
+        'svg_size': SVG_SIZE,
+        'render': render_hash,
+    }
+    return hashlib.sha256(json.dumps(params, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+def output_paths(variant, output_dir):
+    base = os.path.join(output_dir, variant['output'])
+    return {
+        'png': base + '.png',
+        'ico': base + '.ico',
+        'apple_touch': base + '-apple-touch.png',
+        'svg': base + '.svg',
+    }
+
+def render_variant(original, variant):
+    """Composite icon for one variant, from the already-decoded RGBA source"""
+    if variant['style'] == 'background':
+        return load_script('add-favicon-background.py').build_background_icon(original, tuple(variant['color']))
+    return load_script('enhance-rocket-colors.py').build_enhanced_icon(original)
+
+def png_bytes(image):
+    buffer = io.BytesIO()
+    image.save(buffer, 'PNG', optimize=True)
+    return buffer.getvalue()
+
+def write_outputs(icon, paths):
+    """PNG, multi-size ICO, apple-touch PNG and an SVG wrapping a small PNG"""
+    icon.save(paths['png'], 'PNG', optimize=True)
+
+    # Pillow only ever scales down to each size, so the ICO is saved from the full-size icon
+    icon.save(paths['ico'], format='ICO', sizes=ICO_SIZES)
+
+    icon.resize(APPLE_TOUCH_SIZE, Image.Resampling.LANCZOS).save(paths['apple_touch'], 'PNG', optimize=True)
+
+    embedded = base64.b64encode(png_bytes(icon.resize(SVG_SIZE, Image.Resampling.LANCZOS))).decode('ascii')
+    width, height = SVG_SIZE
+    with open(paths['svg'], 'w', encoding='utf-8') as f:
+        f.write(f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {width} {height}" width="{width}" height="{height}">\n'
+                f'  <image width="{width}" height="{height}" href="data:image/png;base64,{embedded}"/>\n'
+                f'</svg>\n')
+
+class IconBuildManifest:
+    """Source hash and parameter fingerprint of the last build of each variant"""
+
+    def __init__(self, cache_dir=CACHE_DIR):
+        self.path = os.path.join(cache_dir, 'manifest.json')
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.variants = json.load(f)
+        except (OSError, ValueError):
+            self.variants = {}
+
+    def is_fresh(self, name, source_hash, params, paths):
+        entry = self.variants.get(name)
+        return (entry is not None
+                and entry.get('source') == source_hash
+                and entry.get('params') == params
+                and all(os.path.exists(path) for path in paths.values()))
+
+    def record(self, name, source_hash, params, paths):
+        self.variants[name] = {'source': source_hash, 'params': params, 'outputs': sorted(paths.values())}
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.variants, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+def build_icons(source, variant_names=None, output_dir='.', offline=True, force=False):
+    """Build the requested variants; returns {variant: 'built' | 'skipped'}"""
+    data = read_source(source, offline=offline)
+    source_hash = hashlib.sha256(data).hexdigest()
+    manifest = IconBuildManifest()
+
+    original = None
+    results = {}
+    for name in variant_names or list(VARIANTS):
+        variant = VARIANTS[name]
+        params = build_params(name, variant)
+        paths = output_paths(variant, output_dir)
+
+        if not force and manifest.is_fresh(name, source_hash, params, paths):
+            results[name] = 'skipped'
+            continue
+
+        # Decode once, only when some variant actually needs rebuilding
+        if original is None:
+            original = Image.open(io.BytesIO(data)).convert('RGBA')
+            os.makedirs(output_dir, exist_ok=True)
+
+        write_outputs(render_variant(original, variant), paths)
+        manifest.record(name, source_hash, params, paths)
+        results[name] = 'built'
+
+    manifest.save()
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Build favicon/icon variants from one source image")
+    parser.add_argument('--source', default=SOURCE_URL, help='local image file or URL (URLs are read from the cache)')
+    parser.add_argument('--variant', action='append', choices=sorted(VARIANTS), help='variant to build (default: all)')
+    parser.add_argument('--output-dir', default='.', help='where icon files are written (default: site root)')
+    parser.add_argument('--fetch', action='store_true', help='allow downloading a URL source that is not cached yet')
+    parser.add_argument('--force', action='store_true', help='rebuild even when source and parameters are unchanged')
+    args = parser.parse_args()
+
+    print("Building icons...")
+    print(f"Source: {args.source}")
+
+    try:
+        results = build_icons(args.source, args.variant, args.output_dir, offline=not args.fetch, force=args.force)
+    except FileNotFoundError as e:
+        print(f"Error: {e}")
+        return False
+
+    for name, status in results.items():
+        paths = output_paths(VARIANTS[name], args.output_dir)
+        print(f"   {name}: {status}")
+        if status == 'built':
+            for path in paths.values():
+                print(f"      {path}")
+
+    built = sum(1 for status in results.values() if status == 'built')
+    print(f"\nIcon build complete: {built} built, {len(results) - built} unchanged")
+    return True
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
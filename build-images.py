@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Image build stage: resized AVIF/WebP copies of every local image pages use, and each <img> rewritten to offer them
+Copies are named by a hash of the source bytes and build settings, so a source is only decoded again when it or the
+settings change. Needs Pillow (and libavif or pillow-avif-plugin for AVIF) only when something must be built.
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import os
+import re
+
+from sitecore import find_html_files, parse
+from sitepipeline.images import (FORMATS, IMAGE_DIR, IMAGE_MANIFEST_FILE, RESPONSIVE_WIDTHS, load_image_manifest,
+                                 responsive_images, rewrite_images, variant_name, variant_widths)
+from sitepipeline.lcp import refresh_preload
+from sitepipeline.parallel import add_jobs_argument, run_parallel
+from sitepipeline.transaction import (Transaction, add_dry_run_argument, dry_run_mode, remove_file, write_bytes,
+                                      write_text)
+
+BUILD_VERSION = 1
+
+QUALITY = {'avif': 50, 'webp': 80}
+
+# hero.3f9a1c2b-640w.webp; anything else in IMAGE_DIR (staged writes included) is not ours to sweep
+VARIANT_FILE_PATTERN = re.compile(rf"^[^.].*\.[0-9a-f]{{8}}-\d+w\.(?:{'|'.join(FORMATS)})$")
+
+def build_params():
+    """Everything besides the source bytes that determines the copies"""
+    params = {'version': BUILD_VERSION, 'widths': RESPONSIVE_WIDTHS, 'quality': QUALITY, 'formats': list(FORMATS)}
+    return json.dumps(params, sort_keys=True)
+
+def source_digest(data, params):
+    return hashlib.sha256(data + params.encode('utf-8')).hexdigest()[:8]
+
+def available_formats():
+    """The FORMATS this Pillow can write"""
+    from PIL import Image, features
+    try:
+        import pillow_avif  # noqa: F401  (registers AVIF on Pillow releases without it)
+    except ImportError:
+        pass
+    Image.init()
+    formats = []
+    for fmt in FORMATS:
+        if fmt.upper() in Image.SAVE and (fmt != 'webp' or features.check('webp')):
+            formats.append(fmt)
+    return formats
+
+def build_image(task):
+    """Decode one source and stage its copies; returns its manifest entry"""
+    root, source, digest, formats = task
+    from PIL import Image, ImageOps
+
+    with Image.open(os.path.join(root, source)) as opened:
+        image = ImageOps.exif_transpose(opened)
+        image = image.convert('RGBA' if 'A' in image.getbands() or 'transparency' in image.info else 'RGB')
+    width, height = image.size
+
+    variants = {fmt: [] for fmt in formats}
+    sizes = {}
+    for target in variant_widths(width):
+        resized = image if target == width else image.resize(
+            (target, max(1, round(height * target / width))), Image.Resampling.LANCZOS)
+        for fmt in formats:
+            path = variant_name(source, digest, target, fmt)
+            buffer = io.BytesIO()
+            resized.save(buffer, fmt.upper(), quality=QUALITY[fmt], **({'method': 6} if fmt == 'webp' else {}))
+            data = buffer.getvalue()
+            if not os.path.exists(os.path.join(root, path)):
+                write_bytes(os.path.join(root, path), data, [f"Built {fmt.upper()} image copy"])
+            variants[fmt].append([target, path])
+            sizes[path] = len(data)
+    return {'hash': digest, 'width': width, 'height': height, 'variants': variants, 'bytes': sizes}
+
+def is_fresh(root, entry, digest):
+    return (entry is not None and entry.get('hash') == digest
+            and all(os.path.exists(os.path.join(root, path))
+                    for copies in entry['variants'].values() for _, path in copies))
+
+def page_sources(task):
+    root, file_path = task
+    with open(os.path.join(root, file_path), 'r', encoding='utf-8') as f:
+        doc = parse(f.read())
+    return [source for _, source, _ in responsive_images(doc, file_path)]
+
+def rewrite_page_images(content, file_path, manifest):
+    """rewrite_images, keeping an LCP preload in step with the <picture> it now has"""
+    new_content, stats = rewrite_images(content, file_path, manifest)
+    if new_content != content:
+        new_content = refresh_preload(new_content)
+    return new_content, stats
+
+def rewrite_page(task):
+    root, file_path, manifest = task
+    full_path = os.path.join(root, file_path)
+    with open(full_path, 'r', encoding='utf-8') as f:
+        content = f.read()
+    new_content, stats = rewrite_page_images(content, file_path, manifest)
+    if new_content != content:
+        write_text(full_path, new_content, [f"Wrapped {stats['pictures']} images in <picture>"])
+    return stats
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build responsive AVIF/WebP image copies and rewrite <img> tags")
+    parser.add_argument('--root', default='.', help='site root (default: current directory)')
+    parser.add_argument('--force', action='store_true', help='rebuild every image even when its source is unchanged')
+    add_jobs_argument(parser)
+    add_dry_run_argument(parser)  # consumed by dry_run_mode() at the entry point; listed for --help
+    args = parser.parse_args(argv)
+
+    print("Building responsive images")
+    print("=" * 80)
+
+    html_files = find_html_files(args.root)
+    sources = set()
+    for (_, file_path), found, error in run_parallel(page_sources, [(args.root, path) for path in html_files],
+                                                       jobs=args.jobs):
+        if error:
+            print(f"Error reading {file_path}: {error}")
+            continue
+        sources.update(found)
+
+    previous = load_image_manifest(args.root)
+    params = build_params()
+    manifest = {}
+    tasks = []
+    for source in sorted(sources):
+        path = os.path.join(args.root, source)
+        if not os.path.exists(path):
+            print(f"Missing image {source}")
+            continue
+        with open(path, 'rb') as f:
+            digest = source_digest(f.read(), params)
+        if not args.force and is_fresh(args.root, previous.get(source), digest):
+            manifest[source] = previous[source]
+        else:
+            tasks.append(source)
+
+    if tasks:
+        try:
+            formats = available_formats()
+        except ImportError:
+            print(f"Pillow is needed to build {len(tasks)} image(s): pip install Pillow")
+            formats = []
+        else:
+            if not formats:
+                print(f"This Pillow writes none of {', '.join(FORMATS)}; {len(tasks)} image(s) not built")
+        if formats:
+            build_tasks = []
+            for source in tasks:
+                with open(os.path.join(args.root, source), 'rb') as f:
+                    build_tasks.append((args.root, source, source_digest(f.read(), params), formats))
+            for (_, source, _, _), entry, error in run_parallel(build_image, build_tasks, jobs=args.jobs):
+                if error:
+                    print(f"Error building {source}: {error}")
+                    continue
+                manifest[source] = entry
+    for source in tasks:
+        # Not rebuilt: pages keep pointing at the last copies, so those stay too
+        if source not in manifest and source in previous:
+            manifest[source] = previous[source]
+
+    built = [source for source in tasks if manifest.get(source) is not previous.get(source)]
+    print(f"{'image':<40} {'size':>11} {'bytes':>9} " + ' '.join(f'{fmt:>9}' for fmt in FORMATS))
+    total_before = total_after = 0
+    for source, entry in sorted(manifest.items()):
+        before = os.path.getsize(os.path.join(args.root, source))
+        # Full-width copies: what a large screen downloads instead of the original
+        largest = {fmt: entry['bytes'][copies[-1][1]] for fmt, copies in entry['variants'].items() if copies}
+        after = min(largest.values(), default=before)
+        total_before += before
+        total_after += min(after, before)
+        status = '' if source in built else '  (unchanged)'
+        print(f"{source:<40} {entry['width']:>5}x{entry['height']:<5} {before:>9,} "
+              + ' '.join(f"{largest[fmt]:>9,}" if fmt in largest else f"{'-':>9}" for fmt in FORMATS) + status)
+    print(f"Images: {len(manifest)} ({len(built)} built); full-size bytes {total_before:,} -> {total_after:,}")
+
+    manifest_text = json.dumps(manifest, indent=2, sort_keys=True) + '\n'
+    if manifest != previous:
+        write_text(os.path.join(args.root, IMAGE_MANIFEST_FILE), manifest_text, ["Updated image manifest"])
+
+    # Copies no image uses any more
+    in_use = {path for entry in manifest.values() for copies in entry['variants'].values() for _, path in copies}
+    image_dir = os.path.join(args.root, IMAGE_DIR)
+    if os.path.isdir(image_dir):
+        for name in sorted(os.listdir(image_dir)):
+            if VARIANT_FILE_PATTERN.match(name) and f'{IMAGE_DIR}/{name}' not in in_use:
+                remove_file(os.path.join(image_dir, name))
+
+    tasks = [(args.root, file_path, manifest) for file_path in html_files]
+    pages_changed = pictures = dimensioned = 0
+    for (_, file_path, _), stats, error in run_parallel(rewrite_page, tasks, jobs=args.jobs):
+        if error:
+            print(f"Error processing {file_path}: {error}")
+            continue
+        if stats['pictures'] or stats['dimensioned']:
+            pages_changed += 1
+            pictures += stats['pictures']
+            dimensioned += stats['dimensioned']
+
+    print(f"\nPages scanned: {len(html_files)}, updated: {pages_changed}")
+    print(f"Images wrapped in <picture>: {pictures}, given width/height: {dimensioned}")
+
+if __name__ == "__main__":
+    with Transaction(dry_run=dry_run_mode()):
+        main()
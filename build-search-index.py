@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Search index build step: every page's title, H1, description, category and top keywords
+written as a compact inverted index (search-index.json) that search.js fetches on first use
+"""
+
+import argparse
+import json
+import os
+import re
+from collections import Counter
+
+from linkgraph import page_route
+from sitecore import find_html_files, load_script, parse
+from sitepipeline.transaction import Transaction, add_dry_run_argument, dry_run_mode, write_text
+
+INDEX_FILE = 'search-index.json'
+
+INDEX_VERSION = 1
+
+# Pages that exist on disk but should not be found by search
+EXCLUDED_PREFIXES = ('archived-pages/',)
+
+# Score a term earns for each field it appears in (the weights search.js used to apply per keyword)
+FIELD_WEIGHTS = {
+    'title': 50,
+    'h1': 25,
+    'category': 15,
+    'keywords': 10,
+    'description': 8,
+    'type': 5,
+}
+
+TOP_KEYWORDS = 15
+
+# Length of the prefix tables: one [start, end) range of the sorted term list per prefix
+PREFIX_LENGTH = 2
+
+TERM_PATTERN = re.compile(r'[a-z0-9]+')
+TAG_PATTERN = re.compile(r'<[^>]+>')
+ENTITY_PATTERN = re.compile(r'&#?\w+;')
+JSON_LD_CATEGORY_PATTERN = re.compile(r'"(?:applicationCategory|category)"\s*:\s*"([^"<]+)"')
+SITE_SUFFIX_PATTERN = re.compile(r'\s*[|–—-]\s*Shopify\s*App\s*Authority(?:\.com)?\s*$', re.IGNORECASE)
+
+STOPWORDS = set('''
+a about after all also an and any are as at be because been before best but by can could do does
+each for from get gets getting has have how if in into is it its just like make makes more most
+much need needs new no not of on one only or other our out over per see so some such than that
+the their them then there these they this those through to too up us use used uses using very via
+was we well what when where which while who why will with without would you your
+'''.split())
+
+# Fallback categories for pages without a structured-data category, first match wins
+PATH_CATEGORIES = [
+    (('email', 'klaviyo', 'mailchimp', 'omnisend', 'moosend', 'aweber', 'getresponse', 'mailerlite',
+      'constant-contact', 'drip', 'kit-', 'convertkit', 'activecampaign'), 'Email Marketing'),
+    (('sms', 'postscript', 'attentive'), 'SMS Marketing'),
+    (('crm', 'sales', 'hubspot', 'salesforce', 'pipedrive', 'close-review'), 'CRM'),
+    (('analytics', 'attribution', 'triple-whale', 'northbeam', 'mixpanel', 'hotjar'), 'Analytics'),
+    (('review-apps', 'social-proof', 'yotpo', 'judge-me', 'okendo', 'stamped'), 'Reviews & Social Proof'),
+    (('customer-service', 'zendesk', 'gorgias', 'livechat'), 'Customer Support'),
+    (('upsell', 'cross-sell', 'rebuy', 'recharge', 'checkout'), 'Upsell & Cross-sell'),
+    (('funnel', 'clickfunnels', 'kartra', 'builderall'), 'Sales Funnels'),
+    (('popup', 'justuno', 'privy', 'optinmonster', 'sumo', 'conversion'), 'Conversion Optimization'),
+    (('project-management', 'asana', 'trello', 'monday', 'clickup'), 'Project Management'),
+    (('payroll', 'gusto'), 'Payroll & HR'),
+]
+
+def page_type(file_path):
+    """review / listicle / alternatives / blog / faq / category / guide, from the URL shape the site uses"""
+    slug = file_path.split('/')[0]
+    if file_path.startswith('blog/') and file_path != 'blog/index.html':
+        return 'blog'
+    if file_path.startswith('faqs/'):
+        return 'faq'
+    if slug.endswith('-review'):
+        return 'review'
+    if slug.endswith('-alternatives'):
+        return 'alternatives'
+    if slug.startswith('best-') or slug in ('free-shopify-apps', 'reviews-social-proof-apps'):
+        return 'listicle'
+    if slug in ('app-categories', 'shopify-email-marketing', 'blog'):
+        return 'category'
+    return 'guide'
+
+def structured_category(doc):
+    """Category from the page's JSON-LD, if any
+
+    Matched as text rather than parsed: reviews nest it under about or
+    itemReviewed, and some blocks are not valid JSON (linked app names).
+    """
+    for node in doc.json_ld:
+        match = JSON_LD_CATEGORY_PATTERN.search(doc.inner(node))
+        if match:
+            return re.sub(r'\s+Software$', '', match.group(1).strip())
+    return None
+
+def page_category(doc, file_path):
+    category = structured_category(doc)
+    if category:
+        return category
+    path_lower = file_path.lower()
+    for markers, name in PATH_CATEGORIES:
+        if any(marker in path_lower for marker in markers):
+            return name
+    return 'General'
+
+def terms_of(text):
+    return TERM_PATTERN.findall(text.lower())
+
+def top_keywords(doc, limit=TOP_KEYWORDS):
+    """Most frequent non-stopword terms in the visible body text"""
+    body = doc.body
+    if body is None:
+        return []
+    parts = []
+    last = body.open_end
+    for start, end in doc.spans(('script', 'style', 'nav', 'header', 'footer')):
+        if start >= body.close_start:
+            break
+        if start > last:
+            parts.append(doc.text[last:start])
+        last = max(last, end)
+    parts.append(doc.text[last:body.close_start])
+    text = ' '.join(parts)
+    text = ENTITY_PATTERN.sub(' ', TAG_PATTERN.sub(' ', text))
+    counts = Counter(term for term in terms_of(text)
+                     if len(term) > 2 and term not in STOPWORDS and not term.isdigit())
+    return [term for term, _ in counts.most_common(limit)]
+
+def page_entry(optimizer, file_path, content):
+    """Searchable fields for one page, or None if the page asks not to be indexed"""
+    doc = parse(content)
+    robots = (doc.meta('robots') or '').lower()
+    if 'noindex' in robots:
+        return None
+
+    info = optimizer.extract_page_info(content)
+    url = page_route(file_path)
+    title = SITE_SUFFIX_PATTERN.sub('', info['title']) or info['h1'] or url
+
+    return {
+        'title': title,
+        'url': url,
+        'type': page_type(file_path),
+        'category': page_category(doc, file_path),
+        'h1': info['h1'],
+        'description': info['description'],
+        'keywords': top_keywords(doc),
+    }
+
+def build_index(pages):
+    """Inverted index over the page entries
+
+    terms is sorted; postings[i] lists (page id, score) pairs for terms[i],
+    flattened. prefixes maps every PREFIX_LENGTH-character prefix to the
+    [start, end) slice of terms that begin with it, so a typed prefix is one
+    table lookup plus a binary search instead of a scan.
+    """
+    scores = {}
+    for page_id, page in enumerate(pages):
+        for field, weight in FIELD_WEIGHTS.items():
+            value = page[field]
+            text = ' '.join(value) if isinstance(value, list) else value
+            for term in set(terms_of(text)):
+                if term in STOPWORDS and field not in ('title', 'h1'):
+                    continue
+                postings = scores.setdefault(term, {})
+                postings[page_id] = postings.get(page_id, 0) + weight
+
+    terms = sorted(scores)
+    postings = []
+    for term in terms:
+        ranked = sorted(scores[term].items(), key=lambda item: (-item[1], item[0]))
+        postings.append([number for pair in ranked for number in pair])
+
+    prefixes = {}
+    for position, term in enumerate(terms):
+        prefix = term[:PREFIX_LENGTH]
+        if prefix in prefixes:
+            prefixes[prefix][1] = position + 1
+        else:
+            prefixes[prefix] = [position, position + 1]
+
+    return {
+        'version': INDEX_VERSION,
+        'fields': ['title', 'url', 'type', 'category'],
+        'pages': [[page['title'], page['url'], page['type'], page['category']] for page in pages],
+        'terms': terms,
+        'postings': postings,
+        'prefixLength': PREFIX_LENGTH,
+        'prefixes': prefixes,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build search-index.json from every page")
+    parser.add_argument('--root', default='.', help='site root (default: current directory)')
+    add_dry_run_argument(parser)  # consumed by dry_run_mode() at the entry point; listed for --help
+    args = parser.parse_args(argv)
+
+    optimizer = load_script('implement-technical-seo.py').TechnicalSEOOptimizer()
+
+    print("Building search index")
+    print("=" * 60)
+
+    pages = []
+    skipped = []
+    for file_path in find_html_files(args.root):
+        if file_path.startswith(EXCLUDED_PREFIXES):
+            skipped.append(file_path)
+            continue
+        with open(os.path.join(args.root, file_path), 'r', encoding='utf-8') as f:
+            entry = page_entry(optimizer, file_path, f.read())
+        if entry is None:
+            skipped.append(file_path)
+            continue
+        pages.append(entry)
+
+    index = build_index(pages)
+    output = json.dumps(index, ensure_ascii=False, separators=(',', ':')) + '\n'
+
+    index_path = os.path.join(args.root, INDEX_FILE)
+    try:
+        with open(index_path, 'r', encoding='utf-8') as f:
+            current = f.read()
+    except FileNotFoundError:
+        current = None
+
+    postings = sum(len(p) // 2 for p in index['postings'])
+    print(f"Pages indexed: {len(pages)} (skipped {len(skipped)}: archived or noindex)")
+    print(f"Terms: {len(index['terms'])}, postings: {postings}, prefix ranges: {len(index['prefixes'])}")
+    print(f"Index size: {len(output.encode('utf-8')) / 1024:.1f} KB")
+
+    if output == current:
+        print(f"{INDEX_FILE} is up to date")
+    else:
+        write_text(index_path, output, [f"Indexed {len(pages)} pages"])
+        print(f"Wrote {INDEX_FILE}")
+
+if __name__ == "__main__":
+    with Transaction(dry_run=dry_run_mode()):
+        main()
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+Sitemap build step: one <url> per indexable page with lastmod from its content-hash history
+Unchanged pages reuse their serialized entry; over 50,000 URLs the output becomes a sitemap index plus shards
+"""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import time
+from xml.sax.saxutils import escape
+
+from linkgraph import SITE_URL
+from sitecore import find_html_files, load_script, parse
+from sitepipeline.cache import content_hash
+from sitepipeline.transaction import Transaction, add_dry_run_argument, dry_run_mode, remove_file, write_text
+
+SITEMAP_FILE = 'sitemap.xml'
+SHARD_PATTERN = re.compile(r'^sitemap-(\d+)\.xml$')
+
+HISTORY_PATH = os.path.join('.sitecache', 'sitemap.json')
+HISTORY_VERSION = 1
+HISTORY_LENGTH = 10
+
+# Protocol limits for one sitemap file
+MAX_URLS_PER_SITEMAP = 50000
+MAX_SITEMAP_BYTES = 50 * 1024 * 1024
+
+# (priority, changefreq) by page type
+PAGE_TYPE_PRIORITY = {
+    'home': ('1.0', 'weekly'),
+    'listicle': ('0.9', 'weekly'),
+    'review': ('0.8', 'monthly'),
+    'alternatives': ('0.8', 'monthly'),
+    'category': ('0.7', 'weekly'),
+    'guide': ('0.7', 'monthly'),
+    'faq': ('0.6', 'monthly'),
+    'blog': ('0.6', 'monthly'),
+    'legal': ('0.3', 'yearly'),
+}
+
+LEGAL_PAGES = ('affiliate-disclosure/', 'privacy-policy/', 'terms/')
+
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
+URLSET_OPEN = '<?xml version="1.0" encoding="UTF-8"?>\n<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+URLSET_CLOSE = '</urlset>\n'
+
+def sitemap_page_type(search, file_path):
+    if file_path == 'index.html':
+        return 'home'
+    if file_path.startswith(LEGAL_PAGES):
+        return 'legal'
+    return search.page_type(file_path)
+
+def content_digest(doc):
+    """Hash of the page without scripts and styles, so re-injected tracking code does not bump lastmod"""
+    text = doc.text_outside(doc.spans(('script', 'style')))
+    return content_hash(WHITESPACE_PATTERN.sub(' ', text).strip())[:16]
+
+def git_dates(root='.'):
+    """Last commit date (YYYY-MM-DD) of every tracked file, from one git log call; {} outside a repo"""
+    try:
+        output = subprocess.run(['git', 'log', '--format=%x00%cs', '--name-only', '--', '*.html'],
+                                cwd=root, capture_output=True, text=True, check=True).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return {}
+    dates = {}
+    for commit in output.split('\0')[1:]:
+        lines = commit.strip().splitlines()
+        for file_path in lines[1:]:
+            dates.setdefault(file_path, lines[0])
+    return dates
+
+def url_entry(loc, lastmod, changefreq, priority):
+    return (f"    <url>\n"
+            f"        <loc>{escape(loc)}</loc>\n"
+            f"        <lastmod>{lastmod}</lastmod>\n"
+            f"        <changefreq>{changefreq}</changefreq>\n"
+            f"        <priority>{priority}</priority>\n"
+            f"    </url>\n")
+
+class SitemapHistory:
+    """Per-page content hashes with the date each was first seen, plus the serialized <url> entry
+
+    Stored at .sitecache/sitemap.json. A page whose size and mtime match is
+    not read at all; one whose hash matches keeps its lastmod and entry.
+    """
+
+    def __init__(self, root='.'):
+        self.path = os.path.join(root, HISTORY_PATH)
+        self.pages = {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get('version') == HISTORY_VERSION:
+            self.pages = data.get('pages', {})
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': HISTORY_VERSION, 'pages': self.pages}, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+def collect_entries(root, history, optimizer, search):
+    """(entries, stats): the current <url> entry per page, re-serialized only where something changed"""
+    stats = {'reused': 0, 'rehashed': 0, 'changed': 0, 'new': 0, 'excluded': 0}
+    seed_dates = None
+    entries = {}
+
+    html_files = find_html_files(root)
+    for file_path in html_files:
+        if file_path.startswith(search.EXCLUDED_PREFIXES):
+            stats['excluded'] += 1
+            continue
+
+        full_path = os.path.join(root, file_path)
+        stat = os.stat(full_path)
+        record = history.pages.get(file_path)
+        if record and record['size'] == stat.st_size and record['mtime_ns'] == stat.st_mtime_ns:
+            stats['reused'] += 1
+            if record['entry']:
+                entries[file_path] = record
+            else:
+                stats['excluded'] += 1
+            continue
+
+        with open(full_path, 'r', encoding='utf-8') as f:
+            doc = parse(f.read())
+
+        digest = content_digest(doc)
+        hashes = record['hashes'] if record else []
+        if hashes and hashes[-1][1] == digest:
+            stats['rehashed'] += 1
+            lastmod = hashes[-1][0]
+        else:
+            if record:
+                stats['changed'] += 1
+                lastmod = time.strftime('%Y-%m-%d', time.localtime(stat.st_mtime))
+            else:
+                # First sight of the page: its last commit is a better guess than a checkout's mtime
+                stats['new'] += 1
+                if seed_dates is None:
+                    seed_dates = git_dates(root)
+                lastmod = seed_dates.get(file_path) or time.strftime('%Y-%m-%d', time.localtime(stat.st_mtime))
+            hashes = (hashes + [[lastmod, digest]])[-HISTORY_LENGTH:]
+
+        if 'noindex' in (doc.meta('robots') or '').lower():
+            entry = ''
+        else:
+            loc = optimizer.get_page_url(file_path)
+            priority, changefreq = PAGE_TYPE_PRIORITY[sitemap_page_type(search, file_path)]
+            entry = url_entry(loc, lastmod, changefreq, priority)
+
+        record = history.pages[file_path] = {
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'hashes': hashes,
+            'priority': entry and priority,
+            'entry': entry,
+        }
+        if entry:
+            entries[file_path] = record
+        else:
+            stats['excluded'] += 1
+
+    # Pages deleted since the last build drop out of the history too
+    for file_path in set(history.pages) - set(html_files):
+        del history.pages[file_path]
+
+    return entries, stats
+
+def shard(entries):
+    """Split ordered entries into files that respect the URL count and size limits"""
+    shards = [[]]
+    size = len(URLSET_OPEN) + len(URLSET_CLOSE)
+    for entry in entries:
+        entry_size = len(entry['entry'].encode('utf-8'))
+        if shards[-1] and (len(shards[-1]) >= MAX_URLS_PER_SITEMAP or size + entry_size > MAX_SITEMAP_BYTES):
+            shards.append([])
+            size = len(URLSET_OPEN) + len(URLSET_CLOSE)
+        shards[-1].append(entry)
+        size += entry_size
+    return shards
+
+def urlset(entries):
+    return URLSET_OPEN + ''.join(entry['entry'] for entry in entries) + URLSET_CLOSE
+
+def sitemap_index(shard_files):
+    parts = ['<?xml version="1.0" encoding="UTF-8"?>\n'
+             '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n']
+    for file_name, lastmod in shard_files:
+        parts.append(f"    <sitemap>\n"
+                     f"        <loc>{escape(SITE_URL)}/{file_name}</loc>\n"
+                     f"        <lastmod>{lastmod}</lastmod>\n"
+                     f"    </sitemap>\n")
+    parts.append('</sitemapindex>\n')
+    return ''.join(parts)
+
+def write_if_changed(file_path, content):
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            if f.read() == content:
+                return False
+    except FileNotFoundError:
+        pass
+    write_text(file_path, content)
+    return True
+
+def main(argv=None):
+    """Build sitemap.xml (or a sitemap index and shards); returns the history to save once the run commits"""
+    parser = argparse.ArgumentParser(description="Build sitemap.xml from every indexable page")
+    parser.add_argument('--root', default='.', help='site root (default: current directory)')
+    parser.add_argument('--rebuild', action='store_true',
+                        help='ignore the stored size/mtime and re-read every page (hash history is kept)')
+    add_dry_run_argument(parser)  # consumed by dry_run_mode() at the entry point; listed for --help
+    args = parser.parse_args(argv)
+
+    optimizer = load_script('implement-technical-seo.py').TechnicalSEOOptimizer()
+    search = load_script('build-search-index.py')
+    history = SitemapHistory(args.root)
+    if args.rebuild:
+        for record in history.pages.values():
+            record['size'] = record['mtime_ns'] = None
+
+    print("Building sitemap")
+    print("=" * 60)
+
+    start = time.perf_counter()
+    entries, stats = collect_entries(args.root, history, optimizer, search)
+    ordered = sorted(entries.values(), key=lambda record: (-float(record['priority']), record['entry']))
+    shards = shard(ordered)
+
+    written = []
+    existing_shards = {name for name in os.listdir(args.root) if SHARD_PATTERN.match(name)}
+    if len(shards) == 1:
+        if write_if_changed(os.path.join(args.root, SITEMAP_FILE), urlset(shards[0])):
+            written.append(SITEMAP_FILE)
+        shard_names = set()
+    else:
+        shard_files = []
+        for number, shard_entries in enumerate(shards, 1):
+            file_name = f'sitemap-{number}.xml'
+            lastmod = max(record['hashes'][-1][0] for record in shard_entries)
+            shard_files.append((file_name, lastmod))
+            if write_if_changed(os.path.join(args.root, file_name), urlset(shard_entries)):
+                written.append(file_name)
+        if write_if_changed(os.path.join(args.root, SITEMAP_FILE), sitemap_index(shard_files)):
+            written.append(SITEMAP_FILE)
+        shard_names = {file_name for file_name, _ in shard_files}
+
+    for file_name in sorted(existing_shards - shard_names):
+        remove_file(os.path.join(args.root, file_name))
+        written.append(f'{file_name} (removed)')
+
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    print(f"URLs: {len(ordered)} in {len(shards)} sitemap file(s); excluded {stats['excluded']} (archived or noindex)")
+    print(f"Entries reused without reading: {stats['reused']}, re-read but unchanged: {stats['rehashed']}, "
+          f"changed: {stats['changed']}, new: {stats['new']}")
+    print(f"Built in {elapsed_ms:.1f} ms")
+    print(f"Wrote: {', '.join(written)}" if written else f"{SITEMAP_FILE} is up to date")
+
+    return history
+
+if __name__ == "__main__":
+    dry_run = dry_run_mode()
+    with Transaction(dry_run=dry_run):
+        history = main()
+    if not dry_run:
+        history.save()
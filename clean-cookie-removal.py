@@ -8,92 +8,82 @@ Carefully removes cookie consent code while preserving file structure
 import os
 import re
 import sys
+import argparse
 from pathlib import Path
 
+from patterns import REGISTRY, add_profile_argument, compile_pattern, finish_profiling, start_profiling
+from sitepipeline.transaction import Transaction, add_dry_run_argument, dry_run_mode, write_text
+
 # Configuration
 target_directory = "."
-backup_extension = ".backup"
 
-def create_backup(file_path):
-    """Create a backup of the original file"""
-    backup_path = f"{file_path}{backup_extension}"
-    with open(file_path, 'r', encoding='utf-8') as original:
-        with open(backup_path, 'w', encoding='utf-8') as backup:
-            backup.write(original.read())
-    return backup_path
+# Cookie consent div blocks
+HTML_PATTERNS = [
+    # Cookie consent divs and containers
+    compile_pattern('clean.html.cookie-consent-div', r'<div[^>]*id=["\']cookieConsent["\'][^>]*>.*?</div>\s*', re.DOTALL | re.IGNORECASE),
+    compile_pattern('clean.html.cookie-class-div', r'<div[^>]*class=["\'][^"\']*cookie[^"\']*["\'][^>]*>.*?</div>\s*', re.DOTALL | re.IGNORECASE),
+
+    # Cookie popup elements
+    compile_pattern('clean.html.cookie-consent-attr-div', r'<div[^>]*cookie-consent[^>]*>.*?</div>\s*', re.DOTALL | re.IGNORECASE),
+    compile_pattern('clean.html.cookie-popup-div', r'<div[^>]*cookie-popup[^>]*>.*?</div>\s*', re.DOTALL | re.IGNORECASE),
+]
+
+# CSS rules for cookie consent
+CSS_PATTERNS = [
+    compile_pattern(f'clean.css.{name}-rule', rf'\.{name}\s*{{[^}}]*}}\s*', re.MULTILINE | re.IGNORECASE)
+    for name in ('cookie-consent', 'cookie-hidden', 'cookie-popup', 'cookie-content', 'cookie-text',
+                 'cookie-buttons', 'cookie-button', 'accept-all', 'reject-all')
+] + [
+    # Media queries for cookie consent
+    compile_pattern('clean.css.cookie-media-query', r'@media[^{]*{\s*\.cookie[^}]*{[^}]*}\s*[^}]*}', re.MULTILINE | re.IGNORECASE),
+]
+
+# Cookie consent JavaScript
+JS_PATTERNS = [
+    # Function definitions
+    compile_pattern(f'clean.js.{name}-function', rf'function\s+{name}\s*\([^)]*\)\s*{{[^}}]*(?:{{[^}}]*}}[^}}]*)*}}\s*', re.DOTALL | re.IGNORECASE)
+    for name in ('acceptCookies', 'rejectCookies', 'acceptAllCookies', 'rejectAllCookies',
+                 'checkCookieConsent', 'hideCookiePopup', 'showCookiePopup')
+] + [
+    # Cookie consent IIFE blocks
+    compile_pattern('clean.js.consent-iife', r'\(function\s*\(\)\s*{\s*["\']use strict["\'];.*?cookie.*?}\)\(\);\s*', re.DOTALL | re.IGNORECASE),
+
+    # Event listeners for cookie consent
+    compile_pattern('clean.js.popup-listener', r'popup\.addEventListener\(["\']click["\'],\s*acceptCookies\);\s*', re.DOTALL | re.IGNORECASE),
+    compile_pattern('clean.js.window-listener', r'window\.addEventListener\(["\']DOMContentLoaded["\'],\s*checkCookieConsent\);\s*', re.DOTALL | re.IGNORECASE),
+
+    # Variable assignments
+    compile_pattern('clean.js.accept-all-global', r'window\.acceptAllCookies\s*=\s*acceptAllCookies;\s*', re.DOTALL | re.IGNORECASE),
+    compile_pattern('clean.js.reject-all-global', r'window\.rejectAllCookies\s*=\s*rejectAllCookies;\s*', re.DOTALL | re.IGNORECASE),
+
+    # Comments about cookie consent
+    compile_pattern('clean.js.line-comment', r'//.*[Cc]ookie.*consent.*\n', re.DOTALL | re.IGNORECASE),
+    compile_pattern('clean.js.block-comment', r'/\*.*[Cc]ookie.*consent.*\*/\s*', re.DOTALL | re.IGNORECASE),
+]
+
+EMPTY_SCRIPT_PATTERN = compile_pattern('clean.cleanup.empty-script', r'<script[^>]*>\s*</script>\s*', re.MULTILINE)
+EMPTY_LINES_PATTERN = compile_pattern('clean.cleanup.empty-lines', r'\n\s*\n\s*\n')
+TRAILING_SPACE_PATTERN = compile_pattern('clean.cleanup.trailing-space', r'[ \t]+\n')
 
 def remove_cookie_consent_html(content):
     """Remove cookie consent HTML elements"""
-    # Remove cookie consent div blocks
-    patterns_to_remove = [
-        # Cookie consent divs and containers
-        r'<div[^>]*id=["\']cookieConsent["\'][^>]*>.*?</div>\s*',
-        r'<div[^>]*class=["\'][^"\']*cookie[^"\']*["\'][^>]*>.*?</div>\s*',
-
-        # Cookie popup elements
-        r'<div[^>]*cookie-consent[^>]*>.*?</div>\s*',
-        r'<div[^>]*cookie-popup[^>]*>.*?</div>\s*',
-    ]
-
-    for pattern in patterns_to_remove:
-        content = re.sub(pattern, '', content, flags=re.DOTALL | re.IGNORECASE)
+    for pattern in HTML_PATTERNS:
+        content = pattern.sub('', content)
 
     return content
 
 def remove_cookie_consent_css(content):
     """Remove cookie consent CSS rules"""
-    patterns_to_remove = [
-        # CSS rules for cookie consent
-        r'\.cookie-consent\s*{[^}]*}\s*',
-        r'\.cookie-hidden\s*{[^}]*}\s*',
-        r'\.cookie-popup\s*{[^}]*}\s*',
-        r'\.cookie-content\s*{[^}]*}\s*',
-        r'\.cookie-text\s*{[^}]*}\s*',
-        r'\.cookie-buttons\s*{[^}]*}\s*',
-        r'\.cookie-button\s*{[^}]*}\s*',
-        r'\.accept-all\s*{[^}]*}\s*',
-        r'\.reject-all\s*{[^}]*}\s*',
-
-        # Media queries for cookie consent
-        r'@media[^{]*{\s*\.cookie[^}]*{[^}]*}\s*[^}]*}',
-    ]
-
-    for pattern in patterns_to_remove:
-        content = re.sub(pattern, '', content, flags=re.MULTILINE | re.IGNORECASE)
+    for pattern in CSS_PATTERNS:
+        content = pattern.sub('', content)
 
     return content
 
 def remove_cookie_consent_javascript(content):
     """Remove cookie consent JavaScript code"""
-    patterns_to_remove = [
-        # Function definitions
-        r'function\s+acceptCookies\s*\([^)]*\)\s*{[^}]*(?:{[^}]*}[^}]*)*}\s*',
-        r'function\s+rejectCookies\s*\([^)]*\)\s*{[^}]*(?:{[^}]*}[^}]*)*}\s*',
-        r'function\s+acceptAllCookies\s*\([^)]*\)\s*{[^}]*(?:{[^}]*}[^}]*)*}\s*',
-        r'function\s+rejectAllCookies\s*\([^)]*\)\s*{[^}]*(?:{[^}]*}[^}]*)*}\s*',
-        r'function\s+checkCookieConsent\s*\([^)]*\)\s*{[^}]*(?:{[^}]*}[^}]*)*}\s*',
-        r'function\s+hideCookiePopup\s*\([^)]*\)\s*{[^}]*(?:{[^}]*}[^}]*)*}\s*',
-        r'function\s+showCookiePopup\s*\([^)]*\)\s*{[^}]*(?:{[^}]*}[^}]*)*}\s*',
-
-        # Cookie consent IIFE blocks
-        r'\(function\s*\(\)\s*{\s*["\']use strict["\'];.*?cookie.*?}\)\(\);\s*',
-
-        # Event listeners for cookie consent
-        r'popup\.addEventListener\(["\']click["\'],\s*acceptCookies\);\s*',
-        r'window\.addEventListener\(["\']DOMContentLoaded["\'],\s*checkCookieConsent\);\s*',
-
-        # Variable assignments
-        r'window\.acceptAllCookies\s*=\s*acceptAllCookies;\s*',
-        r'window\.rejectAllCookies\s*=\s*rejectAllCookies;\s*',
-
-        # Comments about cookie consent
-        r'//.*[Cc]ookie.*consent.*\n',
-        r'/\*.*[Cc]ookie.*consent.*\*/\s*',
-    ]
-
-    for pattern in patterns_to_remove:
+    for pattern in JS_PATTERNS:
         old_content = content
-        content = re.sub(pattern, '', content, flags=re.DOTALL | re.IGNORECASE)
+        content = pattern.sub('', content)
         if old_content != content:
             print("  - Removed JavaScript pattern")
 
@@ -102,7 +92,7 @@ def remove_cookie_consent_javascript(content):
 def clean_empty_script_tags(content):
     """Remove empty script tags after cleanup"""
     # Remove script tags that are now empty or only contain whitespace
-    content = re.sub(r'<script[^>]*>\s*</script>\s*', '', content, flags=re.MULTILINE)
+    content = EMPTY_SCRIPT_PATTERN.sub('', content)
     return content
 
 def process_html_file(file_path):
@@ -110,46 +100,36 @@ def process_html_file(file_path):
     print(f"Processing: {file_path}")
 
     try:
-        # Create backup
-        backup_path = create_backup(file_path)
-        print(f"  - Created backup: {backup_path}")
-
         # Read file content
         with open(file_path, 'r', encoding='utf-8') as f:
             content = f.read()
 
         original_size = len(content)
 
-        # Apply removal functions
-        content = remove_cookie_consent_html(content)
-        content = remove_cookie_consent_css(content)
-        content = remove_cookie_consent_javascript(content)
-        content = clean_empty_script_tags(content)
+        with REGISTRY.file_scope(file_path):
+            # Apply removal functions
+            content = remove_cookie_consent_html(content)
+            content = remove_cookie_consent_css(content)
+            content = remove_cookie_consent_javascript(content)
+            content = clean_empty_script_tags(content)
 
-        # Clean up extra whitespace and empty lines
-        content = re.sub(r'\n\s*\n\s*\n', '\n\n', content)  # Remove excessive empty lines
-        content = re.sub(r'[ \t]+\n', '\n', content)  # Remove trailing spaces
+            # Clean up extra whitespace and empty lines
+            content = EMPTY_LINES_PATTERN.sub('\n\n', content)  # Remove excessive empty lines
+            content = TRAILING_SPACE_PATTERN.sub('\n', content)  # Remove trailing spaces
 
         new_size = len(content)
         reduction = original_size - new_size
 
         if reduction > 0:
-            # Write cleaned content back to file
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(content)
+            # Staged now, swapped in when the run's transaction commits
+            write_text(file_path, content)
             print(f"  - Cleaned {reduction} characters of cookie code")
         else:
             print("  - No cookie consent code found")
-            # Remove unnecessary backup if no changes
-            os.remove(backup_path)
 
     except Exception as e:
+        # Nothing was staged for this file, so it stays as it was
         print(f"  - Error processing {file_path}: {e}")
-        # Restore from backup if it exists
-        backup_path = f"{file_path}{backup_extension}"
-        if os.path.exists(backup_path):
-            os.rename(backup_path, file_path)
-            print(f"  - Restored from backup due to error")
 
 def find_html_files(directory):
     """Find all HTML files in the directory"""
@@ -166,6 +146,12 @@ def find_html_files(directory):
 
 def main():
     """Main execution function"""
+    parser = argparse.ArgumentParser(description="Surgical cookie consent removal")
+    add_profile_argument(parser)
+    add_dry_run_argument(parser)  # consumed by dry_run_mode() at the entry point; listed for --help
+    args = parser.parse_args()
+    start_profiling(args)
+
     print("Starting Surgical Cookie Consent Removal")
     print("=" * 50)
 
@@ -199,12 +185,15 @@ def main():
     print(f"Surgical cookie removal complete!")
     print(f"Processed: {processed_count} files")
     print(f"Cleaned: {cleaned_count} files")
-    print(f"Backups created for all modified files (.backup extension)")
+    print(f"Originals of all modified files are kept in this run's snapshot (python -m sitepipeline runs)")
     print()
     print("Next steps:")
     print("1. Test the website to ensure it still works")
     print("2. Implement new global cookie consent system")
-    print("3. Remove backup files once satisfied with results")
+    print("3. Roll back with: python -m sitepipeline restore --run latest")
+
+    finish_profiling(args)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    with Transaction(dry_run=dry_run_mode()):
+        main()
\ No newline at end of file
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Inline script consolidation: find handlers and functions pasted into several <script> blocks or pages
+Reports exact and near-duplicate statements within and across pages. With --collapse, repeats within one <script>
+are dropped and DOMContentLoaded/load handlers shared by --min-pages or more pages move into one deferred file.
+"""
+
+import argparse
+import os
+from collections import defaultdict
+
+from sitecore import find_html_files, parse
+from sitepipeline.assets import asset_pattern, fingerprinted_name
+from sitepipeline.inlinejs import (NEAR_DUPLICATE_COVERAGE, SHARED_HANDLERS_FILE, consolidate_scripts, dedented,
+                                   inline_statements, is_mobile_nav_copy, is_shareable, near_duplicates,
+                                   normalize)
+from sitepipeline.minify import minify_js
+from sitepipeline.navigation import MOBILE_NAV_JS_FILE, coverage, js_features
+from sitepipeline.parallel import add_jobs_argument, run_parallel
+from sitepipeline.transaction import Transaction, add_dry_run_argument, dry_run_mode, remove_file, write_text
+
+DEFAULT_MIN_PAGES = 3
+# Smaller handlers stay inline: the <script> tag and extra request would cost more than they save
+DEFAULT_MIN_BYTES = 500
+
+def preview(statement, width=72):
+    """A function's signature, or a handler's first two code lines, enough to tell one from another
+
+    Function bodies are left out: copies pasted around the site can be broken mid-body, and the
+    signature names the function either way.
+    """
+    code = normalize(statement['text'])
+    if statement['kind'] == 'function':
+        line = code.partition('{')[0].strip() + ' { ... }'
+    else:
+        line = ' '.join(code.splitlines()[:2])
+    return line if len(line) <= width else line[:width - 3] + '...'
+
+def analyze_page(task):
+    """Statements worth reporting on one page, as plain data for the main process"""
+    root, file_path, mobile_nav_features = task
+    with open(os.path.join(root, file_path), 'r', encoding='utf-8') as f:
+        doc = parse(f.read())
+    found = [statement for statement in inline_statements(doc) if statement['kind']]
+    pattern = asset_pattern(SHARED_HANDLERS_FILE)
+    return {
+        'statements': [{'fingerprint': statement['fingerprint'], 'kind': statement['kind'],
+                        'script': statement['script'].start,
+                        'event': statement.get('event'), 'bytes': statement['bytes'],
+                        'preview': preview(statement),
+                        'features': js_features(statement['text']) if statement['kind'] == 'handler' else None,
+                        'mobile': is_mobile_nav_copy(statement, mobile_nav_features),
+                        'code': dedented(doc, statement) if is_shareable(statement, mobile_nav_features) else None}
+                       for statement in found],
+        'near': [(a['event'], preview(a), preview(b), shared,
+                  is_mobile_nav_copy(a, mobile_nav_features) and is_mobile_nav_copy(b, mobile_nav_features))
+                 for a, b, shared in near_duplicates(found)],
+        'shared_files': [script.get('src').lstrip('/').split('?')[0] for script in doc.scripts
+                         if pattern.match(script.get('src') or '')],
+    }
+
+def collapse_page(task):
+    root, file_path, shared, shared_tag = task
+    full_path = os.path.join(root, file_path)
+    with open(full_path, 'r', encoding='utf-8') as f:
+        content = f.read()
+    new_content, stats = consolidate_scripts(parse(content), shared, shared_tag)
+    if new_content != content:
+        write_text(full_path, new_content, [f"Removed {stats['duplicates']} repeated and moved {stats['moved']} "
+                                            f"shared inline statements"])
+    return stats
+
+def handler_variants(handlers):
+    """Groups of distinct handlers on the same event that are near-duplicates of each other"""
+    fingerprints = list(handlers)
+    parent = {fp: fp for fp in fingerprints}
+
+    def find(fp):
+        while parent[fp] != fp:
+            parent[fp] = parent[parent[fp]]
+            fp = parent[fp]
+        return fp
+
+    for i, a in enumerate(fingerprints):
+        for b in fingerprints[i + 1:]:
+            if handlers[a]['event'] != handlers[b]['event']:
+                continue
+            smaller, larger = sorted((handlers[a]['features'], handlers[b]['features']), key=len)
+            if coverage(smaller, larger) >= NEAR_DUPLICATE_COVERAGE:
+                parent[find(a)] = find(b)
+    groups = defaultdict(list)
+    for fp in fingerprints:
+        groups[find(fp)].append(fp)
+    return [group for group in groups.values() if len(group) > 1]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Find and merge duplicate inline scripts")
+    parser.add_argument('--root', default='.', help='site root (default: current directory)')
+    parser.add_argument('--collapse', action='store_true',
+                        help='remove repeats within one <script> and move shared handlers into one deferred file')
+    parser.add_argument('--min-pages', type=int, default=DEFAULT_MIN_PAGES,
+                        help=f'pages a handler must appear on to be shared (default: {DEFAULT_MIN_PAGES})')
+    parser.add_argument('--min-bytes', type=int, default=DEFAULT_MIN_BYTES,
+                        help=f'smallest handler worth moving out (default: {DEFAULT_MIN_BYTES})')
+    add_jobs_argument(parser)
+    add_dry_run_argument(parser)  # consumed by dry_run_mode() at the entry point; listed for --help
+    args = parser.parse_args(argv)
+
+    mobile_nav_path = os.path.join(args.root, MOBILE_NAV_JS_FILE)
+    mobile_nav_features = set()
+    if os.path.exists(mobile_nav_path):
+        with open(mobile_nav_path, 'r', encoding='utf-8') as f:
+            mobile_nav_features = js_features(f.read())
+
+    html_files = find_html_files(args.root)
+    pages = {}
+    for (_, file_path, _), result, error in run_parallel(
+            analyze_page, [(args.root, path, mobile_nav_features) for path in html_files], jobs=args.jobs):
+        if error:
+            print(f"Error analyzing {file_path}: {error}")
+            continue
+        pages[file_path] = result
+
+    # Site-wide view: which pages each distinct statement appears on
+    occurrences = defaultdict(list)
+    statements = {}
+    for file_path, result in pages.items():
+        for statement in result['statements']:
+            occurrences[statement['fingerprint']].append(file_path)
+            statements.setdefault(statement['fingerprint'], statement)
+
+    print("Inline script duplicates")
+    print("=" * 80)
+    print(f"Pages: {len(pages)}, handler/function statements: {sum(map(len, occurrences.values()))}, "
+          f"distinct: {len(occurrences)}")
+
+    # Copies in separate <script> blocks stay: one of the blocks may fail to parse and run none of its code
+    print("\nRepeated within one <script>:")
+    repeated_pages = 0
+    for file_path, result in sorted(pages.items()):
+        counts = defaultdict(int)
+        for statement in result['statements']:
+            counts[statement['script'], statement['fingerprint']] += 1
+        repeats = [(statements[fp], count) for (_, fp), count in counts.items() if count > 1]
+        if repeats:
+            repeated_pages += 1
+            for statement, count in repeats:
+                print(f"  {file_path}: {statement['kind']} x{count}, {statement['bytes'] * (count - 1):,} bytes extra: "
+                      f"{statement['preview']}")
+    if not repeated_pages:
+        print("  none")
+
+    print("\nNear-duplicate handlers within a page (both run):")
+    near_pages = [(file_path, near) for file_path, result in sorted(pages.items()) for near in result['near']]
+    for file_path, (event, first, second, shared, mobile) in near_pages:
+        print(f"  {file_path}: {event}, {shared:.0%} shared{' (mobile menu copies)' if mobile else ''}")
+        print(f"      {first}")
+        print(f"      {second}")
+    if not near_pages:
+        print("  none")
+
+    handlers = {fp: statement for fp, statement in statements.items() if statement['kind'] == 'handler'}
+
+    def is_movable(statement):
+        return statement['code'] is not None and statement['bytes'] >= args.min_bytes
+
+    print(f"\nShared across pages ({args.min_pages}+ pages):")
+    common = sorted((fp for fp in occurrences if len(set(occurrences[fp])) >= args.min_pages),
+                    key=lambda fp: -len(occurrences[fp]) * statements[fp]['bytes'])
+    for fp in common:
+        statement = statements[fp]
+        movable = ' (movable)' if is_movable(statement) else ' (mobile menu copy)' if statement['mobile'] else ''
+        print(f"  {len(set(occurrences[fp])):>3} pages  {statement['bytes']:>6,} bytes  {statement['kind']}{movable}: "
+              f"{statement['preview']}")
+    for group in handler_variants(handlers):
+        page_count = len({page for fp in group for page in occurrences[fp]})
+        print(f"  {len(group)} near-duplicate variants of a {handlers[group[0]]['event']} handler on {page_count} pages: "
+              f"{handlers[group[0]]['preview']}")
+
+    if any(statement['mobile'] for statement in statements.values()):
+        print("\nMobile menu copies are left to fix_all_navigation.py --migrate, which replaces them with one shared script")
+
+    if not args.collapse:
+        print("\nRun with --collapse to remove the repeats and move movable shared handlers into a deferred file")
+        return
+
+    # Pages with the same shared handlers, in the same order, share one file
+    shared = {fp for fp in common if is_movable(statements[fp])}
+    files = {}
+    tasks = []
+    for file_path in sorted(pages):
+        order = []
+        for statement in pages[file_path]['statements']:
+            if statement['fingerprint'] in shared and statement['fingerprint'] not in order:
+                order.append(statement['fingerprint'])
+        shared_tag = None
+        if order:
+            code = minify_js('\n\n'.join(statements[fp]['code'] for fp in order))
+            name = files.setdefault(tuple(order), fingerprinted_name(SHARED_HANDLERS_FILE, code))
+            shared_tag = f'<script src="/{name}" defer></script>'
+            if not os.path.exists(os.path.join(args.root, name)):
+                write_text(os.path.join(args.root, name), code, [f"Built {name}"])
+        tasks.append((args.root, file_path, set(order), shared_tag))
+
+    print("\nCollapsing")
+    print("-" * 80)
+    totals = defaultdict(int)
+    for (_, file_path, _, _), stats, error in run_parallel(collapse_page, tasks, jobs=args.jobs):
+        if error:
+            print(f"Error processing {file_path}: {error}")
+            continue
+        for name, value in stats.items():
+            totals[name] += value
+        if stats['duplicates'] or stats['moved']:
+            print(f"  {file_path}: {stats['duplicates']} repeated removed, {stats['moved']} moved "
+                  f"({stats['duplicate_bytes'] + stats['moved_bytes'] - stats['tag_bytes']:,} bytes)")
+
+    # Shared files no page loads any more
+    in_use = set(files.values()) | {name for result in pages.values() for name in result['shared_files']}
+    directory = os.path.dirname(SHARED_HANDLERS_FILE)
+    pattern = asset_pattern(SHARED_HANDLERS_FILE)
+    if os.path.isdir(os.path.join(args.root, directory)):
+        for name in sorted(os.listdir(os.path.join(args.root, directory))):
+            path = f'{directory}/{name}'
+            if path != SHARED_HANDLERS_FILE and pattern.match(path) and path not in in_use:
+                remove_file(os.path.join(args.root, path))
+
+    saved = totals['duplicate_bytes'] + totals['moved_bytes'] - totals['tag_bytes']
+    print(f"\nRepeated statements removed: {totals['duplicates']} ({totals['duplicate_handlers']} duplicate handler "
+          f"registrations), {totals['duplicate_bytes']:,} bytes")
+    print(f"Shared handlers moved to {len(files)} deferred file(s): {totals['moved']} copies, "
+          f"{totals['moved_bytes']:,} bytes")
+    print(f"Inline script bytes saved: {saved:,}")
+
+if __name__ == "__main__":
+    with Transaction(dry_run=dry_run_mode()):
+        main()
@@ -4,114 +4,129 @@ Enhance rocket colors for better contrast against dark purple background
 """
 
 from PIL import Image, ImageDraw, ImageEnhance
-import requests
+import argparse
 import io
+import os
 import numpy as np
 
+from sitecore import load_script
+
+# Channel multipliers: everything visible is brightened first, then the dominant hue is boosted
+BRIGHTEN = 1.3
+GREEN_BOOST = {'g': 1.4, 'b': 1.2}   # rocket body -> more cyan/bright green
+RED_BOOST = {'r': 1.4, 'g': 1.1}     # flames -> more vibrant
+BLUE_BOOST = {'b': 1.4, 'g': 1.1}    # bluish -> brighter blue
+
+SOURCE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.webp', '.gif', '.bmp')
+
+def scale_channel(channel, factor):
+    """min(255, int(c * factor)) over a whole channel array"""
+    return np.minimum(255, (channel * factor).astype(np.int32))
+
+def enhance_pixels(data):
+    """Brighten visible pixels and boost their dominant hue, as whole-array masks
+
+    data is an RGBA uint8 array; a new array is returned. Matches the
+    original per-pixel loop exactly: float64 multiply, truncate, clamp to 255,
+    and hue classes decided on the brightened values with green > red > blue
+    precedence.
+    """
+    channels = data.astype(np.int32)
+    r, g, b, a = (channels[..., i] for i in range(4))
+    visible = a > 0
+
+    # Brighten overall
+    r = scale_channel(r, BRIGHTEN)
+    g = scale_channel(g, BRIGHTEN)
+    b = scale_channel(b, BRIGHTEN)
+
+    # Hue classes (mutually exclusive, first match wins like the if/elif chain)
+    green = (g > r) & (g > b)
+    red = ~green & (r > g) & (r > b)
+    blue = ~green & ~red & (b > r) & (b > g)
+
+    new_r = np.where(red, scale_channel(r, RED_BOOST['r']), r)
+    new_g = np.where(green, scale_channel(g, GREEN_BOOST['g']),
+                     np.where(red, scale_channel(g, RED_BOOST['g']),
+                              np.where(blue, scale_channel(g, BLUE_BOOST['g']), g)))
+    new_b = np.where(green, scale_channel(b, GREEN_BOOST['b']),
+                     np.where(blue, scale_channel(b, BLUE_BOOST['b']), b))
+
+    enhanced = data.copy()
+    enhanced[..., 0] = np.where(visible, new_r, channels[..., 0])
+    enhanced[..., 1] = np.where(visible, new_g, channels[..., 1])
+    enhanced[..., 2] = np.where(visible, new_b, channels[..., 2])
+    return enhanced
+
+def build_enhanced_icon(original):
+    """Enhanced rocket centered on the emerald circle background, as an RGBA image"""
+    # Convert to RGBA if not already
+    if original.mode != 'RGBA':
+        original = original.convert('RGBA')
+
+    # Get image size
+    width, height = original.size
+    size = max(width, height)
+
+    # Make the rocket brighter and more vibrant
+    enhanced_rocket = Image.fromarray(enhance_pixels(np.array(original)), 'RGBA')
+
+    # Apply additional enhancements
+    # Increase contrast
+    contrast_enhancer = ImageEnhance.Contrast(enhanced_rocket)
+    enhanced_rocket = contrast_enhancer.enhance(1.3)
+
+    # Increase saturation
+    color_enhancer = ImageEnhance.Color(enhanced_rocket)
+    enhanced_rocket = color_enhancer.enhance(1.4)
+
+    # Create a new image with the dark purple circle background
+    new_image = Image.new('RGBA', (size, size), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(new_image)
+
+    # Draw dark emerald green circle background
+    emerald_color = (6, 78, 59, 255)  # #064E3B (dark emerald green)
+    draw.ellipse([0, 0, size-1, size-1], fill=emerald_color)
+
+    # Add a subtle bright border to help separation
+    border_color = (16, 108, 89, 255)  # Slightly lighter emerald green
+    draw.ellipse([2, 2, size-3, size-3], outline=border_color, width=3)
+
+    # Calculate position to center the enhanced rocket
+    x = (size - width) // 2
+    y = (size - height) // 2
+
+    # Paste the enhanced rocket on top
+    new_image.paste(enhanced_rocket, (x, y), enhanced_rocket)
+    return new_image
+
+def save_icon_files(new_image, output_path):
+    """Write the PNG and a 16/32/48 ICO next to it; returns the ICO path"""
+    new_image.save(output_path, 'PNG', optimize=True)
+
+    # Also create ICO format
+    ico_path = output_path.replace('.png', '.ico')
+    favicon_sizes = [(16, 16), (32, 32), (48, 48)]
+    favicon_images = []
+
+    for favicon_size in favicon_sizes:
+        resized = new_image.resize(favicon_size, Image.Resampling.LANCZOS)
+        favicon_images.append(resized)
+
+    # Save as ICO
+    favicon_images[0].save(ico_path, format='ICO', sizes=[(img.size[0], img.size[1]) for img in favicon_images])
+    return ico_path
+
 def enhance_rocket_colors(image_url, output_path):
     """Enhance the rocket colors for better visibility against dark purple background"""
     try:
-        # Download the original image
-        response = requests.get(image_url)
-        response.raise_for_status()
+        # Source comes from the shared download cache; the network is only used on a miss
+        source = load_script('build-icons.py').SourceCache().fetch(image_url)
 
         # Open the image
-        original = Image.open(io.BytesIO(response.content))
-
-        # Convert to RGBA if not already
-        if original.mode != 'RGBA':
-            original = original.convert('RGBA')
-
-        # Get image size
-        width, height = original.size
-        size = max(width, height)
-
-        # Create enhanced version of the rocket
-        enhanced_rocket = original.copy()
-
-        # Convert to numpy array for color manipulation
-        data = np.array(enhanced_rocket)
-
-        # Define color mappings for better contrast
-        # We'll make the rocket brighter and more vibrant
-
-        # Enhance existing colors to be more vibrant
-        # Increase saturation and brightness for non-transparent pixels
-        for y in range(data.shape[0]):
-            for x in range(data.shape[1]):
-                pixel = data[y, x]
-                if pixel[3] > 0:  # If not transparent
-                    r, g, b, a = pixel
-
-                    # Convert to HSV-like adjustments
-                    # Brighten overall
-                    r = min(255, int(r * 1.3))
-                    g = min(255, int(g * 1.3))
-                    b = min(255, int(b * 1.3))
-
-                    # Make specific color enhancements
-                    # If it's greenish (rocket body), make it more cyan/bright green
-                    if g > r and g > b:
-                        g = min(255, int(g * 1.4))
-                        b = min(255, int(b * 1.2))
-
-                    # If it's orangish/reddish (flames), make it more vibrant
-                    elif r > g and r > b:
-                        r = min(255, int(r * 1.4))
-                        g = min(255, int(g * 1.1))
-
-                    # If it's bluish, make it brighter blue
-                    elif b > r and b > g:
-                        b = min(255, int(b * 1.4))
-                        g = min(255, int(g * 1.1))
-
-                    data[y, x] = [r, g, b, a]
-
-        # Convert back to PIL Image
-        enhanced_rocket = Image.fromarray(data, 'RGBA')
-
-        # Apply additional enhancements
-        # Increase contrast
-        contrast_enhancer = ImageEnhance.Contrast(enhanced_rocket)
-        enhanced_rocket = contrast_enhancer.enhance(1.3)
+        original = Image.open(io.BytesIO(source))
 
-        # Increase saturation
-        color_enhancer = ImageEnhance.Color(enhanced_rocket)
-        enhanced_rocket = color_enhancer.enhance(1.4)
-
-        # Create a new image with the dark purple circle background
-        new_image = Image.new('RGBA', (size, size), (0, 0, 0, 0))
-        draw = ImageDraw.Draw(new_image)
-
-        # Draw dark emerald green circle background
-        emerald_color = (6, 78, 59, 255)  # #064E3B (dark emerald green)
-        draw.ellipse([0, 0, size-1, size-1], fill=emerald_color)
-
-        # Add a subtle bright border to help separation
-        border_color = (16, 108, 89, 255)  # Slightly lighter emerald green
-        draw.ellipse([2, 2, size-3, size-3], outline=border_color, width=3)
-
-        # Calculate position to center the enhanced rocket
-        x = (size - width) // 2
-        y = (size - height) // 2
-
-        # Paste the enhanced rocket on top
-        new_image.paste(enhanced_rocket, (x, y), enhanced_rocket)
-
-        # Save the result
-        new_image.save(output_path, 'PNG', optimize=True)
-
-        # Also create ICO format
-        ico_path = output_path.replace('.png', '.ico')
-        favicon_sizes = [(16, 16), (32, 32), (48, 48)]
-        favicon_images = []
-
-        for favicon_size in favicon_sizes:
-            resized = new_image.resize(favicon_size, Image.Resampling.LANCZOS)
-            favicon_images.append(resized)
-
-        # Save as ICO
-        favicon_images[0].save(ico_path, format='ICO', sizes=[(img.size[0], img.size[1]) for img in favicon_images])
+        ico_path = save_icon_files(build_enhanced_icon(original), output_path)
 
         print(f"Enhanced rocket favicon created:")
         print(f"   PNG: {output_path}")
@@ -123,13 +138,44 @@ def enhance_rocket_colors(image_url, output_path):
         print(f"Error enhancing rocket colors: {e}")
         return False
 
+def enhance_directory(source_dir, output_dir):
+    """Batch mode: enhance every source icon in a directory in one run"""
+    os.makedirs(output_dir, exist_ok=True)
+    created = []
+
+    for filename in sorted(os.listdir(source_dir)):
+        if not filename.lower().endswith(SOURCE_EXTENSIONS):
+            continue
+
+        source_path = os.path.join(source_dir, filename)
+        output_path = os.path.join(output_dir, os.path.splitext(filename)[0] + '-enhanced.png')
+        try:
+            with Image.open(source_path) as original:
+                ico_path = save_icon_files(build_enhanced_icon(original), output_path)
+            print(f"   {filename} -> {output_path}, {ico_path}")
+            created.append(output_path)
+        except Exception as e:
+            print(f"   Error enhancing {filename}: {e}")
+
+    return created
+
 def main():
-    image_url = "https://imagedelivery.net/mYndgAUf_CYgFA1HoO_-GQ/43e7272a-fb53-44aa-f0f2-7656a83bc700/public"
-    output_png = "favicon-enhanced.png"
+    parser = argparse.ArgumentParser(description="Enhance rocket colors for better contrast")
+    parser.add_argument('--url', default="https://imagedelivery.net/mYndgAUf_CYgFA1HoO_-GQ/43e7272a-fb53-44aa-f0f2-7656a83bc700/public",
+                        help='source image to download')
+    parser.add_argument('--output', default="favicon-enhanced.png", help='output PNG (an ICO is written alongside)')
+    parser.add_argument('--batch', metavar='DIR', help='enhance every image in DIR instead of downloading --url')
+    parser.add_argument('--output-dir', default='.', help='where --batch writes its PNG/ICO pairs')
+    args = parser.parse_args()
 
     print("Enhancing rocket colors for better contrast...")
 
-    if enhance_rocket_colors(image_url, output_png):
+    if args.batch:
+        created = enhance_directory(args.batch, args.output_dir)
+        print(f"\nEnhanced {len(created)} icon(s) from {args.batch}")
+        return
+
+    if enhance_rocket_colors(args.url, args.output):
         print("\nRocket color enhancement complete!")
         print("The rocket should now have much better visibility against the dark purple background.")
         print("Colors have been brightened and made more vibrant while maintaining the original design.")
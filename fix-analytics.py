@@ -1,6 +1,67 @@
 import os
 import re
 
+from sitepipeline.assets import has_asset_reference, load_manifest, script_tag
+from sitepipeline.transaction import Transaction, dry_run_mode, write_text
+
+def analytics_config_tag(manifest=None):
+    """Points at the fingerprinted copy once build-assets.py has run"""
+    return script_tag('analytics-config.js', defer=True, manifest=manifest)
+
+def fix_analytics_content(content, manifest=None):
+    """Apply the analytics fixes to page content; returns (content, issues)"""
+    issues = []
+
+    # 1. Fix duplicate or incorrect GA IDs
+    if 'GA_MEASUREMENT_ID' in content:
+        content = content.replace('GA_MEASUREMENT_ID', 'G-J09TH92K0M')
+        issues.append('Fixed placeholder GA ID')
+
+    # 2. Remove inline onclick gtag events (we'll handle via event delegation)
+    onclick_pattern = r'onclick="gtag\([^"]*\)"'
+    if re.search(onclick_pattern, content):
+        content = re.sub(onclick_pattern, '', content)
+        issues.append('Removed inline onclick tracking')
+
+    # 3. Ensure only one GA script tag
+    ga_script_pattern = r'<script async src="https://www\.googletagmanager\.com/gtag/js\?id=[^"]+"></script>'
+    ga_scripts = re.findall(ga_script_pattern, content)
+    if len(ga_scripts) > 1:
+        # Keep only the first one and ensure it's correct
+        content = re.sub(ga_script_pattern, '', content)
+        # Add it back once in the head
+        if '<head>' in content:
+            correct_script = '<script async src="https://www.googletagmanager.com/gtag/js?id=G-J09TH92K0M"></script>'
+            content = content.replace('<head>', f'<head>\n    {correct_script}', 1)
+        issues.append(f'Fixed {len(ga_scripts)} duplicate GA script tags')
+
+    # 4. Ensure gtag config is correct and only appears once
+    gtag_config_pattern = r'gtag\([\'"]config[\'"],\s*[\'"][^\'"]+[\'"]\)'
+    gtag_configs = re.findall(gtag_config_pattern, content)
+    if len(gtag_configs) > 1:
+        # Remove all gtag configs
+        content = re.sub(gtag_config_pattern, '', content)
+        issues.append(f'Removed {len(gtag_configs)} duplicate gtag configs')
+
+    # 5. Add analytics-config.js before </body> if not present
+    if '</body>' in content and not has_asset_reference(content, 'analytics-config.js'):
+        analytics_script = f'    {analytics_config_tag(manifest)}\n'
+        content = content.replace('</body>', f'{analytics_script}</body>')
+        issues.append('Added analytics-config.js')
+
+    # 6. Clean up old event tracking scripts that are redundant
+    old_tracking_patterns = [
+        r'// Track affiliate clicks[\s\S]*?}\);[\s\n]*}\);',
+        r'// Analytics tracking[\s\S]*?}\);[\s\n]*}\);',
+        r'// Track scroll depth[\s\S]*?}\);[\s\n]*}\);'
+    ]
+    for pattern in old_tracking_patterns:
+        if re.search(pattern, content, re.MULTILINE):
+            content = re.sub(pattern, '', content, flags=re.MULTILINE)
+            issues.append('Removed redundant tracking script')
+
+    return content, issues
+
 def fix_analytics():
     """Fix Google Analytics implementation across all HTML files"""
 
@@ -15,6 +76,7 @@ def fix_analytics():
 
     fixed_files = []
     issues_found = {}
+    manifest = load_manifest()
 
     for file_path in html_files:
         try:
@@ -22,60 +84,11 @@ def fix_analytics():
                 content = f.read()
 
             original_content = content
-            issues = []
-
-            # 1. Fix duplicate or incorrect GA IDs
-            if 'GA_MEASUREMENT_ID' in content:
-                content = content.replace('GA_MEASUREMENT_ID', 'G-J09TH92K0M')
-                issues.append('Fixed placeholder GA ID')
-
-            # 2. Remove inline onclick gtag events (we'll handle via event delegation)
-            onclick_pattern = r'onclick="gtag\([^"]*\)"'
-            if re.search(onclick_pattern, content):
-                content = re.sub(onclick_pattern, '', content)
-                issues.append('Removed inline onclick tracking')
-
-            # 3. Ensure only one GA script tag
-            ga_script_pattern = r'<script async src="https://www\.googletagmanager\.com/gtag/js\?id=[^"]+"></script>'
-            ga_scripts = re.findall(ga_script_pattern, content)
-            if len(ga_scripts) > 1:
-                # Keep only the first one and ensure it's correct
-                content = re.sub(ga_script_pattern, '', content)
-                # Add it back once in the head
-                if '<head>' in content:
-                    correct_script = '<script async src="https://www.googletagmanager.com/gtag/js?id=G-J09TH92K0M"></script>'
-                    content = content.replace('<head>', f'<head>\n    {correct_script}', 1)
-                issues.append(f'Fixed {len(ga_scripts)} duplicate GA script tags')
-
-            # 4. Ensure gtag config is correct and only appears once
-            gtag_config_pattern = r'gtag\([\'"]config[\'"],\s*[\'"][^\'"]+[\'"]\)'
-            gtag_configs = re.findall(gtag_config_pattern, content)
-            if len(gtag_configs) > 1:
-                # Remove all gtag configs
-                content = re.sub(gtag_config_pattern, '', content)
-                issues.append(f'Removed {len(gtag_configs)} duplicate gtag configs')
-
-            # 5. Add analytics-config.js before </body> if not present
-            if 'analytics-config.js' not in content and '</body>' in content:
-                analytics_script = '    <script src="/analytics-config.js" defer></script>\n'
-                content = content.replace('</body>', f'{analytics_script}</body>')
-                issues.append('Added analytics-config.js')
-
-            # 6. Clean up old event tracking scripts that are redundant
-            old_tracking_patterns = [
-                r'// Track affiliate clicks[\s\S]*?}\);[\s\n]*}\);',
-                r'// Analytics tracking[\s\S]*?}\);[\s\n]*}\);',
-                r'// Track scroll depth[\s\S]*?}\);[\s\n]*}\);'
-            ]
-            for pattern in old_tracking_patterns:
-                if re.search(pattern, content, re.MULTILINE):
-                    content = re.sub(pattern, '', content, flags=re.MULTILINE)
-                    issues.append('Removed redundant tracking script')
+            content, issues = fix_analytics_content(content, manifest)
 
             # Save if changes were made
             if content != original_content:
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    f.write(content)
+                write_text(file_path, content, issues)
                 fixed_files.append(file_path)
                 issues_found[file_path] = issues
                 print(f'Fixed: {file_path}')
@@ -176,4 +189,5 @@ def fix_analytics():
     print('GA initialization template saved to GA_INIT_TEMPLATE.txt')
 
 if __name__ == '__main__':
-    fix_analytics()
\ No newline at end of file
+    with Transaction(dry_run=dry_run_mode()):
+        fix_analytics()
\ No newline at end of file
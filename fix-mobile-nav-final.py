@@ -7,7 +7,14 @@ import os
 import re
 import glob
 
-def fix_mobile_nav_final(file_path):
+from sitepipeline.assets import HASH_LENGTH, has_asset_reference, load_manifest, script_tag
+from sitepipeline.navigation import MOBILE_NAV_JS_FILE
+from sitepipeline.transaction import Transaction, dry_run_mode, write_text
+
+# The cookie consent script tag, plain or fingerprinted by build-assets.py
+COOKIE_CONSENT_OPEN = rf'<script src="/assets/cookie-consent(?:\.[0-9a-f]{{{HASH_LENGTH}}})?\.js">'
+
+def fix_mobile_nav_final(file_path, manifest=None):
     """Fix mobile navigation script placement"""
     try:
         with open(file_path, 'r', encoding='utf-8') as f:
@@ -16,85 +23,19 @@ def fix_mobile_nav_final(file_path):
         original_content = content
 
         # Remove any mobile navigation code that got placed in wrong script tags
-        content = re.sub(r'(<script src="/assets/cookie-consent\.js">[^<]*?)// Mobile navigation functionality.*?(?=</script>)', r'\1', content, flags=re.DOTALL)
-
-        # Ensure clean mobile navigation script exists before closing body tag
-        mobile_nav_script = '''    <script>
-        // Mobile navigation functionality
-        document.addEventListener('DOMContentLoaded', function() {
-            const mobileToggle = document.querySelector('.mobile-menu-toggle');
-            const navLinks = document.querySelector('.nav-links');
-            const dropdowns = document.querySelectorAll('.dropdown');
-
-            // Mobile menu toggle button
-            if (mobileToggle && navLinks) {
-                mobileToggle.addEventListener('click', function(e) {
-                    e.preventDefault();
-                    e.stopPropagation();
-                    navLinks.classList.toggle('active');
-                    this.textContent = navLinks.classList.contains('active') ? '✕' : '☰';
-                });
-            }
-
-            // Mobile dropdown toggles
-            dropdowns.forEach(dropdown => {
-                const dropdownLink = dropdown.querySelector('a');
-                if (dropdownLink) {
-                    dropdownLink.addEventListener('click', function(e) {
-                        if (window.innerWidth <= 768) {
-                            e.preventDefault();
-                            dropdowns.forEach(otherDropdown => {
-                                if (otherDropdown !== dropdown) {
-                                    otherDropdown.classList.remove('mobile-open');
-                                }
-                            });
-                            dropdown.classList.toggle('mobile-open');
-                        }
-                    });
-                }
-            });
-
-            // Close mobile menu when clicking outside
-            document.addEventListener('click', function(e) {
-                if (window.innerWidth <= 768 && navLinks) {
-                    if (!e.target.closest('nav') && !e.target.closest('.mobile-menu-toggle')) {
-                        navLinks.classList.remove('active');
-                        if (mobileToggle) {
-                            mobileToggle.textContent = '☰';
-                        }
-                        dropdowns.forEach(dropdown => {
-                            dropdown.classList.remove('mobile-open');
-                        });
-                    }
-                }
-            });
-
-            // Close mobile menu on window resize
-            window.addEventListener('resize', function() {
-                if (window.innerWidth > 768 && navLinks) {
-                    navLinks.classList.remove('active');
-                    if (mobileToggle) {
-                        mobileToggle.textContent = '☰';
-                    }
-                    dropdowns.forEach(dropdown => {
-                        dropdown.classList.remove('mobile-open');
-                    });
-                }
-            });
-        });
-    </script>'''
+        content = re.sub(rf'({COOKIE_CONSENT_OPEN}[^<]*?)// Mobile navigation functionality.*?(?=</script>)', r'\1', content, flags=re.DOTALL)
 
         # Fix cookie consent script tag
-        content = re.sub(r'<script src="/assets/cookie-consent\.js">[^<]*</script>', '<script src="/assets/cookie-consent.js"></script>', content)
+        cookie_consent_js = script_tag('assets/cookie-consent.js', manifest=manifest)
+        content = re.sub(rf'{COOKIE_CONSENT_OPEN}[^<]*</script>', lambda match: cookie_consent_js, content)
 
-        # Add mobile nav script before closing body tag if not already there
-        if 'Mobile navigation functionality' not in content:
-            content = content.replace('</body>', mobile_nav_script + '\n</body>')
+        # Load the shared mobile nav script before closing body tag if the page has no copy of its own
+        if 'Mobile navigation functionality' not in content and not has_asset_reference(content, MOBILE_NAV_JS_FILE):
+            content = content.replace('</body>', f'    {script_tag(MOBILE_NAV_JS_FILE, defer=True, manifest=manifest)}\n</body>')
 
         # Only write if content changed
         if content != original_content:
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(content)
+            write_text(file_path, content)
             return True
         return False
 
@@ -108,13 +49,14 @@ def main():
 
     html_files = glob.glob("**/*.html", recursive=True)
     modified_files = []
+    manifest = load_manifest()
 
     for file_path in html_files:
         if 'TEMPLATE' in file_path.upper():
             continue
 
         print(f"Processing: {file_path}")
-        if fix_mobile_nav_final(file_path):
+        if fix_mobile_nav_final(file_path, manifest):
             modified_files.append(file_path)
 
     print(f"\nFinal mobile navigation fix complete!")
@@ -124,4 +66,5 @@ def main():
     return len(modified_files)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    with Transaction(dry_run=dry_run_mode()):
+        main()
\ No newline at end of file
@@ -7,6 +7,8 @@ import os
 import re
 import glob
 
+from sitepipeline.transaction import Transaction, dry_run_mode, write_text
+
 def fix_mobile_navigation_in_file(file_path):
     """Fix duplicate mobile navigation scripts in a single HTML file"""
     try:
@@ -119,8 +121,7 @@ def fix_mobile_navigation_in_file(file_path):
 
         # Only write if content changed significantly
         if content != original_content and len(content) > 100:
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(content)
+            write_text(file_path, content)
             return True
         return False
 
@@ -160,4 +161,5 @@ def main():
     return len(modified_files)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    with Transaction(dry_run=dry_run_mode()):
+        main()
\ No newline at end of file
@@ -3,12 +3,28 @@
 Comprehensive script to add complete navigation menu to all pages and move affiliate disclosures to bottom.
 """
 
+import argparse
 import os
 import re
 from pathlib import Path
 
-# Complete navigation CSS styles
-NAVIGATION_CSS = '''        /* Navigation Styles */
+from sitecore import find_html_files, parse
+from sitepipeline.assets import has_asset_reference, load_manifest, script_tag, stylesheet_tag
+from sitepipeline.css import css_items
+from sitepipeline.navigation import (MOBILE_NAV_JS_FILE, NAVIGATION_CSS_FILE, css_features, extract_shared_navigation,
+                                     js_features)
+from sitepipeline.parallel import add_jobs_argument, run_parallel
+from sitepipeline.transaction import Transaction, add_dry_run_argument, dry_run_mode, write_text
+
+# Navigation CSS and mobile menu JS live in shared files; pages load them with these tags
+def navigation_css_tag(manifest=None):
+    return stylesheet_tag(NAVIGATION_CSS_FILE, manifest)
+
+def mobile_js_tag(manifest=None):
+    return script_tag(MOBILE_NAV_JS_FILE, defer=True, manifest=manifest)
+
+# What earlier versions of this script pasted into every page; kept so --migrate recognises those copies
+LEGACY_NAVIGATION_CSS = '''        /* Navigation Styles */
         .site-header {
             background: linear-gradient(180deg, #ffffff 0%, #fafafa 100%);
             border-bottom: 1px solid rgba(149, 191, 71, 0.2);
@@ -222,8 +238,8 @@ NAVIGATION_HTML = '''    <header class="site-header">
 
 '''
 
-# Mobile menu JavaScript
-MOBILE_JS = '''
+# ...and the mobile menu script they appended to each page's last <script>
+LEGACY_MOBILE_JS = '''
         // Mobile menu functionality
         document.addEventListener('DOMContentLoaded', function() {
             const mobileToggle = document.querySelector('.mobile-menu-toggle');
@@ -277,6 +293,15 @@ MOBILE_JS = '''
             });
         });'''
 
+def _read_asset(file_path):
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), file_path), 'r', encoding='utf-8') as f:
+        return f.read()
+
+# Declarations and code lines of every known copy, for near-duplicate detection
+SHARED_CSS = css_features(css_items(_read_asset(NAVIGATION_CSS_FILE)))
+KNOWN_CSS = css_features(css_items(LEGACY_NAVIGATION_CSS)) | SHARED_CSS
+KNOWN_JS = js_features(LEGACY_MOBILE_JS) | js_features(_read_asset(MOBILE_NAV_JS_FILE))
+
 def has_complete_navigation(content):
     """Check if file has complete navigation structure."""
     required_elements = [
@@ -291,11 +316,44 @@ def has_complete_navigation(content):
     ]
 
     for element in required_elements:
-        if not re.search(element, content, re.IGNORECASE):
+        # DOTALL: the logo and menu items sit on separate lines from what follows them
+        if not re.search(element, content, re.IGNORECASE | re.DOTALL):
             return False
     return True
 
-def add_navigation_to_file(file_path):
+def has_site_header(content):
+    """True when the page already carries the global header markup (an older variant counts too)"""
+    doc = parse(content)
+    return any('site-header' in (node.get('class') or '').split() for node in doc.find_all('header')) or any(
+        'nav-links' in (node.get('class') or '').split() for node in doc.find_all('ul'))
+
+def add_navigation_to_content(content, manifest=None):
+    """Add the navigation stylesheet, HTML and mobile JS to page content, then move the disclosure."""
+    # Step 1: Link the shared navigation stylesheet ahead of the page's own styles
+    if not has_asset_reference(content, NAVIGATION_CSS_FILE):
+        css_tag = navigation_css_tag(manifest)
+        style_match = re.search(r'[ \t]*<style[^>]*>', content)
+        if style_match:
+            content = content.replace(style_match.group(0), f'    {css_tag}\n{style_match.group(0)}', 1)
+        else:
+            content = content.replace('</head>', f'    {css_tag}\n</head>', 1)
+
+    # Step 2: Add navigation HTML after <body>, unless the page has a header already
+    body_match = re.search(r'<body[^>]*>', content)
+    if body_match and not has_site_header(content):
+        body_tag = body_match.group(0)
+        content = content.replace(body_tag, f'{body_tag}\n{NAVIGATION_HTML}')
+
+    # Step 3: Load the shared mobile menu script
+    if not has_asset_reference(content, MOBILE_NAV_JS_FILE) and '</body>' in content:
+        content = content.replace('</body>', f'    {mobile_js_tag(manifest)}\n</body>', 1)
+
+    # Step 4: Move affiliate disclosure to bottom if present in hero/top section
+    content = move_affiliate_disclosure_to_bottom(content)
+
+    return content
+
+def add_navigation_to_file(file_path, manifest=None):
     """Add complete navigation to a single HTML file."""
     print(f"Processing {file_path}...")
 
@@ -310,45 +368,11 @@ def add_navigation_to_file(file_path):
 
         original_content = content
 
-        # Step 1: Add navigation CSS
-        if '</style>' in content:
-            content = content.replace('</style>', f'{NAVIGATION_CSS}\n    </style>')
-        else:
-            # If no existing styles, add them before </head>
-            head_match = re.search(r'</head>', content)
-            if head_match:
-                css_block = f'    <style>\n{NAVIGATION_CSS}\n    </style>\n'
-                content = content.replace('</head>', f'{css_block}</head>')
-
-        # Step 2: Add navigation HTML after <body>
-        body_match = re.search(r'<body[^>]*>', content)
-        if body_match:
-            body_tag = body_match.group(0)
-            content = content.replace(body_tag, f'{body_tag}\n{NAVIGATION_HTML}')
-
-        # Step 3: Add mobile JavaScript
-        if '</body>' in content:
-            # Check if there's already a script tag
-            if re.search(r'<script[^>]*>.*</script>', content, re.DOTALL):
-                # Find the last script tag
-                script_matches = list(re.finditer(r'(<script[^>]*>)(.*?)(</script>)', content, re.DOTALL))
-                if script_matches:
-                    last_script = script_matches[-1]
-                    existing_js = last_script.group(2)
-                    new_js = f'{existing_js}\n{MOBILE_JS}'
-                    content = content.replace(last_script.group(0), f'{last_script.group(1)}{new_js}{last_script.group(3)}')
-            else:
-                # Add new script tag
-                js_block = f'    <script>{MOBILE_JS}\n    </script>\n'
-                content = content.replace('</body>', f'{js_block}</body>')
-
-        # Step 4: Move affiliate disclosure to bottom if present in hero/top section
-        content = move_affiliate_disclosure_to_bottom(content)
+        content = add_navigation_to_content(content, manifest)
 
         # Only write if content actually changed
         if content != original_content:
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(content)
+            write_text(file_path, content)
             print(f"  [UPDATED] {file_path}")
             return True
         else:
@@ -374,6 +398,10 @@ def move_affiliate_disclosure_to_bottom(content):
     for pattern in disclosure_patterns:
         match = re.search(pattern, content, re.DOTALL | re.IGNORECASE)
         if match:
+            # Already the last thing in <main> (or <body>): moving it again would only shift whitespace
+            closing = '</main>' if '</main>' in content else '</body>'
+            if re.match(rf'\s*{closing}', content[match.end():]):
+                return content
             disclosure_found = match.group(0)
             # Remove from current position
             content = content.replace(disclosure_found, '')
@@ -388,10 +416,60 @@ def move_affiliate_disclosure_to_bottom(content):
 
     return content
 
-def main():
-    """Main function to update all files."""
-    base_dir = Path("C:/Projects/Shopifyappauthority-site")
-
+def migrate_page(task):
+    """Swap one page's inlined navigation CSS / mobile JS for the shared files; returns the extraction stats"""
+    full_path, manifest = task
+    with open(full_path, 'r', encoding='utf-8') as f:
+        content = f.read()
+    new_content, stats = extract_shared_navigation(content, KNOWN_CSS, KNOWN_JS, manifest, SHARED_CSS)
+    if new_content != content:
+        write_text(full_path, new_content, [f"Replaced {stats['css_blocks']} navigation CSS and "
+                                            f"{stats['js_blocks']} mobile JS copies with shared assets"])
+    return stats
+
+def migrate_to_shared_assets(root, jobs):
+    """Replace inlined navigation copies on every page with the shared stylesheet and script"""
+    manifest = load_manifest(root)
+    html_files = find_html_files(root)
+    tasks = [(os.path.join(root, file_path), manifest) for file_path in html_files]
+
+    print("Migrating inlined navigation CSS and mobile JS to shared assets")
+    print("=" * 88)
+    print(f"{'page':<56} {'css':>8} {'js':>7} {'tags':>6} {'saved':>8}")
+
+    totals = {'pages': 0, 'css_blocks': 0, 'css_bytes': 0, 'js_blocks': 0, 'js_bytes': 0, 'tag_bytes': 0}
+    kept = {}  # declaration kept inline -> pages
+    for (full_path, _), stats, error in run_parallel(migrate_page, tasks, jobs=jobs):
+        if error:
+            print(f"Error processing {full_path}: {error}")
+            continue
+        if not stats['css_blocks'] and not stats['js_blocks']:
+            continue
+        totals['pages'] += 1
+        for key in totals:
+            if key != 'pages':
+                totals[key] += stats[key]
+        for declaration in stats['kept']:
+            kept.setdefault(declaration, []).append(os.path.relpath(full_path, root))
+        saved = stats['css_bytes'] + stats['js_bytes'] - stats['tag_bytes']
+        print(f"{os.path.relpath(full_path, root):<56} {stats['css_bytes']:>8,} {stats['js_bytes']:>7,} "
+              f"{stats['tag_bytes']:>6,} {saved:>8,}")
+
+    saved = totals['css_bytes'] + totals['js_bytes'] - totals['tag_bytes']
+    shared = sum(len(_read_asset(file_path).encode('utf-8')) for file_path in (NAVIGATION_CSS_FILE, MOBILE_NAV_JS_FILE))
+    print(f"\nPages scanned: {len(html_files)}")
+    print(f"Pages migrated: {totals['pages']} ({totals['css_blocks']} CSS blocks, {totals['js_blocks']} JS blocks removed)")
+    print(f"Bytes saved across pages: {saved:,} "
+          f"(average {saved // max(totals['pages'], 1):,} per migrated page)")
+    print(f"Shared files, downloaded once and cached: {shared:,} bytes before minification")
+
+    if kept:
+        print(f"\nKept inline, where a page's copy differs from {NAVIGATION_CSS_FILE}:")
+        for declaration, pages in sorted(kept.items(), key=lambda item: (-len(item[1]), item[0])):
+            print(f"  {len(pages):>3} pages  {declaration}")
+
+def add_navigation_to_all(base_dir):
+    """Add complete navigation to every page under base_dir."""
     print("Starting comprehensive navigation and disclosure updates...")
     print(f"Base directory: {base_dir}")
 
@@ -403,12 +481,13 @@ def main():
     html_files = list(base_dir.glob('**/*.html'))
 
     # Filter out backup files and temporary files
-    html_files = [f for f in html_files if not any(part.startswith('.') for part in f.parts)]
+    html_files = [f for f in html_files if not any(part.startswith('.') for part in f.relative_to(base_dir).parts)]
 
     print(f"Found {len(html_files)} HTML files to process")
+    manifest = load_manifest(base_dir)
 
     for file_path in html_files:
-        result = add_navigation_to_file(file_path)
+        result = add_navigation_to_file(file_path, manifest)
         if result is True:
             updated_count += 1
         elif result is False:
@@ -424,5 +503,20 @@ def main():
     if failed_count == 0:
         print("All files processed successfully! 🎉")
 
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Add the global navigation to every page, or migrate inlined copies")
+    parser.add_argument('--migrate', action='store_true',
+                        help=f'replace inlined navigation CSS / mobile JS with {NAVIGATION_CSS_FILE} and {MOBILE_NAV_JS_FILE}')
+    parser.add_argument('--root', default='.', help='site root (default: current directory)')
+    add_jobs_argument(parser)
+    add_dry_run_argument(parser)  # consumed by dry_run_mode() at the entry point; listed for --help
+    args = parser.parse_args(argv)
+
+    if args.migrate:
+        migrate_to_shared_assets(args.root, args.jobs)
+    else:
+        add_navigation_to_all(Path(args.root))
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    with Transaction(dry_run=dry_run_mode()):
+        main()
\ No newline at end of file
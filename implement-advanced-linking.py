@@ -9,6 +9,9 @@ import os
 import re
 import glob
 
+from linkgraph import page_route, page_targets
+from sitepipeline.transaction import Transaction, dry_run_mode, write_text
+
 # Cross-category relationship mappings
 CROSS_CATEGORY_LINKS = {
     'email marketing': {
@@ -120,35 +123,46 @@ def add_cross_category_connections(content, current_category):
 
     return content
 
-def add_store_size_segmentation(content):
+def add_store_size_segmentation(content, linked=None):
     """Add store size segmentation links when size mentions occur"""
+    if linked is None:
+        linked = page_targets(content)
+
     for size_term, size_url in STORE_SIZE_LINKS.items():
         pattern = rf'\b({re.escape(size_term)})\b'
 
         # Check if term exists and isn't already linked
-        if re.search(pattern, content, re.IGNORECASE) and size_url not in content:
+        if size_url not in linked and re.search(pattern, content, re.IGNORECASE):
             # Create contextual link
             contextual_replacement = f'<a href="{size_url}">{size_term}</a>'
             content = re.sub(pattern, contextual_replacement, content, count=1, flags=re.IGNORECASE)
+            linked.add(size_url)
 
     return content
 
-def add_integration_ecosystem_links(content):
+def add_integration_ecosystem_links(content, linked=None):
     """Add integration ecosystem links for mentioned platforms"""
+    if linked is None:
+        linked = page_targets(content)
+
     for integration_term, integration_url in INTEGRATION_PATTERNS.items():
         pattern = rf'\b({re.escape(integration_term)})\b'
 
         # Check if integration is mentioned but not already linked to that specific page
-        if re.search(pattern, content, re.IGNORECASE) and integration_url not in content:
+        if integration_url not in linked and re.search(pattern, content, re.IGNORECASE):
             # Create contextual integration link
             replacement = f'<a href="{integration_url}">{integration_term}</a>'
             content = re.sub(pattern, replacement, content, count=1, flags=re.IGNORECASE)
+            linked.add(integration_url)
 
     return content
 
-def add_hub_page_connections(content, file_path):
+def add_hub_page_connections(content, file_path, linked=None):
     """Connect to hub pages from pillar content"""
     if 'best-shopify-apps-2025' in file_path or 'index.html' == os.path.basename(file_path):
+        if linked is None:
+            linked = page_targets(content, page_route(file_path))
+
         # Add strategic links to major category pages within content
         category_mentions = {
             'email marketing apps': '/best-shopify-apps-email-marketing/',
@@ -161,9 +175,10 @@ def add_hub_page_connections(content, file_path):
 
         for mention, category_url in category_mentions.items():
             pattern = rf'\b({re.escape(mention)})\b'
-            if re.search(pattern, content, re.IGNORECASE) and category_url not in content:
+            if category_url not in linked and re.search(pattern, content, re.IGNORECASE):
                 replacement = f'<a href="{category_url}">{mention}</a>'
                 content = re.sub(pattern, replacement, content, count=1, flags=re.IGNORECASE)
+                linked.add(category_url)
 
     return content
 
@@ -200,6 +215,31 @@ def enhance_related_sections(content):
 
     return content
 
+def apply_advanced_linking(content, file_path, applied=None):
+    """Apply the Phase 3 linking rules, in order, to page content
+
+    The name of every rule that changed the page is appended to applied.
+    """
+    applied = [] if applied is None else applied
+    current_category = get_page_category(file_path)
+
+    def step(rule, new_content):
+        if new_content != content:
+            applied.append(rule)
+        return new_content
+
+    content = step('Cross-category connections', add_cross_category_connections(content, current_category))
+
+    # Routes this page already links to: one href scan, kept current as links are added
+    linked = page_targets(content, page_route(file_path))
+
+    content = step('Store size segmentation', add_store_size_segmentation(content, linked))
+    content = step('Integration ecosystem links', add_integration_ecosystem_links(content, linked))
+    content = step('Hub page connections', add_hub_page_connections(content, file_path, linked))
+    content = step('Enhanced related sections', enhance_related_sections(content))
+
+    return content
+
 def process_file_advanced(file_path):
     """Process a single HTML file for advanced linking patterns"""
     try:
@@ -207,19 +247,12 @@ def process_file_advanced(file_path):
             content = f.read()
 
         original_content = content
-        current_category = get_page_category(file_path)
-
-        # Apply advanced linking rules
-        content = add_cross_category_connections(content, current_category)
-        content = add_store_size_segmentation(content)
-        content = add_integration_ecosystem_links(content)
-        content = add_hub_page_connections(content, file_path)
-        content = enhance_related_sections(content)
+        applied = []
+        content = apply_advanced_linking(content, file_path, applied)
 
         # Only write if content changed
         if content != original_content:
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(content)
+            write_text(file_path, content, applied)
             return True
 
         return False
@@ -268,4 +301,5 @@ def main():
     return len(modified_files)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    with Transaction(dry_run=dry_run_mode()):
+        main()
\ No newline at end of file
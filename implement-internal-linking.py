@@ -9,6 +9,8 @@ import re
 import glob
 from pathlib import Path
 
+from sitepipeline.transaction import Transaction, dry_run_mode, write_text
+
 # App to URL mapping based on site analysis
 APP_REVIEWS = {
     'klaviyo': '/klaviyo-review/',
@@ -90,40 +92,138 @@ def get_current_page_info(file_path):
     else:
         return {'type': 'other', 'name': path_parts[-2] if len(path_parts) > 1 else 'unknown'}
 
+class AppMentionMatcher:
+    """Multi-keyword matcher for app name mentions.
+
+    The app names are folded into a single keyword trie which is compiled
+    into one regex, so a page is scanned once, left to right, for every app
+    instead of once per app and pattern.
+    """
+
+    REVIEW_FOLLOWS = re.compile(r'\s*review', re.IGNORECASE)
+    EXISTING_HREF = re.compile(r'href="([^"]*)"')
+
+    def __init__(self, app_urls):
+        self.app_urls = dict(app_urls)
+        self.pattern = re.compile(r'\b' + self._trie_pattern(self.app_urls) + r'\b')
+
+    @staticmethod
+    def _trie_pattern(words):
+        """Compile the app names into a keyword trie expressed as nested alternations"""
+        trie = {}
+        for word in words:
+            node = trie
+            for char in word:
+                node = node.setdefault(char, {})
+            node[''] = {}
+
+        def build(node):
+            branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+            if not branches:
+                return ''
+            body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+            return f'(?:{body})?' if '' in node else body
+
+        return build(trie)
+
+    @staticmethod
+    def _inside_link(content, end):
+        """Mirror (?![^<]*</a>): the next tag after the mention closes a link"""
+        next_tag = content.find('<', end)
+        return next_tag != -1 and content[next_tag:next_tag + 4].lower() == '</a>'
+
+    @staticmethod
+    def _preceding_phrase(content, start):
+        """Return the start of an "unlike"/"compared to" lead-in and its kind"""
+        pos = start
+        while pos > 0 and content[pos - 1].isspace():
+            pos -= 1
+        if pos == start:
+            return None, None
+        if content[max(0, pos - 6):pos].lower() == 'unlike':
+            return pos - 6, 'unlike'
+        if content[max(0, pos - 2):pos].lower() == 'to':
+            to_start = pos - 2
+            pos = to_start
+            while pos > 0 and content[pos - 1].isspace():
+                pos -= 1
+            if pos < to_start and content[max(0, pos - 8):pos].lower() == 'compared':
+                return pos - 8, 'compared'
+        return None, None
+
+    def scan(self, content):
+        """Find the first mention of each app in every linkable form, in one pass"""
+        lowered = content.lower()
+        if len(lowered) == len(content):
+            matches = self.pattern.finditer(lowered)
+        else:
+            # Case folding changed offsets; fall back to a case-insensitive scan
+            matches = re.finditer(self.pattern.pattern, content, re.IGNORECASE)
+
+        found = {}
+        for match in matches:
+            start, end = match.span()
+            if self._inside_link(content, end):
+                continue
+
+            forms = found.setdefault(match.group().lower(), {})
+
+            # Possessives ("Klaviyo's flows") are plain mentions: the apostrophe ends the word
+            if 'mention' not in forms and not self.REVIEW_FOLLOWS.match(content, end):
+                forms['mention'] = (start, end, content[start:end])
+
+            lead_start, kind = self._preceding_phrase(content, start)
+            if kind and kind not in forms:
+                forms[kind] = (lead_start, end, content[lead_start:end])
+
+        return found
+
+    def link_mentions(self, content, skip_app=None):
+        """Link the first eligible mention of every app, following APP_REVIEWS order"""
+        found = self.scan(content)
+        linked_urls = set(self.EXISTING_HREF.findall(content))
+        edits = []
+
+        for app_name, review_url in self.app_urls.items():
+            if app_name == skip_app or review_url in linked_urls:
+                continue
+
+            forms = found.get(app_name)
+            if not forms:
+                continue
+
+            # Plain mentions win; comparison lead-ins cover mentions followed by "review"
+            for form in ('mention', 'unlike', 'compared'):
+                if form in forms:
+                    start, end, text = forms[form]
+                    break
+
+            edits.append((start, end, f'<a href="{review_url}">{text}</a>'))
+            linked_urls.add(review_url)
+
+        if not edits:
+            return content
+
+        parts = []
+        last = 0
+        for start, end, replacement in sorted(edits):
+            parts.append(content[last:start])
+            parts.append(replacement)
+            last = end
+        parts.append(content[last:])
+        return ''.join(parts)
+
+APP_MENTION_MATCHER = AppMentionMatcher(APP_REVIEWS)
+
 def add_app_name_links(content, current_page_info):
     """Rule 1: Link app name mentions to their review pages"""
     if current_page_info['type'] == 'review':
-        current_app = current_page_info.get('app', '')
-
         # Don't link to the same app's review page
-        apps_to_link = {k: v for k, v in APP_REVIEWS.items() if k != current_app}
+        current_app = current_page_info.get('app', '')
     else:
-        apps_to_link = APP_REVIEWS
-
-    for app_name, review_url in apps_to_link.items():
-        # Create patterns for different contexts
-        patterns = [
-            rf'\b({re.escape(app_name)})\b(?!\s*review)(?!</a>)(?![^<]*</a>)',  # Basic mention
-            rf'\b({re.escape(app_name)})\'s\s+(\w+)',  # Possessive form
-            rf'(unlike\s+{re.escape(app_name)})\b',  # Comparison context
-            rf'(compared\s+to\s+{re.escape(app_name)})\b',  # Comparison context
-        ]
-
-        for i, pattern in enumerate(patterns):
-            # Only link first occurrence per page
-            match = re.search(pattern, content, re.IGNORECASE)
-            if match and f'href="{review_url}"' not in content:
-                if i == 0:  # Basic mention
-                    replacement = f'<a href="{review_url}">{match.group(1)}</a>'
-                elif i == 1:  # Possessive
-                    replacement = f'<a href="{review_url}">{match.group(1)}\'s</a> {match.group(2)}'
-                else:  # Comparison contexts
-                    replacement = f'<a href="{review_url}">{match.group(1)}</a>'
-
-                content = re.sub(pattern, replacement, content, count=1, flags=re.IGNORECASE)
-                break
+        current_app = None
 
-    return content
+    return APP_MENTION_MATCHER.link_mentions(content, skip_app=current_app)
 
 def add_category_page_links(content, current_page_info):
     """Rule 2: Add category page connections in first paragraph"""
@@ -267,6 +367,25 @@ def add_breadcrumb_navigation(content, current_page_info):
 
     return content
 
+def apply_internal_linking(content, file_path, applied=None):
+    """Apply the Phase 2 linking rules, in order, to page content
+
+    The name of every rule that changed the page is appended to applied.
+    """
+    applied = [] if applied is None else applied
+    current_page_info = get_current_page_info(file_path)
+
+    for rule, add_links in (('Breadcrumb navigation', add_breadcrumb_navigation),
+                            ('Category page links', add_category_page_links),
+                            ('App name links', add_app_name_links),
+                            ('Related content section', add_related_content_section)):
+        new_content = add_links(content, current_page_info)
+        if new_content != content:
+            applied.append(rule)
+        content = new_content
+
+    return content
+
 def process_file(file_path):
     """Process a single HTML file for internal linking"""
     try:
@@ -274,18 +393,12 @@ def process_file(file_path):
             content = f.read()
 
         original_content = content
-        current_page_info = get_current_page_info(file_path)
-
-        # Apply linking rules in order
-        content = add_breadcrumb_navigation(content, current_page_info)
-        content = add_category_page_links(content, current_page_info)
-        content = add_app_name_links(content, current_page_info)
-        content = add_related_content_section(content, current_page_info)
+        applied = []
+        content = apply_internal_linking(content, file_path, applied)
 
         # Only write if content changed
         if content != original_content:
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(content)
+            write_text(file_path, content, applied)
             return True
 
         return False
@@ -334,4 +447,5 @@ def main():
     return len(modified_files)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    with Transaction(dry_run=dry_run_mode()):
+        main()
\ No newline at end of file
@@ -8,9 +8,33 @@ import os
 import re
 import glob
 import json
+import argparse
 from pathlib import Path
 from urllib.parse import urljoin
 
+from sitecore import parse
+from patterns import REGISTRY, add_profile_argument, compile_pattern, finish_profiling, start_profiling
+from sitepipeline.css import line_span
+from sitepipeline.lcp import lcp_candidate, lcp_preload, page_images, preload_markup
+from sitepipeline.parallel import add_jobs_argument, run_parallel
+from sitepipeline.transaction import Transaction, add_dry_run_argument, dry_run_mode, write_text
+
+META_CHARSET_PATTERN = compile_pattern('seo.meta-charset', r'<meta\s+charset=', re.IGNORECASE)
+META_VIEWPORT_PATTERN = compile_pattern('seo.meta-viewport', r'<meta\s+name="viewport"', re.IGNORECASE)
+CANONICAL_LINK_PATTERN = compile_pattern('seo.canonical-link', r'<link\s+rel="canonical"[^>]*>', re.IGNORECASE)
+HREF_VALUE_PATTERN = compile_pattern('seo.href-value', r'href="([^"]+)"')
+OG_TITLE_PATTERN = compile_pattern('seo.og-title', r'property="og:title"', re.IGNORECASE)
+TWITTER_CARD_PATTERN = compile_pattern('seo.twitter-card', r'name="twitter:card"', re.IGNORECASE)
+IMG_TAG_END_PATTERN = compile_pattern('seo.img-tag-end', r'(<img[^>]*)(>)')
+LAZY_LOADING_PATTERN = compile_pattern('seo.lazy-loading', r'\sloading=["\']?lazy["\']?', re.IGNORECASE)
+HIGH_PRIORITY_PATTERN = compile_pattern('seo.high-priority', r'\sfetchpriority=["\']?high["\']?', re.IGNORECASE)
+CONTENT_TYPE_OPTIONS_PATTERN = compile_pattern('seo.content-type-options', r'X-Content-Type-Options', re.IGNORECASE)
+REFERRER_META_PATTERN = compile_pattern('seo.referrer-meta', r'name="referrer"', re.IGNORECASE)
+EXTERNAL_LINK_PATTERN = compile_pattern('seo.external-link', r'<a[^>]+href="https?://(?!shopifyappauthority)[^"]+[^>]*>', re.IGNORECASE)
+ANCHOR_TAG_END_PATTERN = compile_pattern('seo.anchor-tag-end', r'(<a[^>]*)(>)')
+REL_VALUE_PATTERN = compile_pattern('seo.rel-value', r'rel="([^"]*)"')
+JSON_LD_PATTERN = compile_pattern('seo.json-ld-block', r'<script[^>]*type="application/ld\+json"[^>]*>(.*?)</script>', re.DOTALL | re.IGNORECASE)
+
 class TechnicalSEOOptimizer:
     def __init__(self):
         self.base_url = "https://shopifyappauthority.com"
@@ -20,7 +44,10 @@ class TechnicalSEOOptimizer:
     def get_page_url(self, file_path):
         """Generate canonical URL from file path"""
         # Convert file path to URL path
-        url_path = file_path.replace('\\', '/').replace('/index.html', '/')
+        url_path = file_path.replace('\\', '/')
+        if url_path == 'index.html':
+            url_path = '/'
+        url_path = url_path.replace('/index.html', '/')
 
         if url_path.endswith('.html') and not url_path.endswith('index.html'):
             url_path = url_path.replace('.html', '/')
@@ -32,6 +59,7 @@ class TechnicalSEOOptimizer:
 
     def extract_page_info(self, content):
         """Extract key information from page content"""
+        doc = parse(content)
         info = {
             'title': '',
             'description': '',
@@ -40,29 +68,25 @@ class TechnicalSEOOptimizer:
         }
 
         # Extract title
-        title_match = re.search(r'<title[^>]*>(.*?)</title>', content, re.IGNORECASE | re.DOTALL)
-        if title_match:
-            info['title'] = re.sub(r'<[^>]+>', '', title_match.group(1)).strip()
+        if doc.title:
+            info['title'] = doc.text_of(doc.title)
 
         # Extract meta description
-        desc_match = re.search(r'<meta\s+name="description"\s+content="([^"]+)"', content, re.IGNORECASE)
-        if desc_match:
-            info['description'] = desc_match.group(1).strip()
+        description = doc.meta('description')
+        if description:
+            info['description'] = description.strip()
 
         # Extract H1
-        h1_match = re.search(r'<h1[^>]*>(.*?)</h1>', content, re.IGNORECASE | re.DOTALL)
-        if h1_match:
-            info['h1'] = re.sub(r'<[^>]+>', '', h1_match.group(1)).strip()
+        h1 = doc.first('h1')
+        if h1:
+            info['h1'] = doc.text_of(h1)
 
         # Extract images
-        img_matches = re.findall(r'<img[^>]+>', content, re.IGNORECASE)
-        for img in img_matches:
-            src_match = re.search(r'src="([^"]+)"', img, re.IGNORECASE)
-            alt_match = re.search(r'alt="([^"]*)"', img, re.IGNORECASE)
+        for img in doc.images:
             info['images'].append({
-                'tag': img,
-                'src': src_match.group(1) if src_match else '',
-                'alt': alt_match.group(1) if alt_match else None
+                'tag': doc.outer(img),
+                'src': img.get('src', ''),
+                'alt': img.get('alt')
             })
 
         return info
@@ -72,7 +96,7 @@ class TechnicalSEOOptimizer:
         changes = []
 
         # Check for charset
-        if not re.search(r'<meta\s+charset=', content, re.IGNORECASE):
+        if not META_CHARSET_PATTERN.search(content):
             charset_tag = '<meta charset="UTF-8">'
             head_pos = content.find('<head')
             if head_pos != -1:
@@ -81,7 +105,7 @@ class TechnicalSEOOptimizer:
                 changes.append("Added UTF-8 charset meta tag")
 
         # Check for viewport
-        if not re.search(r'<meta\s+name="viewport"', content, re.IGNORECASE):
+        if not META_VIEWPORT_PATTERN.search(content):
             viewport_tag = '<meta name="viewport" content="width=device-width, initial-scale=1.0">'
             head_pos = content.find('<head')
             if head_pos != -1:
@@ -108,7 +132,7 @@ class TechnicalSEOOptimizer:
         canonical_url = self.get_page_url(file_path)
 
         # Check for existing canonical
-        canonical_match = re.search(r'<link\s+rel="canonical"[^>]*>', content, re.IGNORECASE)
+        canonical_match = CANONICAL_LINK_PATTERN.search(content)
 
         if not canonical_match:
             # Add canonical tag
@@ -120,7 +144,7 @@ class TechnicalSEOOptimizer:
         else:
             # Fix relative canonical to absolute
             existing_canonical = canonical_match.group(0)
-            href_match = re.search(r'href="([^"]+)"', existing_canonical)
+            href_match = HREF_VALUE_PATTERN.search(existing_canonical)
             if href_match:
                 current_href = href_match.group(1)
                 if not current_href.startswith('http'):
@@ -136,7 +160,7 @@ class TechnicalSEOOptimizer:
         canonical_url = self.get_page_url(file_path)
 
         # Check if OG tags already exist
-        if not re.search(r'property="og:title"', content, re.IGNORECASE):
+        if not OG_TITLE_PATTERN.search(content):
             og_tags = f'''
     <meta property="og:title" content="{page_info['title'] or page_info['h1'] or 'Shopify App Reviews'}">
     <meta property="og:description" content="{page_info['description'] or page_info['title'][:155]}">
@@ -158,7 +182,7 @@ class TechnicalSEOOptimizer:
         changes = []
 
         # Check if Twitter cards already exist
-        if not re.search(r'name="twitter:card"', content, re.IGNORECASE):
+        if not TWITTER_CARD_PATTERN.search(content):
             twitter_tags = f'''
     <meta name="twitter:card" content="summary_large_image">
     <meta name="twitter:title" content="{page_info['title'] or page_info['h1'] or 'Shopify App Reviews'}">
@@ -176,42 +200,80 @@ class TechnicalSEOOptimizer:
         return content, changes
 
     def optimize_images(self, content, page_info):
-        """Add missing alt attributes and lazy loading"""
-        changes = []
+        """Add missing alt attributes, and load first-screen images eagerly and the rest lazily
 
-        for img in page_info['images']:
-            original_tag = img['tag']
+        The likely LCP image also gets fetchpriority="high" and a preload link in <head>.
+        """
+        changes = []
+        doc = parse(content)
+        entries = {entry['img']: entry for entry in page_images(doc)}
+        candidate = lcp_candidate(entries.values())
+        edit = doc.edit()
+
+        for img in doc.images:
+            entry = entries.get(img, {'first_screen': False})
+            original_tag = content[img.start:img.open_end]
             new_tag = original_tag
 
             # Add missing alt attribute
-            if img['alt'] is None:
+            if img.get('alt') is None:
                 # Generate alt from src filename
-                src = img['src']
+                src = img.get('src', '')
                 if src:
                     filename = os.path.basename(src).replace('-', ' ').replace('_', ' ')
                     filename = os.path.splitext(filename)[0]
-                    new_tag = re.sub(r'(<img[^>]*)(>)', rf'\1 alt="{filename}"\2', new_tag)
-
-            # Add lazy loading for images not in first viewport
-            if 'loading=' not in new_tag and 'logo' not in new_tag.lower() and 'icon' not in new_tag.lower():
-                new_tag = re.sub(r'(<img[^>]*)(>)', r'\1 loading="lazy"\2', new_tag)
+                    new_tag = IMG_TAG_END_PATTERN.sub(rf'\1 alt="{filename}"\2', new_tag)
+
+            if entry['first_screen']:
+                # A lazy image waits for layout before it is even requested, which delays the first paint
+                if LAZY_LOADING_PATTERN.search(new_tag):
+                    new_tag = LAZY_LOADING_PATTERN.sub(' loading="eager"', new_tag)
+                elif 'loading=' not in new_tag:
+                    new_tag = IMG_TAG_END_PATTERN.sub(r'\1 loading="eager"\2', new_tag)
+                if entry is candidate and 'fetchpriority=' not in new_tag:
+                    new_tag = IMG_TAG_END_PATTERN.sub(r'\1 fetchpriority="high"\2', new_tag)
+            else:
+                # Add lazy loading for images not in first viewport
+                if 'loading=' not in new_tag:
+                    new_tag = IMG_TAG_END_PATTERN.sub(r'\1 loading="lazy"\2', new_tag)
+                # Left over from when the image was the LCP candidate
+                new_tag = HIGH_PRIORITY_PATTERN.sub('', new_tag)
 
             # Add decoding async
             if 'decoding=' not in new_tag:
-                new_tag = re.sub(r'(<img[^>]*)(>)', r'\1 decoding="async"\2', new_tag)
+                new_tag = IMG_TAG_END_PATTERN.sub(r'\1 decoding="async"\2', new_tag)
 
             if new_tag != original_tag:
-                content = content.replace(original_tag, new_tag)
-                changes.append(f"Optimized image: {img['src'][:50]}...")
-
-        return content, changes
+                edit.replace(img.start, img.open_end, new_tag)
+                changes.append(f"Optimized image: {img.get('src', '')[:50]}...")
+
+        # One preload for the LCP image, so it is requested before the parser reaches it
+        preload = lcp_preload(doc)
+        markup = preload_markup(doc, candidate['img']) if candidate is not None else None
+        if preload is not None and markup is None:
+            edit.replace(*line_span(content, preload.start, preload.open_end), '')
+            changes.append("Removed LCP image preload")
+        elif preload is not None and content[preload.start:preload.open_end] != markup:
+            edit.replace(preload.start, preload.open_end, markup)
+            changes.append(f"Preloaded LCP image: {candidate['img'].get('src', '')[:50]}")
+        elif preload is None and markup is not None and doc.head is not None:
+            # Ahead of the stylesheets and scripts, which would otherwise take the early connection slots
+            blocking = [node for tag in ('link', 'style', 'script') for node in doc.find_within(doc.head, tag)
+                        if node.tag != 'link' or 'stylesheet' in (node.get('rel') or '').lower()]
+            position = min((node.start for node in blocking), default=doc.head.close_start)
+            line_start = line_span(content, position, position)[0]
+            indent = content[line_start:position] if blocking else '    '
+            edit.insert(line_start, f'{indent}{markup}\n')
+            changes.append(f"Preloaded LCP image: {candidate['img'].get('src', '')[:50]}")
+
+        return edit.render(), changes
 
     def add_security_headers(self, content):
         """Add security meta tags"""
         changes = []
 
         # Add X-Content-Type-Options
-        if not re.search(r'X-Content-Type-Options', content, re.IGNORECASE):
+        if not CONTENT_TYPE_OPTIONS_PATTERN.search(content):
             security_tag = '<meta http-equiv="X-Content-Type-Options" content="nosniff">'
             head_pos = content.find('<head')
             if head_pos != -1:
@@ -220,7 +282,7 @@ class TechnicalSEOOptimizer:
                 changes.append("Added X-Content-Type-Options header")
 
         # Add referrer policy if missing
-        if not re.search(r'name="referrer"', content, re.IGNORECASE):
+        if not REFERRER_META_PATTERN.search(content):
             referrer_tag = '<meta name="referrer" content="strict-origin-when-cross-origin">'
             head_pos = content.find('<head')
             if head_pos != -1:
@@ -235,16 +297,16 @@ class TechnicalSEOOptimizer:
         changes = []
 
         # Find all external links
-        external_links = re.findall(r'<a[^>]+href="https?://(?!shopifyappauthority)[^"]+[^>]*>', content, re.IGNORECASE)
+        external_links = EXTERNAL_LINK_PATTERN.findall(content)
 
         for link in external_links:
             new_link = link
 
             # Add rel="noopener" if target="_blank"
             if 'target="_blank"' in link and 'rel=' not in link:
-                new_link = re.sub(r'(<a[^>]*)(>)', r'\1 rel="noopener noreferrer"\2', new_link)
+                new_link = ANCHOR_TAG_END_PATTERN.sub(r'\1 rel="noopener noreferrer"\2', new_link)
             elif 'target="_blank"' in link and 'noopener' not in link:
-                new_link = re.sub(r'rel="([^"]*)"', r'rel="\1 noopener noreferrer"', new_link)
+                new_link = REL_VALUE_PATTERN.sub(r'rel="\1 noopener noreferrer"', new_link)
 
             if new_link != link:
                 content = content.replace(link, new_link)
@@ -257,8 +319,7 @@ class TechnicalSEOOptimizer:
         changes = []
 
         # Find all JSON-LD blocks
-        schema_blocks = re.findall(r'<script[^>]*type="application/ld\+json"[^>]*>(.*?)</script>',
-                                  content, re.DOTALL | re.IGNORECASE)
+        schema_blocks = JSON_LD_PATTERN.findall(content)
 
         for schema in schema_blocks:
             try:
@@ -278,55 +339,76 @@ class TechnicalSEOOptimizer:
 
         return content, changes
 
-    def process_file(self, file_path):
-        """Process a single HTML file with all SEO optimizations"""
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
+    def optimize_content(self, content, file_path):
+        """Apply all SEO optimizations to page content; returns (content, changes)"""
+        page_info = self.extract_page_info(content)
+        all_changes = []
 
-            original_content = content
-            page_info = self.extract_page_info(content)
-            all_changes = []
+        # Apply all optimizations
+        content, changes = self.add_missing_meta_tags(content, page_info)
+        all_changes.extend(changes)
+
+        content, changes = self.add_canonical_tag(content, file_path)
+        all_changes.extend(changes)
 
-            # Apply all optimizations
-            content, changes = self.add_missing_meta_tags(content, page_info)
-            all_changes.extend(changes)
+        content, changes = self.add_open_graph_tags(content, page_info, file_path)
+        all_changes.extend(changes)
 
-            content, changes = self.add_canonical_tag(content, file_path)
-            all_changes.extend(changes)
+        content, changes = self.add_twitter_cards(content, page_info)
+        all_changes.extend(changes)
 
-            content, changes = self.add_open_graph_tags(content, page_info, file_path)
-            all_changes.extend(changes)
+        content, changes = self.optimize_images(content, page_info)
+        all_changes.extend(changes)
 
-            content, changes = self.add_twitter_cards(content, page_info)
-            all_changes.extend(changes)
+        content, changes = self.add_security_headers(content)
+        all_changes.extend(changes)
 
-            content, changes = self.optimize_images(content, page_info)
-            all_changes.extend(changes)
+        content, changes = self.fix_external_links(content)
+        all_changes.extend(changes)
 
-            content, changes = self.add_security_headers(content)
-            all_changes.extend(changes)
+        content, changes = self.validate_schema_markup(content)
+        all_changes.extend(changes)
 
-            content, changes = self.fix_external_links(content)
-            all_changes.extend(changes)
+        return content, all_changes
 
-            content, changes = self.validate_schema_markup(content)
-            all_changes.extend(changes)
+    def describe_lcp(self, content):
+        """(src, reason) for the page's LCP candidate, or None when its first screen shows no content image"""
+        candidate = lcp_candidate(page_images(parse(content)))
+        if candidate is None:
+            return None
+        return candidate['img'].get('src', ''), 'hero' if candidate['hero'] else 'first screen'
+
+    def process_file(self, file_path):
+        """Process a single HTML file with all SEO optimizations; returns (modified, changes, LCP candidate)"""
+        try:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                content = f.read()
+
+            original_content = content
+            with REGISTRY.file_scope(file_path):
+                content, all_changes = self.optimize_content(content, file_path)
+            lcp = self.describe_lcp(content)
 
             # Only write if changes were made
             if content != original_content:
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    f.write(content)
-                return True, all_changes
+                write_text(file_path, content, all_changes)
+                return True, all_changes, lcp
 
-            return False, []
+            return False, [], lcp
 
         except Exception as e:
             print(f"Error processing {file_path}: {e}")
-            return False, []
+            return False, [], None
 
-def main():
+def main(argv=None):
     """Execute technical SEO implementation across all HTML files"""
+    parser = argparse.ArgumentParser(description="Apply technical SEO fixes to every page")
+    add_jobs_argument(parser)
+    add_profile_argument(parser)
+    add_dry_run_argument(parser)  # consumed by dry_run_mode() at the entry point; listed for --help
+    args = parser.parse_args(argv)
+    jobs = start_profiling(args)
+
     print("Implementing Technical SEO Guidelines (Safe, Non-Breaking)")
     print("=" * 60)
 
@@ -338,14 +420,22 @@ def main():
 
     modified_files = []
     all_changes = {}
+    lcp_candidates = {}
 
     print(f"Processing {len(html_files)} HTML files...")
 
-    for i, file_path in enumerate(html_files):
+    results = run_parallel(optimizer.process_file, html_files, jobs=jobs)
+    for i, (file_path, outcome, error) in enumerate(results):
         if i % 20 == 0:  # Progress indicator
             print(f"Progress: {i}/{len(html_files)} files processed")
 
-        modified, changes = optimizer.process_file(file_path)
+        if error:
+            print(f"Error processing {file_path}: {error}")
+            continue
+
+        modified, changes, lcp = outcome
+        if lcp:
+            lcp_candidates[file_path] = lcp
         if modified:
             modified_files.append(file_path)
             all_changes[file_path] = changes
@@ -374,10 +464,20 @@ def main():
     if len(modified_files) > 10:
         print(f"  ... and {len(modified_files) - 10} more files")
 
+    print(f"\nLCP candidates (preloaded, fetchpriority=\"high\"): {len(lcp_candidates)} pages")
+    for file_path, (src, reason) in sorted(lcp_candidates.items()):
+        print(f"  - {file_path}: {src} ({reason})")
+    without = len(html_files) - len(lcp_candidates)
+    if without:
+        print(f"  {without} pages show no content image on their first screen")
+
     print("\n✅ Technical SEO implementation complete!")
     print("All changes are safe, non-breaking improvements.")
 
+    finish_profiling(args)
+
     return len(modified_files)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    with Transaction(dry_run=dry_run_mode()):
+        main()
\ No newline at end of file
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Site-wide link graph shared by the validator and the linking scripts
+Pages are nodes keyed by route, anchors are edges carrying anchor text and source offsets
+"""
+
+import hashlib
+import json
+import os
+import posixpath
+import re
+from collections import namedtuple
+from urllib.parse import urlparse
+
+from sitecore import Document
+
+SITE_URL = 'https://shopifyappauthority.com'
+SITE_HOSTS = ('shopifyappauthority.com', 'www.shopifyappauthority.com')
+
+GRAPH_VERSION = 1
+
+NON_PAGE_SCHEMES = ('mailto:', 'tel:', 'javascript:', 'data:', 'sms:')
+
+HREF_PATTERN = re.compile(r'href="([^"]*)"')
+
+Link = namedtuple('Link', ['source', 'target', 'href', 'anchor_text', 'start', 'end'])
+
+def page_route(file_path):
+    """Route a page is served at: about/index.html -> /about/, guide.html -> /guide.html"""
+    path = '/' + file_path.replace(os.sep, '/')
+    if path.endswith('/index.html'):
+        return path[:-len('index.html')]
+    return path
+
+def normalize_url(href, source_route='/'):
+    """Resolve an href to a site route, or None for external and non-page links"""
+    href = href.strip()
+    if not href or href.startswith('#') or href.lower().startswith(NON_PAGE_SCHEMES):
+        return None
+
+    parsed = urlparse(href)
+    if parsed.scheme or parsed.netloc:
+        if parsed.scheme not in ('', 'http', 'https') or parsed.netloc.lower() not in SITE_HOSTS:
+            return None
+        path = parsed.path or '/'
+    else:
+        path = parsed.path
+        if not path:
+            return None
+        if not path.startswith('/'):
+            path = posixpath.join(posixpath.dirname(source_route), path)
+
+    trailing = path.endswith('/')
+    path = posixpath.normpath(path)
+    if path in ('.', '/'):
+        return '/'
+    path = '/' + path.lstrip('/')
+
+    if path.endswith('/index.html'):
+        return path[:-len('index.html')]
+    if trailing or '.' not in path.rsplit('/', 1)[-1]:
+        return path + '/'
+    return path
+
+def page_targets(content, source_route='/'):
+    """Routes already linked from content (every href="..." on the page, one scan)"""
+    targets = set()
+    for href in HREF_PATTERN.findall(content):
+        target = normalize_url(href, source_route)
+        if target:
+            targets.add(target)
+    return targets
+
+def scan_routes(root='.'):
+    """One directory walk: (set of every servable route, {page route: file path})"""
+    routes = set()
+    pages = {}
+    for dirpath, dirs, files in os.walk(root):
+        dirs[:] = sorted(d for d in dirs if not d.startswith('.') and d not in ('node_modules', '__pycache__'))
+        for file in sorted(files):
+            rel_path = os.path.relpath(os.path.join(dirpath, file), root).replace(os.sep, '/')
+            route = page_route(rel_path)
+            routes.add(route)
+            if file.endswith('.html') and 'TEMPLATE' not in file.upper():
+                pages[route] = rel_path
+    return routes, pages
+
+_SITE_ROUTES = {}
+
+def site_routes(root='.'):
+    """Existing routes under root, scanned once per process"""
+    key = os.path.abspath(root)
+    if key not in _SITE_ROUTES:
+        _SITE_ROUTES[key] = frozenset(scan_routes(root)[0])
+    return _SITE_ROUTES[key]
+
+def route_exists(url, source_route='/', root='.'):
+    """O(1) check that an internal link points at a page or file on disk"""
+    target = normalize_url(url, source_route)
+    return target is None or target in site_routes(root)
+
+def extract_links(doc, source_route):
+    """Internal anchor edges of a parsed page, in document order"""
+    links = []
+    for anchor in doc.anchors:
+        href = anchor.get('href')
+        if not href:
+            continue
+        target = normalize_url(href, source_route)
+        if target is None:
+            continue
+        links.append(Link(source_route, target, href, doc.text_of(anchor), anchor.start, anchor.end))
+    return links
+
+class LinkGraph:
+    """Pages, the routes that exist on disk, and the anchors between them
+
+    Built from a single directory scan plus one parse per page. The edge list
+    is persisted to <root>/.sitecache/linkgraph.json keyed by page content
+    hash, so a rebuild only re-parses pages that changed since the last one.
+    """
+
+    def __init__(self, root='.', cache_dir='.sitecache'):
+        self.root = root
+        self.path = os.path.join(root, cache_dir, 'linkgraph.json')
+        self.routes = set()
+        self.pages = {}
+        self.outbound = {}
+        self.hashes = {}
+        self._inbound = None
+
+    @classmethod
+    def build(cls, root='.', use_cache=True):
+        graph = cls(root)
+        cached = graph._load() if use_cache else {}
+        graph.routes, graph.pages = scan_routes(root)
+
+        for route, file_path in graph.pages.items():
+            with open(os.path.join(root, file_path), 'r', encoding='utf-8') as f:
+                content = f.read()
+            digest = hashlib.sha256(content.encode('utf-8')).hexdigest()
+            entry = cached.get(route)
+            if entry and entry['hash'] == digest:
+                links = [Link(*link) for link in entry['links']]
+            else:
+                links = extract_links(Document(content, file_path), route)
+            graph.hashes[route] = digest
+            graph.outbound[route] = links
+
+        if use_cache:
+            graph.save()
+        return graph
+
+    @classmethod
+    def from_links(cls, outbound, root='.'):
+        """Graph from edges already extracted while parsing each page ({route: [Link]}), without reading pages again"""
+        graph = cls(root)
+        graph.routes, graph.pages = scan_routes(root)
+        graph.outbound = {route: list(outbound.get(route, [])) for route in graph.pages}
+        return graph
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return data.get('pages', {}) if data.get('version') == GRAPH_VERSION else {}
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        pages = {route: {'hash': self.hashes[route], 'links': [list(link) for link in links]}
+                 for route, links in self.outbound.items()}
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': GRAPH_VERSION, 'pages': pages}, f, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    # Queries
+
+    def exists(self, url, source_route='/'):
+        target = normalize_url(url, source_route)
+        return target is None or target in self.routes
+
+    def links_from(self, route):
+        return self.outbound.get(route, [])
+
+    def links_to(self, route):
+        if self._inbound is None:
+            self._inbound = {}
+            for links in self.outbound.values():
+                for link in links:
+                    self._inbound.setdefault(link.target, []).append(link)
+        return self._inbound.get(route, [])
+
+    def orphans(self):
+        """Pages (other than the home page) that no other page links to"""
+        return sorted(route for route in self.pages
+                      if route != '/' and not any(link.source != route for link in self.links_to(route)))
+
+    def broken(self):
+        """Edges whose target route does not exist on disk"""
+        return [link for links in self.outbound.values() for link in links if link.target not in self.routes]
@@ -1,135 +1,367 @@
 import os
 import re
 import glob
+import time
+import bisect
+import signal
+import argparse
+import threading
+from functools import partial
 
-def completely_remove_cookie_code(filepath):
-    """Completely remove ALL cookie consent code from HTML files."""
+from sitecore import Document
+from patterns import REGISTRY, add_profile_argument, compile_pattern, finish_profiling, start_profiling
+from sitepipeline.parallel import add_jobs_argument, run_parallel
+from sitepipeline.transaction import Transaction, add_dry_run_argument, dry_run_mode, write_text
+
+# Pages without any of these words are left alone without parsing
+COOKIE_KEYWORDS = ('cookie', 'consent', 'acceptbtn', 'rejectbtn', 'declinebtn')
+
+# Seconds a single page may spend in remove_cookie_code before it is abandoned
+DEFAULT_TIME_BUDGET = 2.0
+
+# 1. Cookie-related HTML elements (matched on tag attributes, removed by element span)
+COOKIE_DIV_IDS = ('cookieconsent', 'cookiebanner')
+COOKIE_CLASS_PATTERN = compile_pattern('nuke.html.cookie-class', r'cookie|consent', re.IGNORECASE)
+COOKIE_ASSET_PATTERN = compile_pattern('nuke.html.cookie-asset', r'cookie-?consent', re.IGNORECASE)
+
+# 2. Cookie-related CSS, applied to <style> bodies only
+CSS_PATTERNS = [
+    # Cookie consent CSS blocks
+    compile_pattern('nuke.css.consent-comment-block', r'/\*[^*]*[Cc]ookie[^*]*[Cc]onsent[^*]*\*/.*?(?=\n\s*/\*|\n\s*[.#@]|\n\s*$)', re.DOTALL | re.IGNORECASE),
+    compile_pattern('nuke.css.cookie-class-rule', r'\.cookie-[^{]*\{[^}]*\}', re.DOTALL | re.IGNORECASE),
+    compile_pattern('nuke.css.consent-class-rule', r'\.consent-[^{]*\{[^}]*\}', re.DOTALL | re.IGNORECASE),
+    compile_pattern('nuke.css.cookie-consent-id-rule', r'#cookieConsent[^{]*\{[^}]*\}', re.DOTALL | re.IGNORECASE),
+    compile_pattern('nuke.css.cookie-banner-id-rule', r'#cookieBanner[^{]*\{[^}]*\}', re.DOTALL | re.IGNORECASE),
+]
+
+# 3. Cookie-related JavaScript functions: each pattern matches up to the opening brace,
+#    the block itself is found by brace matching so nested bodies are removed whole
+JS_FUNCTION_PATTERNS = [
+    compile_pattern('nuke.js.accept-reject-function', r'function\s+(?:accept|reject|decline)(?:All)?Cookies?\s*\([^)]*\)\s*\{', re.IGNORECASE),
+    compile_pattern('nuke.js.hide-show-function', r'function\s+(?:hide|show)Cookie(?:Popup|Banner)\s*\([^)]*\)\s*\{', re.IGNORECASE),
+    compile_pattern('nuke.js.check-consent-function', r'function\s+checkCookieConsent\s*\([^)]*\)\s*\{', re.IGNORECASE),
+]
+
+# 4. Cookie-related event listeners and IIFEs
+JS_SCRIPT_PATTERNS = [
+    compile_pattern('nuke.js.document-listener', r'document\.addEventListener\(["\'](?:DOMContentLoaded|click)["\'],\s*(?:checkCookieConsent|acceptCookies|rejectCookies)[^)]*\)[^;\n]*;?', re.IGNORECASE),
+    compile_pattern('nuke.js.button-listener', r'(?:acceptBtn|rejectBtn|declineBtn)\.addEventListener\([^)]+\)[^;\n]*;?', re.IGNORECASE),
+]
+
+# Blocks that are only removed when their body mentions cookies: (opener, what must follow the closing brace)
+JS_BLOCK_PATTERNS = [
+    (compile_pattern('nuke.js.window-listener', r'window\.addEventListener\(["\'](?:DOMContentLoaded|load)["\'],\s*function\s*\([^)]*\)\s*\{', re.IGNORECASE),
+     compile_pattern('nuke.js.listener-tail', r'\s*\)\s*;?')),
+    (compile_pattern('nuke.js.consent-iife', r'\(function\s*\(\)\s*\{(?=\s*["\']use strict["\'];)', re.IGNORECASE),
+     compile_pattern('nuke.js.iife-tail', r'\s*\)\s*\(\s*\)\s*;?|\s*\(\s*\)\s*\)\s*;?')),
+]
+
+# 5. Cookie-related JavaScript comments (a `//` right after ':' or a quote is a URL, not a comment)
+JS_COMMENT_PATTERNS = [
+    compile_pattern('nuke.js.line-comment', r'(?<![:\w"\'\\])//[^\n]*(?:cookie|consent)[^\n]*', re.IGNORECASE),
+    compile_pattern('nuke.js.block-comment', r'/\*[^*]*(?:cookie|consent)[^*]*\*/', re.IGNORECASE),
+]
+
+# 6. onclick handlers in HTML
+ONCLICK_PATTERN = compile_pattern('nuke.html.onclick-handler', r'\s*onclick=["\'](?:accept|reject|decline)(?:All)?Cookies\(\)["\']', re.IGNORECASE)
+
+class CookieRemovalTimeout(Exception):
+    """A page used up its time budget"""
+
+class TimeBudget:
+    """Per-file wall-clock budget
+
+    check() is called between regions; on Unix the main thread of each
+    process also arms SIGALRM, so even a single runaway regex is
+    interrupted rather than stalling the batch.
+    """
+
+    def __init__(self, seconds, file_path=None):
+        self.seconds = seconds
+        self.file_path = file_path
+        self.deadline = None
+        self._alarm = False
+        self._previous_handler = None
+
+    def _expired(self, signum=None, frame=None):
+        raise CookieRemovalTimeout(f"{self.file_path or 'page'} exceeded the {self.seconds:g}s time budget")
+
+    def __enter__(self):
+        if self.seconds:
+            self.deadline = time.perf_counter() + self.seconds
+            self._alarm = hasattr(signal, 'setitimer') and threading.current_thread() is threading.main_thread()
+            if self._alarm:
+                self._previous_handler = signal.signal(signal.SIGALRM, self._expired)
+                signal.setitimer(signal.ITIMER_REAL, self.seconds)
+        return self
+
+    def __exit__(self, *exc_info):
+        if self._alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, self._previous_handler)
+        return False
+
+    def check(self):
+        if self.deadline is not None and time.perf_counter() > self.deadline:
+            self._expired()
+
+def line_span(text, start, end, floor=0):
+    """Widen start:end to whole lines when nothing else is on them, so removals leave no blank lines"""
+    line_start = text.rfind('\n', 0, start) + 1
+    line_end = text.find('\n', end)
+    line_end = len(text) if line_end == -1 else line_end + 1
+    if line_start >= floor and not text[line_start:start].strip() and not text[end:line_end].strip():
+        return line_start, line_end
+    return start, end
+
+def cut_spans(text, spans):
+    """text with the given (sorted) spans removed; overlapping spans are skipped"""
+    pieces = []
+    last = 0
+    for start, end in spans:
+        if start < last:
+            continue
+        start, end = line_span(text, start, end, last)
+        pieces.append(text[last:start])
+        last = end
+    pieces.append(text[last:])
+    return ''.join(pieces)
+
+def apply_patterns(text, patterns):
+    """Remove every match of each pattern from one region; returns (text, matches removed)"""
+    total = 0
+    for pattern in patterns:
+        spans = [match.span() for match in pattern.finditer(text)]
+        if spans:
+            text = cut_spans(text, spans)
+            total += len(spans)
+    return text, total
+
+def brace_pairs(text):
+    """{index of '{': index just past its matching '}'} for text, in one forward pass
+
+    String literals and comments are skipped; braces that never close are
+    simply absent.
+    """
+    pairs = {}
+    stack = []
+    index = 0
+    length = len(text)
+    while index < length:
+        char = text[index]
+        if char in '"\'`':
+            index += 1
+            while index < length and text[index] != char:
+                index += 2 if text[index] == '\\' else 1
+        elif text.startswith('//', index):
+            index = text.find('\n', index)
+            if index == -1:
+                break
+        elif text.startswith('/*', index):
+            index = text.find('*/', index + 2)
+            if index == -1:
+                break
+            index += 1
+        elif char == '{':
+            stack.append(index)
+        elif char == '}' and stack:
+            pairs[stack.pop()] = index + 1
+        index += 1
+    return pairs
+
+def remove_blocks(text, opener, tail=None, keyword_required=False):
+    """Remove JS blocks whose opener match ends in '{'; returns (text, blocks removed)
+
+    Unbalanced blocks, and blocks without the expected tail, are left alone
+    rather than guessed at.
+    """
+    spans = []
+    pairs = None
+    position = 0
+    while True:
+        match = opener.search(text, position)
+        if not match:
+            break
+        if pairs is None:
+            pairs = brace_pairs(text)
+        end = pairs.get(match.end() - 1)
+        if end is None:
+            position = match.end()
+            continue
+        if tail is not None:
+            closing = tail.match(text, end)
+            if not closing:
+                position = match.end()
+                continue
+            end = closing.end()
+        block = text[match.start():end].lower()
+        if not keyword_required or 'cookie' in block or 'consent' in block:
+            spans.append((match.start(), end))
+        position = end
+    if spans:
+        text = cut_spans(text, spans)
+    return text, len(spans)
+
+def is_cookie_div(node):
+    return (node.get('id', '').lower() in COOKIE_DIV_IDS
+            or bool(COOKIE_CLASS_PATTERN.search(node.get('class', ''))))
+
+def is_cookie_asset(node):
+    if node.tag == 'script':
+        return bool(COOKIE_ASSET_PATTERN.search(node.get('src', '')))
+    return node.tag == 'link' and bool(COOKIE_ASSET_PATTERN.search(node.get('href', '')))
+
+def remove_cookie_code(content, budget=None):
+    """Strip cookie consent HTML, CSS, JS and comments from page content; returns (content, changes)
+
+    The page is tokenized once. Elements and comments are removed by their
+    exact span, and the CSS/JS patterns only ever see the body of a single
+    <style> or <script>, so no pattern can run across the whole page.
+    """
+    lowered = content.lower()
+    if not any(keyword in lowered for keyword in COOKIE_KEYWORDS):
+        return content, []
+
+    budget = budget or TimeBudget(None)
+    doc = Document(content)
+    edit = doc.edit()
+    removed = []  # sorted, non-overlapping spans already deleted
+    counts = {}
+
+    def count(kind, amount=1):
+        counts[kind] = counts.get(kind, 0) + amount
+
+    def covered(start):
+        index = bisect.bisect_right(removed, (start, float('inf'))) - 1
+        return index >= 0 and start < removed[index][1]
+
+    def remove_span(start, end):
+        bisect.insort(removed, (start, end))
+        edit.replace(*line_span(content, start, end), '')
+
+    # 1. Cookie consent containers, the assets that drive them, and their comments
+    for node in doc.find_all('div'):
+        if node.end > node.open_end and not covered(node.start) and is_cookie_div(node):
+            remove_span(node.start, node.end)
+            count('html')
+    budget.check()
+
+    for node in doc.find_all('script') + doc.find_all('link'):
+        if not covered(node.start) and is_cookie_asset(node):
+            remove_span(node.start, node.end)
+            count('html')
+
+    for start, end in doc.comments:
+        comment = lowered[start:end]
+        if 'cookie' in comment and 'consent' in comment and not covered(start):
+            remove_span(start, end)
+            count('comments')
+    budget.check()
+
+    # 2. Cookie CSS inside <style> bodies
+    for node in doc.styles:
+        if covered(node.start) or not any(keyword in lowered[node.open_end:node.close_start] for keyword in COOKIE_KEYWORDS):
+            continue
+        body, removed_rules = apply_patterns(doc.inner(node), CSS_PATTERNS)
+        if removed_rules:
+            edit.replace(node.open_end, node.close_start, body)
+            count('css', removed_rules)
+        budget.check()
+
+    # 3-5. Cookie JavaScript inside inline <script> bodies
+    for node in doc.scripts:
+        if covered(node.start) or node.get('src') is not None:
+            continue
+        if not any(keyword in lowered[node.open_end:node.close_start] for keyword in COOKIE_KEYWORDS):
+            continue
+
+        body = doc.inner(node)
+        functions = handlers = 0
+        for opener in JS_FUNCTION_PATTERNS:
+            body, found = remove_blocks(body, opener)
+            functions += found
+        for opener, tail in JS_BLOCK_PATTERNS:
+            body, found = remove_blocks(body, opener, tail, keyword_required=True)
+            handlers += found
+        body, found = apply_patterns(body, JS_SCRIPT_PATTERNS)
+        handlers += found
+        body, comments = apply_patterns(body, JS_COMMENT_PATTERNS)
+        count('functions', functions)
+        count('handlers', handlers)
+        count('comments', comments)
+
+        if functions or handlers or comments:
+            if body.strip():
+                edit.replace(node.open_end, node.close_start, body)
+            else:
+                # Nothing left but whitespace: drop the whole <script> element
+                remove_span(node.start, node.end)
+        budget.check()
+
+    # 6. onclick handlers on any remaining tag
+    for node in doc.elements:
+        if 'onclick' in node.attr_text.lower() and not covered(node.start):
+            open_tag = content[node.start:node.open_end]
+            new_tag, found = ONCLICK_PATTERN.subn('', open_tag)
+            if found:
+                edit.replace(node.start, node.open_end, new_tag)
+                count('onclick', found)
+    budget.check()
+
+    if not edit.changed:
+        return content, []
+
+    messages = {
+        'html': "Removed {} cookie HTML elements",
+        'css': "Removed {} cookie CSS rules",
+        'functions': "Removed {} cookie JavaScript functions",
+        'handlers': "Removed {} cookie JavaScript handlers",
+        'comments': "Cleaned up {} cookie comments",
+        'onclick': "Removed {} onclick cookie handlers",
+    }
+    changes_made = [message.format(counts[kind]) for kind, message in messages.items() if counts.get(kind)]
+    return edit.render(), changes_made
+
+def completely_remove_cookie_code(filepath, budget=DEFAULT_TIME_BUDGET):
+    """Completely remove ALL cookie consent code from HTML files.
+
+    Returns (fixed, changes). A page that runs past its time budget is left
+    untouched on disk, and its CookieRemovalTimeout is returned instead.
+    """
 
     # Read the file
     with open(filepath, 'r', encoding='utf-8') as f:
         content = f.read()
 
     original_content = content
-    changes_made = []
 
     print(f"\n[PROCESSING] {filepath}")
 
-    # 1. Remove all cookie-related HTML elements
-    html_patterns = [
-        # Cookie consent popups with various IDs
-        r'<div\s+id=["\']cookieConsent["\'][^>]*>.*?</div>\s*(?=\n|\r|\s*<)',
-        r'<div\s+id=["\']cookieBanner["\'][^>]*>.*?</div>\s*(?=\n|\r|\s*<)',
-        # Any div with cookie/consent classes
-        r'<div[^>]*class=["\'][^"\']*(?:cookie|consent)[^"\']*["\'][^>]*>.*?</div>\s*(?=\n|\r|\s*<)',
-        # Comments about cookie consent
-        r'<!--.*?[Cc]ookie.*?[Cc]onsent.*?-->',
-        r'<!--.*?[Cc]onsent.*?[Cc]ookie.*?-->',
-    ]
-
-    for pattern in html_patterns:
-        matches = re.findall(pattern, content, re.DOTALL | re.IGNORECASE)
-        if matches:
-            content = re.sub(pattern, '', content, flags=re.DOTALL | re.IGNORECASE)
-            changes_made.append(f"Removed {len(matches)} cookie HTML elements")
-
-    # 2. Remove all cookie-related CSS
-    css_patterns = [
-        # Cookie consent CSS blocks
-        r'/\*[^*]*[Cc]ookie[^*]*[Cc]onsent[^*]*\*/.*?(?=\n\s*/\*|\n\s*[.#@]|\n\s*</style>|\n\s*$)',
-        r'\.cookie-[^{]*\{[^}]*\}',
-        r'\.consent-[^{]*\{[^}]*\}',
-        r'#cookieConsent[^{]*\{[^}]*\}',
-        r'#cookieBanner[^{]*\{[^}]*\}',
-        # Cookie hidden class
-        r'\.cookie-hidden\s*\{[^}]*\}',
-    ]
-
-    for pattern in css_patterns:
-        matches = re.findall(pattern, content, re.DOTALL | re.IGNORECASE)
-        if matches:
-            content = re.sub(pattern, '', content, flags=re.DOTALL | re.IGNORECASE)
-            changes_made.append(f"Removed {len(matches)} cookie CSS rules")
-
-    # 3. Remove all cookie-related JavaScript functions
-    js_function_patterns = [
-        # Individual function removals
-        r'function\s+(?:accept|reject|decline)(?:All)?Cookies?\s*\([^)]*\)\s*\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}',
-        r'function\s+(?:hide|show)Cookie(?:Popup|Banner)\s*\([^)]*\)\s*\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}',
-        r'function\s+checkCookieConsent\s*\([^)]*\)\s*\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}',
-        r'function\s+showCookieBanner\s*\([^)]*\)\s*\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}',
-        # Wrapper functions
-        r'function\s+(?:acceptCookies|rejectCookies|declineCookies)\s*\([^)]*\)\s*\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}',
-    ]
-
-    for pattern in js_function_patterns:
-        matches = re.findall(pattern, content, re.DOTALL | re.IGNORECASE)
-        if matches:
-            content = re.sub(pattern, '', content, flags=re.DOTALL | re.IGNORECASE)
-            changes_made.append(f"Removed {len(matches)} cookie JavaScript functions")
-
-    # 4. Remove cookie-related event listeners and scripts
-    js_script_patterns = [
-        # Event listeners for cookie functions
-        r'document\.addEventListener\(["\'](?:DOMContentLoaded|click)["\'],\s*(?:checkCookieConsent|acceptCookies|rejectCookies)[^)]*\)[^;]*;?',
-        r'window\.addEventListener\(["\'](?:DOMContentLoaded|load)["\'],\s*(?:checkCookieConsent|function[^}]*cookie[^}]*)[^)]*\)[^;]*;?',
-        # Button event listeners
-        r'(?:acceptBtn|rejectBtn|declineBtn)\.addEventListener\([^)]+\)[^;]*;?',
-        # Cookie-related IIFEs and script blocks
-        r'\(function\(\)\s*\{\s*["\']use strict["\'];[^}]*(?:cookie|consent)[^}]*\}\)\(\);?',
-        # Simple click handlers
-        r'// (?:Simple|Removed)[^\n]*(?:cookie|consent)[^\n]*\n',
-    ]
-
-    for pattern in js_script_patterns:
-        matches = re.findall(pattern, content, re.DOTALL | re.IGNORECASE)
-        if matches:
-            content = re.sub(pattern, '', content, flags=re.DOTALL | re.IGNORECASE)
-            changes_made.append(f"Removed {len(matches)} cookie JavaScript handlers")
-
-    # 5. Remove cookie-related comments and cleanup
-    comment_patterns = [
-        r'//[^\n]*(?:[Cc]ookie|[Cc]onsent)[^\n]*\n?',
-        r'/\*[^*]*(?:[Cc]ookie|[Cc]onsent)[^*]*\*/',
-        # Empty script tags
-        r'<script[^>]*>\s*</script>',
-        # Multiple empty lines
-        r'\\n\\s*\\n\\s*\\n',
-    ]
-
-    for pattern in comment_patterns:
-        matches = re.findall(pattern, content, re.IGNORECASE)
-        if matches:
-            content = re.sub(pattern, lambda m: '\\n' if '\\n' in pattern else '', content, flags=re.IGNORECASE)
-            changes_made.append(f"Cleaned up {len(matches)} cookie comments/whitespace")
-
-    # 6. Clean up onclick handlers in HTML
-    onclick_patterns = [
-        r'onclick=["\'](?:accept|reject|decline)(?:All)?Cookies\(\)["\']',
-    ]
-
-    for pattern in onclick_patterns:
-        matches = re.findall(pattern, content, re.IGNORECASE)
-        if matches:
-            content = re.sub(pattern, '', content, flags=re.IGNORECASE)
-            changes_made.append(f"Removed {len(matches)} onclick cookie handlers")
-
-    # 7. Final cleanup - remove empty lines and fix spacing
-    content = re.sub(r'\\n\\s*\\n\\s*\\n+', '\\n\\n', content)  # Multiple empty lines
-    content = re.sub(r'\\s*\\n\\s*\\n\\s*</script>', '\\n</script>', content)  # Empty script tags
-    content = re.sub(r'<script>\\s*</script>', '', content)  # Completely empty scripts
+    try:
+        with REGISTRY.file_scope(filepath), TimeBudget(budget, filepath) as guard:
+            content, changes_made = remove_cookie_code(content, guard)
+    except CookieRemovalTimeout as timeout:
+        return timeout
 
     # Only write if content changed
     if content != original_content:
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(content)
+        write_text(filepath, content, changes_made)
         for change in changes_made:
             print(f"   - {change}")
         return True, changes_made
 
     return False, []
 
-def main():
+def main(argv=None):
     """Remove ALL cookie consent code from all HTML files."""
+    parser = argparse.ArgumentParser(description="Remove all cookie consent code from every page")
+    add_jobs_argument(parser)
+    add_profile_argument(parser)
+    add_dry_run_argument(parser)  # consumed by dry_run_mode() at the entry point; listed for --help
+    parser.add_argument('--budget', type=float, default=DEFAULT_TIME_BUDGET, metavar='SECONDS',
+                        help=f'give up on a page after this many seconds (default: {DEFAULT_TIME_BUDGET:g}, 0 disables)')
+    args = parser.parse_args(argv)
+    jobs = start_profiling(args)
 
     # Find all HTML files
     html_files = []
@@ -144,17 +376,24 @@ def main():
 
     fixed_count = 0
     error_count = 0
+    timeout_count = 0
     total_changes = []
 
-    for filepath in html_files:
-        try:
-            fixed, changes = completely_remove_cookie_code(filepath)
-            if fixed:
-                fixed_count += 1
-                total_changes.extend(changes)
-        except Exception as e:
-            print(f"   [ERROR] {filepath}: {e}")
+    process_file = partial(completely_remove_cookie_code, budget=args.budget)
+    for filepath, outcome, error in run_parallel(process_file, html_files, jobs=jobs):
+        if error:
+            print(f"   [ERROR] {filepath}: {error}")
             error_count += 1
+            continue
+        if isinstance(outcome, CookieRemovalTimeout):
+            print(f"   [TIMEOUT] {filepath}: {outcome} - left unchanged")
+            timeout_count += 1
+            continue
+
+        fixed, changes = outcome
+        if fixed:
+            fixed_count += 1
+            total_changes.extend(changes)
 
     print("\\n" + "="*80)
     print("CLEANUP SUMMARY")
@@ -162,7 +401,8 @@ def main():
     print(f"Files processed: {len(html_files)}")
     print(f"Files cleaned: {fixed_count}")
     print(f"Files with errors: {error_count}")
-    print(f"Files unchanged: {len(html_files) - fixed_count - error_count}")
+    print(f"Files over time budget: {timeout_count}")
+    print(f"Files unchanged: {len(html_files) - fixed_count - error_count - timeout_count}")
 
     # Summary of changes
     change_summary = {}
@@ -183,5 +423,8 @@ def main():
     print("   3. Test thoroughly")
     print("   4. Deploy")
 
+    finish_profiling(args)
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    with Transaction(dry_run=dry_run_mode()):
+        main()
\ No newline at end of file
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Central registry of compiled regex patterns for the maintenance scripts
+Every pattern is compiled once at import, named, and optionally timed per call and per file
+"""
+
+import re
+import time
+from contextlib import contextmanager
+
+class PatternStats:
+    """Call count, cumulative and worst-case time for one pattern"""
+
+    __slots__ = ('calls', 'total', 'worst', 'worst_file', 'per_file')
+
+    def __init__(self):
+        self.calls = 0
+        self.total = 0.0
+        self.worst = 0.0
+        self.worst_file = None
+        self.per_file = {}
+
+    def record(self, elapsed, file_path):
+        self.calls += 1
+        self.total += elapsed
+        if elapsed > self.worst:
+            self.worst = elapsed
+            self.worst_file = file_path
+        if file_path is not None:
+            self.per_file[file_path] = self.per_file.get(file_path, 0.0) + elapsed
+
+    def worst_file_total(self):
+        """(file, seconds) of the file this pattern spent the most time on"""
+        if not self.per_file:
+            return None, 0.0
+        return max(self.per_file.items(), key=lambda item: item[1])
+
+class TimedPattern:
+    """A compiled pattern that reports its matching time to the registry when profiling
+
+    Mirrors the re.Pattern methods the scripts use. With profiling off each
+    call is a straight pass-through to the compiled pattern.
+    """
+
+    __slots__ = ('name', 'regex', 'registry')
+
+    def __init__(self, name, regex, registry):
+        self.name = name
+        self.regex = regex
+        self.registry = registry
+
+    @property
+    def pattern(self):
+        return self.regex.pattern
+
+    @property
+    def flags(self):
+        return self.regex.flags
+
+    def _timed(self, method, *args):
+        if not self.registry.enabled:
+            return method(*args)
+        start = time.perf_counter()
+        try:
+            return method(*args)
+        finally:
+            self.registry.record(self.name, time.perf_counter() - start)
+
+    def search(self, string, pos=0):
+        return self._timed(self.regex.search, string, pos)
+
+    def match(self, string, pos=0):
+        return self._timed(self.regex.match, string, pos)
+
+    def findall(self, string):
+        return self._timed(self.regex.findall, string)
+
+    def finditer(self, string):
+        if not self.registry.enabled:
+            return self.regex.finditer(string)
+        # Materialize so the time spent scanning is charged to this call
+        return iter(self._timed(lambda s: list(self.regex.finditer(s)), string))
+
+    def sub(self, repl, string, count=0):
+        return self._timed(self.regex.sub, repl, string, count)
+
+    def subn(self, repl, string, count=0):
+        return self._timed(self.regex.subn, repl, string, count)
+
+    def split(self, string, maxsplit=0):
+        return self._timed(self.regex.split, string, maxsplit)
+
+    def __repr__(self):
+        return f'<TimedPattern {self.name}>'
+
+class PatternRegistry:
+    """Named, precompiled patterns plus the profile collected while they run"""
+
+    def __init__(self):
+        self.patterns = {}
+        self.stats = {}
+        self.enabled = False
+        self.current_file = None
+
+    def compile(self, name, pattern, flags=0):
+        if name in self.patterns:
+            existing = self.patterns[name]
+            if existing.pattern != pattern or existing.flags != re.compile(pattern, flags).flags:
+                raise ValueError(f"Pattern name {name!r} is already registered with a different pattern")
+            return existing
+        timed = TimedPattern(name, re.compile(pattern, flags), self)
+        self.patterns[name] = timed
+        return timed
+
+    def record(self, name, elapsed):
+        stats = self.stats.get(name)
+        if stats is None:
+            stats = self.stats[name] = PatternStats()
+        stats.record(elapsed, self.current_file)
+
+    @contextmanager
+    def file_scope(self, file_path):
+        """Charge pattern time inside the block to file_path"""
+        previous = self.current_file
+        self.current_file = file_path
+        try:
+            yield
+        finally:
+            self.current_file = previous
+
+    def reset(self):
+        self.stats = {}
+
+    def top(self, limit=15):
+        return sorted(self.stats.items(), key=lambda item: item[1].total, reverse=True)[:limit]
+
+    def print_profile(self, limit=15):
+        """Top offenders by cumulative time, with their slowest call and slowest file"""
+        rows = self.top(limit)
+        total = sum(stats.total for stats in self.stats.values())
+
+        print("\n" + "=" * 100)
+        print(f"REGEX PATTERN PROFILE (top {len(rows)} of {len(self.stats)} patterns, {total * 1000:.1f} ms total)")
+        print("=" * 100)
+        print(f"{'pattern':<36} {'calls':>7} {'total ms':>10} {'mean ms':>9} {'worst ms':>9}  worst file (ms in file)")
+        print("-" * 100)
+        for name, stats in rows:
+            worst_file, worst_file_time = stats.worst_file_total()
+            where = f"{worst_file} ({worst_file_time * 1000:.1f})" if worst_file else '-'
+            print(f"{name[:36]:<36} {stats.calls:>7} {stats.total * 1000:>10.2f} "
+                  f"{stats.total * 1000 / max(stats.calls, 1):>9.3f} {stats.worst * 1000:>9.2f}  {where}")
+
+REGISTRY = PatternRegistry()
+
+def compile_pattern(name, pattern, flags=0):
+    """Compile and register a named pattern in the shared registry"""
+    return REGISTRY.compile(name, pattern, flags)
+
+def add_profile_argument(parser):
+    parser.add_argument('--profile-patterns', nargs='?', const=15, type=int, metavar='N',
+                        help='time every registered regex and print the N slowest (default 15); runs serially')
+
+def start_profiling(args):
+    """Turn profiling on when --profile-patterns was given; returns the jobs count to use"""
+    if getattr(args, 'profile_patterns', None):
+        REGISTRY.enabled = True
+        return 1
+    return getattr(args, 'jobs', 1)
+
+def finish_profiling(args):
+    if getattr(args, 'profile_patterns', None):
+        REGISTRY.print_profile(args.profile_patterns)
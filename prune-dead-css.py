@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Dead CSS pruning: drop inline style rules nothing on the page can match, and rules later ones fully override
+Covers what remove_old_navigation.py, clean-cookie-removal.py and nuke-all-cookie-code.py used to strip from
+<style> blocks by pattern (orphaned .cookie-* rules, stale header/nav blocks, repeated .dropdown-content
+definitions) by checking each selector against the page's own markup and scripts instead. Run it after the
+scripts that add markup or scripts to pages, since it only keeps what the page uses now.
+"""
+
+import argparse
+import os
+
+from sitecore import find_html_files
+from sitepipeline.parallel import add_jobs_argument, run_parallel
+from sitepipeline.prune import prune_css
+from sitepipeline.transaction import Transaction, add_dry_run_argument, dry_run_mode, write_text
+
+def prune_page(task):
+    """Prune one page; returns its stats"""
+    root, file_path = task
+    full_path = os.path.join(root, file_path)
+    with open(full_path, 'r', encoding='utf-8') as f:
+        content = f.read()
+    new_content, stats = prune_css(content, file_path, root)
+    if new_content != content:
+        write_text(full_path, new_content, [f"Pruned {stats['dead']} dead and {stats['overridden']} overridden rules"])
+    return stats
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Remove CSS rules that can never apply from every page's inline styles")
+    parser.add_argument('--root', default='.', help='site root (default: current directory)')
+    add_jobs_argument(parser)
+    add_dry_run_argument(parser)  # consumed by dry_run_mode() at the entry point; listed for --help
+    args = parser.parse_args(argv)
+
+    print("Pruning dead CSS")
+    print("=" * 80)
+    print(f"{'page':<56} {'dead':>6} {'overridden':>10} {'bytes':>8}")
+
+    html_files = find_html_files(args.root)
+    totals = {'dead': 0, 'overridden': 0, 'selectors': 0, 'critical_blocks': 0, 'bytes': 0}
+    pages_changed = 0
+    critical_pages = []
+    for (_, file_path), stats, error in run_parallel(prune_page, [(args.root, path) for path in html_files],
+                                                       jobs=args.jobs):
+        if error:
+            print(f"Error processing {file_path}: {error}")
+            continue
+        for name in totals:
+            totals[name] += stats[name]
+        if stats['critical_blocks']:
+            critical_pages.append(file_path)
+        if stats['bytes']:
+            pages_changed += 1
+            print(f"{file_path:<56} {stats['dead']:>6} {stats['overridden']:>10} {stats['bytes']:>8,}")
+
+    print(f"\nPages scanned: {len(html_files)}, pruned: {pages_changed}")
+    print(f"Rules removed: {totals['dead']} dead, {totals['overridden']} overridden; "
+          f"{totals['selectors']} dead selectors dropped from rules that still apply")
+    print(f"Bytes removed: {totals['bytes']:,}")
+    if critical_pages:
+        print(f"Skipped critical CSS on {len(critical_pages)} page(s); "
+              f"run build-critical-css.py --inline first to prune it, then split again")
+
+if __name__ == "__main__":
+    with Transaction(dry_run=dry_run_mode()):
+        main()
@@ -8,6 +8,8 @@ import os
 import re
 import glob
 
+from sitepipeline.transaction import Transaction, dry_run_mode, write_text
+
 def remove_cookie_consent_from_file(file_path):
     """Remove all cookie consent related code from a single HTML file"""
     try:
@@ -79,8 +81,7 @@ def remove_cookie_consent_from_file(file_path):
 
         # Only write if content changed
         if content != original_content:
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(content)
+            write_text(file_path, content)
             return True
         return False
 
@@ -114,4 +115,5 @@ def main():
     return len(modified_files)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    with Transaction(dry_run=dry_run_mode()):
+        main()
\ No newline at end of file
@@ -5,34 +5,38 @@ Remove old navigation CSS and elements that are conflicting with the global navi
 
 import re
 import os
+import argparse
 from pathlib import Path
 
+from patterns import REGISTRY, add_profile_argument, compile_pattern, finish_profiling, start_profiling
+from sitepipeline.transaction import Transaction, add_dry_run_argument, dry_run_mode, write_text
+
+# Old navigation blocks, removed by their leading selector
+OLD_NAVIGATION_PATTERNS = [
+    compile_pattern('oldnav.css.header', r'header\s*\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}', re.DOTALL),  # header styles
+    compile_pattern('oldnav.css.nav', r'nav\s*\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}', re.DOTALL),     # nav styles
+    compile_pattern('oldnav.css.logo', r'\.logo\s*\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}', re.DOTALL),  # logo styles (non site-header)
+    compile_pattern('oldnav.css.nav-links', r'\.nav-links\s*\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}', re.DOTALL), # nav-links styles
+    compile_pattern('oldnav.css.nav-links-a', r'\.nav-links\s+a\s*\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}', re.DOTALL), # nav links a styles
+    compile_pattern('oldnav.css.nav-links-hover', r'\.nav-links\s+a:hover\s*\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}', re.DOTALL), # nav links hover
+    compile_pattern('oldnav.css.dropdown', r'\.dropdown\s*\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}', re.DOTALL), # dropdown styles
+    compile_pattern('oldnav.css.dropdown-arrow', r'\.dropdown\s*>\s*a::after\s*\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}', re.DOTALL), # dropdown arrows
+    compile_pattern('oldnav.css.dropdown-content', r'\.dropdown-content\s*\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}', re.DOTALL), # dropdown content
+    compile_pattern('oldnav.css.dropdown-hover', r'\.dropdown:hover\s*\.dropdown-content\s*\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}', re.DOTALL), # dropdown hover
+    compile_pattern('oldnav.css.dropdown-links', r'\.dropdown-content\s+a\s*\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}', re.DOTALL), # dropdown links
+    compile_pattern('oldnav.css.dropdown-link-hover', r'\.dropdown-content\s+a:hover\s*\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}', re.DOTALL), # dropdown link hover
+    compile_pattern('oldnav.css.mobile-toggle', r'\.mobile-menu-toggle\s*\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}', re.DOTALL), # mobile toggle
+]
+
+# Mobile responsive CSS for old navigation
+MOBILE_CSS_PATTERN = compile_pattern('oldnav.css.mobile-media-query', r'@media\s*\([^)]*max-width:\s*768px[^)]*\)[^{]*\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}', re.DOTALL)
+
 def remove_old_navigation_css(content):
     """Remove old navigation CSS using generic selectors"""
 
-    # Remove header CSS block (generic header styles)
-    header_css_pattern = r'header\s*\{[^}]*\}(?:\s*nav\s*\{[^}]*\})?(?:\s*\.logo\s*\{[^}]*\})?(?:\s*\.nav-links[^{]*\{[^}]*\})*(?:\s*\.nav-links\s*a[^{]*\{[^}]*\})*(?:\s*\.nav-links\s*a:hover[^{]*\{[^}]*\})*(?:\s*\.dropdown[^{]*\{[^}]*\})*(?:\s*\.dropdown[^{]*::after[^{]*\{[^}]*\})*(?:\s*\.dropdown-content[^{]*\{[^}]*\})*(?:\s*\.dropdown:hover\s*\.dropdown-content[^{]*\{[^}]*\})*(?:\s*\.dropdown-content\s*a[^{]*\{[^}]*\})*(?:\s*\.dropdown-content\s*a:hover[^{]*\{[^}]*\})*(?:\s*\.mobile-menu-toggle[^{]*\{[^}]*\})*(?:\s*@media[^{]*\{[^{}]*\{[^}]*\}[^{}]*\})*'
-
-    # More targeted approach - remove blocks that start with specific selectors
-    patterns_to_remove = [
-        r'header\s*\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}',  # header styles
-        r'nav\s*\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}',     # nav styles
-        r'\.logo\s*\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}',  # logo styles (non site-header)
-        r'\.nav-links\s*\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}', # nav-links styles
-        r'\.nav-links\s+a\s*\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}', # nav links a styles
-        r'\.nav-links\s+a:hover\s*\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}', # nav links hover
-        r'\.dropdown\s*\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}', # dropdown styles
-        r'\.dropdown\s*>\s*a::after\s*\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}', # dropdown arrows
-        r'\.dropdown-content\s*\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}', # dropdown content
-        r'\.dropdown:hover\s*\.dropdown-content\s*\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}', # dropdown hover
-        r'\.dropdown-content\s+a\s*\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}', # dropdown links
-        r'\.dropdown-content\s+a:hover\s*\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}', # dropdown link hover
-        r'\.mobile-menu-toggle\s*\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}', # mobile toggle
-    ]
-
     changes_made = 0
-    for pattern in patterns_to_remove:
-        matches = list(re.finditer(pattern, content, re.DOTALL))
+    for pattern in OLD_NAVIGATION_PATTERNS:
+        matches = list(pattern.finditer(content))
         if matches:
             print(f"    Removing {len(matches)} old navigation CSS blocks")
             changes_made += len(matches)
@@ -40,8 +44,7 @@ def remove_old_navigation_css(content):
                 content = content[:match.start()] + content[match.end():]
 
     # Remove mobile responsive CSS for old navigation
-    mobile_css_pattern = r'@media\s*\([^)]*max-width:\s*768px[^)]*\)[^{]*\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}'
-    mobile_matches = list(re.finditer(mobile_css_pattern, content, re.DOTALL))
+    mobile_matches = list(MOBILE_CSS_PATTERN.finditer(content))
     if mobile_matches:
         # Only remove mobile CSS that contains old navigation selectors
         for match in reversed(mobile_matches):
@@ -62,11 +65,11 @@ def fix_file(file_path):
         with open(file_path, 'r', encoding='utf-8') as f:
             original_content = f.read()
 
-        content = remove_old_navigation_css(original_content)
+        with REGISTRY.file_scope(str(file_path)):
+            content = remove_old_navigation_css(original_content)
 
         if content != original_content:
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(content)
+            write_text(file_path, content)
             print(f"  [CLEANED] {file_path}")
             return True
         else:
@@ -79,6 +82,12 @@ def fix_file(file_path):
 
 def main():
     """Main function to remove old navigation from all HTML files"""
+    parser = argparse.ArgumentParser(description="Remove old navigation CSS from every page")
+    add_profile_argument(parser)
+    add_dry_run_argument(parser)  # consumed by dry_run_mode() at the entry point; listed for --help
+    args = parser.parse_args()
+    start_profiling(args)
+
     base_dir = Path(".")
 
     print("Removing old navigation CSS that conflicts with global navigation...")
@@ -119,5 +128,8 @@ def main():
     print(f"\nRemoved old navigation CSS from {fixed_count} files")
     print("Global navigation should now be the only navigation system!")
 
+    finish_profiling(args)
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    with Transaction(dry_run=dry_run_mode()):
+        main()
\ No newline at end of file
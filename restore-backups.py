@@ -2,15 +2,39 @@
 
 """
 Restore Backup Files Script
-Restores all .backup files to their original filenames
+Restores the files changed by one run from its snapshot (--run), or all legacy .backup files to their original filenames
 """
 
 import os
 import shutil
+import argparse
 from pathlib import Path
 
-def main():
-    """Main execution function"""
+from sitepipeline.transaction import list_runs, restore_run
+
+def restore_snapshot(run_id, force=False):
+    """Undo one run from .sitecache/snapshots; only the files it changed are read"""
+    print(f"Restoring run {run_id} from its snapshot...")
+    print("=" * 50)
+
+    try:
+        restored, skipped = restore_run(run_id, force=force)
+    except FileNotFoundError as e:
+        print(f"Error: {e}")
+        return
+
+    for file_path in restored:
+        print(f"Restored: {file_path}")
+    for file_path in skipped:
+        print(f"Skipped (changed since the run, use --force): {file_path}")
+
+    print()
+    print("=" * 50)
+    print(f"Restoration complete!")
+    print(f"Restored: {len(restored)} files")
+
+def restore_backup_files():
+    """Move every legacy .backup file back over its original"""
     print("Restoring files from backups...")
     print("=" * 50)
 
@@ -41,5 +65,25 @@ def main():
     print(f"Restoration complete!")
     print(f"Restored: {restored_count} files")
 
+    if not backup_files:
+        runs = list_runs()
+        if runs:
+            print()
+            print("Recent runs with snapshots (restore one with --run <id>):")
+            for run in runs[-5:]:
+                print(f"  {run['run']}  {len(run['files'])} files  {run['label']}")
+
+def main():
+    """Main execution function"""
+    parser = argparse.ArgumentParser(description="Restore files changed by the maintenance scripts")
+    parser.add_argument('--run', help="snapshot run id to undo, or 'latest' (default: legacy .backup files)")
+    parser.add_argument('--force', action='store_true', help='with --run, also restore files edited since that run')
+    args = parser.parse_args()
+
+    if args.run:
+        restore_snapshot(args.run, args.force)
+    else:
+        restore_backup_files()
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,59 +1,65 @@
 // Search functionality for Shopify App Authority
-const searchIndex = [
-    // Email Marketing Reviews
-    { title: "Moosend Review", url: "/moosend-review/", type: "review", category: "Email Marketing", keywords: ["email", "marketing", "automation", "moosend", "email campaigns"] },
-    { title: "Klaviyo Review", url: "/klaviyo-review/", type: "review", category: "Email Marketing", keywords: ["klaviyo", "email", "marketing", "ecommerce", "automation"] },
-    { title: "ActiveCampaign Review", url: "/activecampaign-review/", type: "review", category: "Email Marketing", keywords: ["activecampaign", "email", "marketing", "crm", "automation"] },
-    { title: "AWeber Review", url: "/aweber-review/", type: "review", category: "Email Marketing", keywords: ["aweber", "email", "marketing", "autoresponder"] },
-    { title: "GetResponse Review", url: "/getresponse-review/", type: "review", category: "Email Marketing", keywords: ["getresponse", "email", "marketing", "landing pages", "webinars"] },
-    { title: "Constant Contact Review", url: "/constant-contact-review/", type: "review", category: "Email Marketing", keywords: ["constant contact", "email", "marketing", "small business"] },
-    { title: "MailerLite Review", url: "/mailerlite-review/", type: "review", category: "Email Marketing", keywords: ["mailerlite", "email", "marketing", "free", "automation"] },
-    { title: "Mailchimp Review", url: "/mailchimp-review/", type: "review", category: "Email Marketing", keywords: ["mailchimp", "email", "marketing", "newsletter", "automation"] },
-    { title: "Omnisend Review", url: "/omnisend-review/", type: "review", category: "Email Marketing", keywords: ["omnisend", "email", "sms", "marketing", "ecommerce"] },
-
-    // SMS Marketing Reviews
-    { title: "Postscript Review", url: "/postscript-review/", type: "review", category: "SMS Marketing", keywords: ["postscript", "sms", "text", "marketing", "abandoned cart"] },
-
-    // CRM & Sales Reviews
-    { title: "HubSpot Review", url: "/hubspot-review/", type: "review", category: "CRM", keywords: ["hubspot", "crm", "sales", "marketing hub", "inbound"] },
-    { title: "ClickFunnels Review", url: "/clickfunnels-review/", type: "review", category: "Sales Funnels", keywords: ["clickfunnels", "sales funnels", "landing pages", "conversions"] },
-
-    // Popup & Conversion Reviews
-    { title: "Justuno Review", url: "/justuno-review/", type: "review", category: "Popups", keywords: ["justuno", "popups", "conversion", "exit intent", "email capture"] },
-
-    // Listicles & Guides
-    { title: "Best Email Marketing Apps for Shopify", url: "/best-shopify-apps-email-marketing/", type: "listicle", category: "Email Marketing", keywords: ["best", "email", "marketing", "apps", "shopify", "comparison"] },
-    { title: "Best Shopify Apps 2025", url: "/best-shopify-apps-2025/", type: "listicle", category: "All Categories", keywords: ["best", "shopify", "apps", "2025", "ultimate guide"] },
-    { title: "Best CRM & Sales Apps", url: "/best-shopify-apps-crm-sales/", type: "listicle", category: "CRM", keywords: ["best", "crm", "sales", "apps", "shopify"] },
-    { title: "Best Shopify Upsell Apps", url: "/best-shopify-upsell-apps/", type: "listicle", category: "Sales", keywords: ["upsell", "cross-sell", "aov", "average order value"] },
-    { title: "Free Shopify Apps", url: "/free-shopify-apps/", type: "listicle", category: "Free Apps", keywords: ["free", "shopify", "apps", "budget", "no cost"] },
-
-    // Alternative Pages
-    { title: "Klaviyo Alternatives", url: "/klaviyo-alternatives/", type: "alternatives", category: "Email Marketing", keywords: ["klaviyo", "alternatives", "competitors", "email", "marketing"] },
-    { title: "Zendesk Alternatives", url: "/zendesk-alternatives/", type: "alternatives", category: "Customer Support", keywords: ["zendesk", "alternatives", "customer support", "helpdesk"] },
-
-    // Category Pages
-    { title: "Shopify Email Marketing", url: "/shopify-email-marketing/", type: "category", category: "Email Marketing", keywords: ["email", "marketing", "shopify", "category", "overview"] },
-    { title: "Klaviyo for Shopify", url: "/klaviyo-shopify/", type: "guide", category: "Email Marketing", keywords: ["klaviyo", "shopify", "integration", "setup", "guide"] },
-
-    // Store Size Guide
-    { title: "Apps by Store Size", url: "/store-size/", type: "guide", category: "All Categories", keywords: ["store size", "small", "medium", "enterprise", "recommendations"] },
-
-    // Blog Posts
-    { title: "Moosend AI Email Marketing", url: "/blog/moosend-ai-email-marketing/", type: "blog", category: "Email Marketing", keywords: ["moosend", "ai", "artificial intelligence", "email", "blog"] },
-    { title: "Kit (ConvertKit) for Shopify", url: "/blog/kit-convertkit-shopify-email-marketing/", type: "blog", category: "Email Marketing", keywords: ["kit", "convertkit", "creators", "email", "blog"] },
-    { title: "GetResponse vs Klaviyo", url: "/blog/getresponse-vs-klaviyo-budget-alternative/", type: "blog", category: "Email Marketing", keywords: ["getresponse", "klaviyo", "comparison", "budget", "blog"] },
-    { title: "Constant Contact 30 Year Veteran", url: "/blog/constant-contact-30-year-veteran/", type: "blog", category: "Email Marketing", keywords: ["constant contact", "veteran", "experience", "blog"] },
-    { title: "AWeber Veteran Email Marketing", url: "/blog/aweber-veteran-email-marketing/", type: "blog", category: "Email Marketing", keywords: ["aweber", "veteran", "experience", "blog"] },
-    { title: "ActiveCampaign Shopify Email", url: "/blog/activecampaign-shopify-email-marketing/", type: "blog", category: "Email Marketing", keywords: ["activecampaign", "shopify", "integration", "blog"] },
-    { title: "MailerLite Free Forever", url: "/blog/mailerlite-free-forever-shopify/", type: "blog", category: "Email Marketing", keywords: ["mailerlite", "free", "forever", "blog"] },
-
-    // Main Guides
-    { title: "Building Shopify Empire Guide", url: "/building-shopify-empire-guide.html", type: "guide", category: "Strategy", keywords: ["building", "empire", "shopify", "strategy", "growth"] },
-
-    // Payroll & HR
-    { title: "Gusto Payroll Review - First Employee", url: "/blog/gusto-payroll-first-employee/", type: "blog", category: "Payroll & HR", keywords: ["gusto", "payroll", "first employee", "hr", "hiring", "payroll software", "small business"] }
-];
+// Prebuilt inverted index, generated by build-search-index.py and fetched the first time search opens
+const SEARCH_INDEX_URL = '/search-index.json';
+
+class SearchIndex {
+    constructor(data) {
+        this.pages = data.pages.map(([title, url, type, category]) => ({ title, url, type, category }));
+        this.terms = data.terms;
+        this.postings = data.postings;
+        this.prefixLength = data.prefixLength;
+        this.prefixes = data.prefixes;
+    }
+
+    static load() {
+        if (!SearchIndex.pending) {
+            SearchIndex.pending = fetch(SEARCH_INDEX_URL)
+                .then(response => {
+                    if (!response.ok) throw new Error(`${SEARCH_INDEX_URL}: ${response.status}`);
+                    return response.json();
+                })
+                .then(data => new SearchIndex(data))
+                .catch(error => {
+                    SearchIndex.pending = null;  // let the next search retry
+                    throw error;
+                });
+        }
+        return SearchIndex.pending;
+    }
+
+    // [start, end) of the sorted terms that begin with prefix
+    termRange(prefix) {
+        const range = this.prefixes[prefix.slice(0, this.prefixLength)];
+        if (!range) return [0, 0];
+        let [lo, end] = range;
+        let hi = end;
+        while (lo < hi) {
+            const mid = (lo + hi) >> 1;
+            if (this.terms[mid] < prefix) lo = mid + 1;
+            else hi = mid;
+        }
+        let stop = lo;
+        while (stop < end && this.terms[stop].startsWith(prefix)) stop++;
+        return [lo, stop];
+    }
+
+    // Page id -> score; whole-term matches count in full, completions of a typed prefix at half weight
+    score(queryTerms) {
+        const scores = new Map();
+        queryTerms.forEach(queryTerm => {
+            const [start, end] = this.termRange(queryTerm);
+            for (let i = start; i < end; i++) {
+                const weight = this.terms[i] === queryTerm ? 1 : 0.5;
+                const posting = this.postings[i];
+                for (let j = 0; j < posting.length; j += 2) {
+                    scores.set(posting[j], (scores.get(posting[j]) || 0) + posting[j + 1] * weight);
+                }
+            }
+        });
+        return scores;
+    }
+}
+
 
 class SiteSearch {
     constructor() {
@@ -61,6 +67,7 @@ class SiteSearch {
         this.searchResults = null;
         this.searchOverlay = null;
         this.isOpen = false;
+        this.index = null;
         this.init();
     }
 
@@ -166,6 +173,9 @@ class SiteSearch {
         this.searchInput.focus();
         document.body.style.overflow = 'hidden';
 
+        // Start downloading the index while the user types
+        SearchIndex.load().then(index => { this.index = index; }).catch(() => {});
+
         // Show popular/recent searches initially
         this.showInitialContent();
     }
@@ -205,31 +215,30 @@ class SiteSearch {
             return;
         }
 
+        if (!this.index) {
+            SearchIndex.load()
+                .then(index => {
+                    this.index = index;
+                    if (this.searchInput.value === query) this.performSearch(query);
+                })
+                .catch(() => {
+                    this.searchResults.innerHTML = '<div class="no-results"><p>Search is unavailable right now.</p></div>';
+                });
+            return;
+        }
+
         const activeFilter = document.querySelector('.filter-btn.active')?.dataset.filter || 'all';
-        const searchTerms = query.toLowerCase().split(' ');
+        const queryLower = query.toLowerCase().trim();
+        const searchTerms = queryLower.split(/[^a-z0-9]+/).filter(term => term.length > 0);
 
-        // Search and score results
-        let results = searchIndex.map(item => {
-            let score = 0;
+        // Index lookup, then title bonuses on the matching pages only
+        let results = [];
+        this.index.score(searchTerms).forEach((score, pageId) => {
+            const item = this.index.pages[pageId];
             const titleLower = item.title.toLowerCase();
-            const keywordsStr = item.keywords.join(' ');
-
-            searchTerms.forEach(term => {
-                // Title exact match (highest priority)
-                if (titleLower === term) score += 100;
-                // Title contains term
-                else if (titleLower.includes(term)) score += 50;
-                // Title starts with term
-                if (titleLower.startsWith(term)) score += 25;
-                // Keywords contain term
-                if (keywordsStr.includes(term)) score += 10;
-                // Category matches
-                if (item.category.toLowerCase().includes(term)) score += 15;
-                // Type matches
-                if (item.type.toLowerCase().includes(term)) score += 5;
-            });
-
-            return { ...item, score };
+            if (titleLower === queryLower) score += 100;
+            else if (titleLower.startsWith(queryLower)) score += 25;
+            results.push({ ...item, score });
         });
 
         // Filter by type if not "all"
@@ -237,11 +246,10 @@ class SiteSearch {
             results = results.filter(item => item.type === activeFilter);
         }
 
-        // Filter out zero scores and sort
+        // Sort and keep the top 10
         results = results
-            .filter(item => item.score > 0)
             .sort((a, b) => b.score - a.score)
-            .slice(0, 10); // Limit to top 10 results
+            .slice(0, 10);
 
         // Display results
         this.displayResults(results, query);
@@ -274,7 +282,8 @@ class SiteSearch {
             guide: '📖',
             blog: '📝',
             alternatives: '🔄',
-            category: '📁'
+            category: '📁',
+            faq: '❓'
         };
 
         const typeLabel = {
@@ -283,7 +292,8 @@ class SiteSearch {
             guide: 'Guide',
             blog: 'Blog',
             alternatives: 'Alternatives',
-            category: 'Category'
+            category: 'Category',
+            faq: 'FAQ'
         };
 
         return `
@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""
+Shared HTML document model for the site-maintenance scripts
+Tokenizes a page once into an offset-preserving node index and applies edits as patches
+"""
+
+import bisect
+import importlib.util
+import os
+import re
+import sys
+from functools import lru_cache
+
+# One scanner for every tag; script/style bodies are skipped as raw text.
+# An unclosed comment runs to the end of the document (as in browsers), which
+# also keeps the scan linear when a page has many stray '<!--'.
+TOKEN_PATTERN = re.compile(r'''
+    (?P<comment><!--(?:.*?-->|.*))
+  | <(?P<close>/)?(?P<tag>[a-zA-Z][a-zA-Z0-9-]*)(?P<attrs>(?:[^>"']|"[^"]*"|'[^']*')*)>
+''', re.DOTALL | re.VERBOSE)
+
+ATTR_PATTERN = re.compile(r'''([^\s"'=<>/]+)(?:\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+)))?''')
+
+RAW_TEXT_TAGS = ('script', 'style')
+
+VOID_TAGS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input',
+             'link', 'meta', 'source', 'track', 'wbr'}
+
+HEADING_TAGS = ('h1', 'h2', 'h3', 'h4', 'h5', 'h6')
+
+RAW_CLOSE_PATTERNS = {tag: re.compile(rf'</{tag}', re.IGNORECASE) for tag in RAW_TEXT_TAGS}
+
+TAG_STRIP_PATTERN = re.compile(r'<[^>]+>')
+
+class Node:
+    """A tag in the source text, addressed by offsets"""
+
+    __slots__ = ('tag', 'start', 'open_end', 'close_start', 'end', 'attr_text', '_attrs')
+
+    def __init__(self, tag, start, open_end, attr_text):
+        self.tag = tag
+        self.start = start            # offset of '<'
+        self.open_end = open_end      # offset just past the opening tag
+        self.close_start = open_end   # offset of '</tag>' (== open_end until closed)
+        self.end = open_end           # offset just past '</tag>'
+        self.attr_text = attr_text
+        self._attrs = None
+
+    @property
+    def attrs(self):
+        """Attribute dict with lowercased names, parsed on first use"""
+        if self._attrs is None:
+            attrs = {}
+            for name, dq, sq, bare in ATTR_PATTERN.findall(self.attr_text):
+                name = name.lower()
+                if name not in attrs:
+                    attrs[name] = dq or sq or bare
+            self._attrs = attrs
+        return self._attrs
+
+    def get(self, name, default=None):
+        return self.attrs.get(name, default)
+
+    def __repr__(self):
+        return f'<Node {self.tag} {self.start}:{self.end}>'
+
+class Document:
+    """Single-parse view of an HTML page
+
+    Every element is indexed by tag with its source offsets, so callers query
+    head/body, scripts, anchors, headings, paragraphs, images and JSON-LD
+    blocks without re-scanning the text. The index is read-only; changes go
+    through edit(), which records offset patches against the original text.
+    """
+
+    def __init__(self, text, path=None):
+        self.text = text
+        self.path = path
+        self.elements = []
+        self.by_tag = {}
+        self.comments = []
+        self.raw_spans = []
+        self._tag_starts = {}
+        self._tokenize()
+
+    def _tokenize(self):
+        text = self.text
+        open_stacks = {}
+        pos = 0
+
+        while True:
+            match = TOKEN_PATTERN.search(text, pos)
+            if not match:
+                break
+            pos = match.end()
+
+            if match.group('comment'):
+                self.comments.append((match.start(), match.end()))
+                continue
+
+            tag = match.group('tag').lower()
+
+            if match.group('close'):
+                stack = open_stacks.get(tag)
+                if stack:
+                    node = stack.pop()
+                    node.close_start = match.start()
+                    node.end = match.end()
+                continue
+
+            node = Node(tag, match.start(), match.end(), match.group('attrs'))
+            self.elements.append(node)
+            self.by_tag.setdefault(tag, []).append(node)
+
+            if tag in RAW_TEXT_TAGS:
+                # Raw text runs to the matching close tag; nothing inside is markup
+                close_match = RAW_CLOSE_PATTERNS[tag].search(text, pos)
+                if not close_match:
+                    close_start = len(text)
+                    close_end = len(text)
+                else:
+                    close_start = close_match.start()
+                    close_end = text.find('>', close_start)
+                    close_end = len(text) if close_end == -1 else close_end + 1
+                node.close_start = close_start
+                node.end = close_end
+                self.raw_spans.append((node.open_end, close_start))
+                pos = close_end
+            elif tag not in VOID_TAGS and not match.group('attrs').rstrip().endswith('/'):
+                open_stacks.setdefault(tag, []).append(node)
+
+        self._raw_starts = [start for start, _ in self.raw_spans]
+
+    # Queries
+
+    def find_all(self, tag):
+        return self.by_tag.get(tag, [])
+
+    def first(self, tag):
+        nodes = self.by_tag.get(tag)
+        return nodes[0] if nodes else None
+
+    @property
+    def head(self):
+        return self.first('head')
+
+    @property
+    def body(self):
+        return self.first('body')
+
+    @property
+    def title(self):
+        return self.first('title')
+
+    @property
+    def scripts(self):
+        return self.find_all('script')
+
+    @property
+    def styles(self):
+        return self.find_all('style')
+
+    @property
+    def anchors(self):
+        return self.find_all('a')
+
+    @property
+    def images(self):
+        return self.find_all('img')
+
+    @property
+    def paragraphs(self):
+        return self.find_all('p')
+
+    @property
+    def metas(self):
+        return self.find_all('meta')
+
+    @property
+    def headings(self):
+        """All h1-h6 elements in document order"""
+        nodes = [node for tag in HEADING_TAGS for node in self.by_tag.get(tag, [])]
+        return sorted(nodes, key=lambda node: node.start)
+
+    @property
+    def json_ld(self):
+        return [node for node in self.scripts
+                if node.get('type', '').lower() == 'application/ld+json']
+
+    def meta(self, name):
+        """Content of <meta name=...> (or property=...), or None"""
+        name = name.lower()
+        for node in self.metas:
+            if node.get('name', '').lower() == name or node.get('property', '').lower() == name:
+                return node.get('content')
+        return None
+
+    def outer(self, node):
+        return self.text[node.start:node.end]
+
+    def inner(self, node):
+        return self.text[node.open_end:node.close_start]
+
+    def text_of(self, node):
+        """Inner text of an element with tags stripped"""
+        return TAG_STRIP_PATTERN.sub('', self.inner(node)).strip()
+
+    def in_raw_text(self, offset):
+        """True when offset falls inside a <script> or <style> body"""
+        index = bisect.bisect_right(self._raw_starts, offset) - 1
+        return index >= 0 and offset < self.raw_spans[index][1]
+
+    def find_within(self, container, tag):
+        """Elements of tag that start inside container's content"""
+        starts = self._tag_starts.get(tag)
+        if starts is None:
+            starts = self._tag_starts[tag] = [node.start for node in self.by_tag.get(tag, [])]
+        lo = bisect.bisect_left(starts, container.open_end)
+        hi = bisect.bisect_left(starts, container.close_start)
+        return self.by_tag.get(tag, [])[lo:hi]
+
+    def spans(self, tags):
+        """Merged (start, end) outer spans of every element with one of tags"""
+        spans = sorted((node.start, node.end) for tag in tags for node in self.by_tag.get(tag, []))
+        merged = []
+        for start, end in spans:
+            if merged and start <= merged[-1][1]:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+            else:
+                merged.append((start, end))
+        return merged
+
+    def text_outside(self, spans):
+        """Source text with the given sorted, merged spans cut out"""
+        parts = []
+        last = 0
+        for start, end in spans:
+            parts.append(self.text[last:start])
+            last = end
+        parts.append(self.text[last:])
+        return ''.join(parts)
+
+    def edit(self):
+        """Start a set of offset patches against this document's text"""
+        return DocumentEdit(self)
+
+class DocumentEdit:
+    """Offset patches against a Document, applied in a single render()"""
+
+    def __init__(self, document):
+        self.document = document
+        self.patches = []
+
+    def replace(self, start, end, new_text):
+        """Queue a patch replacing text[start:end]"""
+        self.patches.append((start, end, len(self.patches), new_text))
+
+    def insert(self, offset, new_text):
+        self.replace(offset, offset, new_text)
+
+    def replace_node(self, node, new_text):
+        self.replace(node.start, node.end, new_text)
+
+    @property
+    def changed(self):
+        return bool(self.patches)
+
+    def render(self):
+        """Apply queued patches; untouched bytes are copied through as slices"""
+        text = self.document.text
+        if not self.patches:
+            return text
+
+        parts = []
+        last = 0
+        for start, end, _, new_text in sorted(self.patches):
+            if start < last:
+                raise ValueError(f"Overlapping patch at offset {start} in {self.document.path or 'document'}")
+            parts.append(text[last:start])
+            parts.append(new_text)
+            last = end
+        parts.append(text[last:])
+        return ''.join(parts)
+
+@lru_cache(maxsize=8)
+def parse(text, path=None):
+    """Tokenize text once; repeated passes over the same content share the index"""
+    return Document(text, path)
+
+def read_document(file_path):
+    with open(file_path, 'r', encoding='utf-8') as f:
+        return Document(f.read(), str(file_path))
+
+def find_html_files(root='.'):
+    """All site pages under root, sorted, skipping templates, backups and hidden dirs"""
+    html_files = []
+    for dirpath, dirs, files in os.walk(root):
+        dirs[:] = sorted(d for d in dirs if not d.startswith('.') and d not in ('node_modules', '__pycache__'))
+        for file in sorted(files):
+            if file.endswith('.html') and 'TEMPLATE' not in file.upper():
+                path = os.path.relpath(os.path.join(dirpath, file), root)
+                html_files.append(path.replace(os.sep, '/'))
+    return html_files
+
+def load_script(filename):
+    """Import one of the hyphenated maintenance scripts as a module"""
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), filename)
+    module_name = os.path.splitext(filename)[0].replace('-', '_')
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+
+    spec = importlib.util.spec_from_file_location(module_name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    spec.loader.exec_module(module)
+    return module
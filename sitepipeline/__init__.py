@@ -0,0 +1,9 @@
+"""
+Site maintenance pipeline
+Runs the per-file transforms from the maintenance scripts as fused stages
+"""
+
+from .stages import STAGES, DEFAULT_ORDER, Stage, get_stages, register_stage
+from .runner import PipelineResult, process_page, run_pipeline, print_report
+from .parallel import run_parallel
+from .transaction import Transaction, restore_run, write_text
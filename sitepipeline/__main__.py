@@ -0,0 +1,140 @@
+"""
+Command line entry point: python -m sitepipeline run seo,linking,advanced-linking,analytics
+"""
+
+import argparse
+import os
+import sys
+
+# The maintenance scripts and sitecore live at the site root, next to this package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sitepipeline.stages import STAGES, DEFAULT_ORDER, get_stages
+from sitepipeline.runner import run_pipeline, print_report
+from sitepipeline.cache import BuildCache
+from sitepipeline.parallel import add_jobs_argument
+from sitepipeline.transaction import add_dry_run_argument, list_runs, resolve_run, restore_run
+from sitepipeline.watch import DEFAULT_WATCH_STAGES, watch
+from patterns import add_profile_argument, finish_profiling, start_profiling
+
+def cmd_list(args):
+    print("Available stages (`all` runs them in this order):")
+    for name in DEFAULT_ORDER:
+        stage = STAGES[name]
+        print(f"  {name:<18} {stage.script:<32} {stage.description}")
+    return 0
+
+def cmd_run(args):
+    try:
+        stages = get_stages(args.stages)
+    except KeyError as e:
+        print(e.args[0])
+        return 2
+
+    cache = None if args.no_cache else BuildCache(args.root)
+    jobs = start_profiling(args)
+
+    print(f"Running stages: {', '.join(stage.name for stage in stages)}")
+    result = run_pipeline(stages, root=args.root, files=args.files or None, cache=cache, jobs=jobs,
+                          dry_run=args.dry_run)
+    print_report(result)
+    finish_profiling(args)
+    return 1 if result.errors else 0
+
+def cmd_clean_cache(args):
+    cache = BuildCache(args.root)
+    cache.clear()
+    cache.save()
+    print(f"Cleared {cache.path}")
+    return 0
+
+def cmd_watch(args):
+    try:
+        stages = get_stages(args.stages)
+    except KeyError as e:
+        print(e.args[0])
+        return 2
+
+    watch(stages, root=args.root, interval=args.interval, debounce=args.debounce,
+          use_inotify=not args.poll, max_batches=args.max_batches)
+    return 0
+
+def cmd_runs(args):
+    runs = list_runs(args.root)
+    if not runs:
+        print("No snapshots recorded yet")
+        return 0
+    print(f"{'run':<26} {'created':<20} {'files':>6}  label")
+    for run in runs[-args.limit:]:
+        print(f"{run['run']:<26} {run['created']:<20} {len(run['files']):>6}  {run['label']}")
+    return 0
+
+def cmd_restore(args):
+    try:
+        run_id = resolve_run(args.run, args.root)
+    except FileNotFoundError as e:
+        print(e)
+        return 2
+
+    restored, skipped = restore_run(run_id, root=args.root, force=args.force, dry_run=args.dry_run)
+    print(f"{'Would restore' if args.dry_run else 'Restored'} {len(restored)} file(s) from run {run_id}")
+    for file_path in restored:
+        print(f"  - {file_path}")
+    if skipped:
+        print(f"\nSkipped {len(skipped)} file(s) changed again since that run (use --force to overwrite):")
+        for file_path in skipped:
+            print(f"  - {file_path}")
+    return 1 if skipped else 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m sitepipeline',
+                                     description='Fused site maintenance pipeline')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    list_parser = subparsers.add_parser('list', help='show registered stages')
+    list_parser.set_defaults(func=cmd_list)
+
+    run_parser = subparsers.add_parser('run', help='stream every page through the given stages')
+    run_parser.add_argument('stages', help="comma-separated stage names, or 'all'")
+    run_parser.add_argument('files', nargs='*', help='pages to process (default: every page under --root)')
+    run_parser.add_argument('--root', default='.', help='site root (default: current directory)')
+    run_parser.add_argument('--no-cache', action='store_true',
+                            help='ignore .sitecache and process every page')
+    add_jobs_argument(run_parser)
+    add_profile_argument(run_parser)
+    add_dry_run_argument(run_parser)
+    run_parser.set_defaults(func=cmd_run)
+
+    clean_parser = subparsers.add_parser('clean-cache', help='delete the incremental build manifest')
+    clean_parser.add_argument('--root', default='.', help='site root (default: current directory)')
+    clean_parser.set_defaults(func=cmd_clean_cache)
+
+    watch_parser = subparsers.add_parser('watch', help='re-run stages on pages as they are saved')
+    watch_parser.add_argument('stages', nargs='?', default=DEFAULT_WATCH_STAGES,
+                              help=f"comma-separated stage names, or 'all' (default: {DEFAULT_WATCH_STAGES})")
+    watch_parser.add_argument('--root', default='.', help='site root (default: current directory)')
+    watch_parser.add_argument('--interval', type=float, default=0.5, help='seconds between scans when polling')
+    watch_parser.add_argument('--debounce', type=float, default=0.3,
+                              help='wait this long after the last save before processing a burst')
+    watch_parser.add_argument('--poll', action='store_true', help='poll mtimes even when inotify is available')
+    watch_parser.add_argument('--max-batches', type=int, help=argparse.SUPPRESS)
+    watch_parser.set_defaults(func=cmd_watch)
+
+    runs_parser = subparsers.add_parser('runs', help='list the recorded write snapshots')
+    runs_parser.add_argument('--root', default='.', help='site root (default: current directory)')
+    runs_parser.add_argument('--limit', type=int, default=20, help='most recent runs to show (default: 20)')
+    runs_parser.set_defaults(func=cmd_runs)
+
+    restore_parser = subparsers.add_parser('restore', help="undo one run's writes from its snapshot")
+    restore_parser.add_argument('--run', required=True, help="run id from `runs`, or 'latest'")
+    restore_parser.add_argument('--root', default='.', help='site root (default: current directory)')
+    restore_parser.add_argument('--force', action='store_true',
+                                help='also restore files that were changed again after the run')
+    add_dry_run_argument(restore_parser)
+    restore_parser.set_defaults(func=cmd_restore)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+"""
+Fingerprinted static assets: the manifest, the tags that load them, and reference rewriting
+asset-manifest.json maps each source file (search.js) to its minified, content-hashed copy (search.3f9a1c2b.js)
+"""
+
+import hashlib
+import json
+import os
+import re
+
+from sitecore import parse
+
+MANIFEST_FILE = 'asset-manifest.json'
+
+HASH_LENGTH = 8
+
+# Hand-edited sources; only their hashed copies are referenced by pages
+ASSET_SOURCES = (
+    'search.js',
+    'email-capture.js',
+    'analytics-config.js',
+    'search-styles.css',
+    'assets/cookie-consent.css',
+    'assets/cookie-consent.js',
+    'assets/navigation.css',
+    'assets/mobile-nav.js',
+)
+
+def fingerprinted_name(source, content):
+    """search.js + content -> search.<hash>.js"""
+    stem, ext = os.path.splitext(source)
+    digest = hashlib.sha256(content.encode('utf-8')).hexdigest()[:HASH_LENGTH]
+    return f'{stem}.{digest}{ext}'
+
+def load_manifest(root='.'):
+    try:
+        with open(os.path.join(root, MANIFEST_FILE), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def asset_url(source, manifest=None):
+    """Root-relative URL pages should use for source: the hashed copy once one is built"""
+    manifest = load_manifest() if manifest is None else manifest
+    return '/' + manifest.get(source, source)
+
+def script_tag(source, defer=False, manifest=None):
+    return f'<script src="{asset_url(source, manifest)}"{" defer" if defer else ""}></script>'
+
+def stylesheet_tag(source, manifest=None, deferred=False):
+    """<link> for source; deferred ones load as print styles and switch to all media once fetched, so they never block rendering"""
+    if deferred:
+        return f'<link rel="stylesheet" href="{asset_url(source, manifest)}" media="print" onload="this.media=\'all\'">'
+    return f'<link rel="stylesheet" href="{asset_url(source, manifest)}">'
+
+def asset_pattern(source):
+    """Matches a URL for source or any fingerprinted copy of it: /search.js, search.3f9a1c2b.js, /search.js?v=2"""
+    stem, ext = os.path.splitext(source)
+    return re.compile(rf'^/?{re.escape(stem)}(?:\.[0-9a-f]{{{HASH_LENGTH}}})?{re.escape(ext)}(?:\?[^"\']*)?$')
+
+ASSET_PATTERNS = {source: asset_pattern(source) for source in ASSET_SOURCES}
+
+def asset_source(url):
+    """The source file a script/stylesheet URL refers to, or None for anything else"""
+    for source, pattern in ASSET_PATTERNS.items():
+        if pattern.match(url):
+            return source
+    return None
+
+def asset_references(doc):
+    """(node, attribute, url, source) for every <script src> and <link href> that loads a known asset"""
+    references = []
+    for node, attribute in [(node, 'src') for node in doc.scripts] + [(node, 'href') for node in doc.find_all('link')]:
+        url = node.get(attribute)
+        source = asset_source(url) if url else None
+        if source:
+            references.append((node, attribute, url, source))
+    return references
+
+def has_asset_reference(content, source):
+    """True when the page already loads source, hashed or not"""
+    name = os.path.basename(os.path.splitext(source)[0])
+    if name not in content:
+        return False
+    return any(ref_source == source for _, _, _, ref_source in asset_references(parse(content)))
+
+def rewrite_asset_references(content, manifest):
+    """Point every asset tag at its current hashed copy; returns (content, number of references changed)"""
+    doc = parse(content)
+    edit = doc.edit()
+    changed = 0
+    for node, attribute, url, source in asset_references(doc):
+        target = asset_url(source, manifest)
+        if url == target:
+            continue
+        opening = doc.text[node.start:node.open_end]
+        new_opening = re.sub(rf'({attribute}\s*=\s*["\']?){re.escape(url)}', lambda match: match.group(1) + target,
+                             opening, count=1)
+        if new_opening != opening:
+            edit.replace(node.start, node.open_end, new_opening)
+            changed += 1
+    return (edit.render() if changed else content), changed
@@ -0,0 +1,92 @@
+"""
+Content-hash build cache for the site pipeline
+Remembers, per page, the hash of the last output and the fingerprint of every stage applied to it
+"""
+
+import hashlib
+import json
+import os
+
+MANIFEST_VERSION = 1
+
+def content_hash(content):
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+class BuildCache:
+    """On-disk manifest at <root>/.sitecache/manifest.json
+
+    A page is fresh when its content hash matches the hash recorded after the
+    last run and every requested stage was applied with the same fingerprint.
+    Size and mtime are kept as a fast pre-check so unchanged pages are not
+    even read.
+    """
+
+    def __init__(self, root='.', cache_dir='.sitecache'):
+        self.dir = os.path.join(root, cache_dir)
+        self.path = os.path.join(self.dir, 'manifest.json')
+        self.pages = {}
+        self.dirty = False
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get('version') == MANIFEST_VERSION:
+            self.pages = data.get('pages', {})
+
+    def save(self):
+        if not self.dirty:
+            return
+        os.makedirs(self.dir, exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': MANIFEST_VERSION, 'pages': self.pages}, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+        self.dirty = False
+
+    def _stages_match(self, entry, fingerprints):
+        applied = entry.get('stages', {})
+        return all(applied.get(name) == fingerprint for name, fingerprint in fingerprints.items())
+
+    def is_fresh_stat(self, file_path, stat, fingerprints):
+        """Cheap check: same size and mtime as when the page was last recorded"""
+        entry = self.pages.get(file_path)
+        return (entry is not None
+                and entry.get('size') == stat.st_size
+                and entry.get('mtime_ns') == stat.st_mtime_ns
+                and self._stages_match(entry, fingerprints))
+
+    def is_fresh(self, file_path, digest, fingerprints):
+        entry = self.pages.get(file_path)
+        return (entry is not None
+                and entry.get('hash') == digest
+                and self._stages_match(entry, fingerprints))
+
+    def record(self, file_path, digest, stat, fingerprints, content_changed):
+        """Store the page's output hash and the stages now reflected in it"""
+        entry = self.pages.get(file_path, {})
+        if content_changed or entry.get('hash') != digest:
+            # New content: earlier stages' results can no longer be assumed
+            stages = {}
+        else:
+            stages = dict(entry.get('stages', {}))
+        stages.update(fingerprints)
+
+        self.pages[file_path] = {
+            'hash': digest,
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'stages': stages,
+        }
+        self.dirty = True
+
+    def forget(self, file_path):
+        if self.pages.pop(file_path, None) is not None:
+            self.dirty = True
+
+    def clear(self):
+        self.pages = {}
+        self.dirty = True
@@ -0,0 +1,88 @@
+"""
+Critical CSS: the rules a page's first screen needs, found by matching selectors against its above-the-fold markup
+The first screen is the header, the hero and the first section; matching errs toward keeping a rule critical
+"""
+
+import re
+
+from sitepipeline.css import css_items, selector_list
+from sitepipeline.minify import minify_css
+from sitepipeline.selectors import SelectorIndex
+
+# <style data-critical="digest">: the digest tells a generated block from one edited since
+CRITICAL_ATTRIBUTE = 'data-critical'
+
+# At-rules the first render may need whatever they are attached to
+KEPT_AT_RULES = ('@charset', '@import', '@font-face', '@property', '@layer')
+
+KEYFRAMES_NAME_PATTERN = re.compile(r'@(?:-\w+-)?keyframes\s+([\w-]+)', re.IGNORECASE)
+
+def fold_end(doc):
+    """Offset where the first screen ends: after the first section following the header and hero
+
+    Pages without a <section> end their first section at the second <h2> after the hero;
+    a page with neither counts as all first screen.
+    """
+    body = doc.body
+    if body is None:
+        return len(doc.text)
+
+    anchor = body.open_end
+    headers = doc.find_within(body, 'header')
+    if headers:
+        anchor = max(anchor, headers[0].end)
+    for node in doc.elements:
+        if node.start >= body.open_end and any('hero' in token for token in (node.get('class') or '').split()):
+            anchor = max(anchor, node.end)
+            break
+
+    for section in doc.find_within(body, 'section'):
+        if section.start >= anchor and section.end > section.open_end:
+            return section.end
+    headings = [heading for heading in doc.find_within(body, 'h2') if heading.start >= anchor]
+    if len(headings) >= 2:
+        return headings[1].start
+    return body.close_start
+
+class FoldIndex(SelectorIndex):
+    """The elements of a page's first screen (plus <html> and <body>), indexed for selector matching"""
+
+    def __init__(self, doc):
+        self.end = fold_end(doc)
+        start = doc.body.start if doc.body is not None else 0
+        super().__init__(node for node in doc.elements if node.tag == 'html' or start <= node.start < self.end)
+
+    def matches(self, selector, interactive=False):
+        return super().matches(selector, interactive)
+
+def _critical_items(css, items, index, keyframes):
+    kept = []
+    for item in items:
+        text = css[item['start']:item['end']]
+        if item['kind'] == 'rule':
+            if any(index.matches(selector) for selector in selector_list(item['prelude'])):
+                kept.append(text)
+        elif item['kind'] == 'media':
+            if 'print' in item['prelude'].lower() and 'screen' not in item['prelude'].lower():
+                continue
+            inner = _critical_items(css, item['items'], index, keyframes)
+            if inner:
+                kept.append(f"{item['prelude']} {{\n" + '\n'.join(inner) + '\n}')
+        elif item['kind'] == 'other':
+            name = KEYFRAMES_NAME_PATTERN.match(text)
+            if name:
+                keyframes.append((name.group(1), text))
+            elif text.lower().startswith(KEPT_AT_RULES):
+                kept.append(text)
+    return kept
+
+def critical_css(css, index):
+    """Minified CSS of the rules in css that style the first screen, in their original order
+
+    @keyframes come along when a kept rule names them; print-only @media blocks never do.
+    """
+    keyframes = []
+    kept = _critical_items(css, css_items(css), index, keyframes)
+    text = '\n'.join(kept)
+    kept.extend(block for name, block in keyframes if re.search(rf'\b{re.escape(name)}\b', text))
+    return minify_css('\n'.join(kept)) if kept else ''
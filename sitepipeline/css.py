@@ -0,0 +1,124 @@
+"""
+Minimal stylesheet scanner: top-level rules, @media blocks and comments with their source offsets
+Enough structure to move or drop whole rules without a full CSS parser; anything unexpected is kept as an opaque item
+"""
+
+import re
+
+SPACE_PATTERN = re.compile(r'\s+')
+COMBINATOR_PATTERN = re.compile(r'\s*([>+~])\s*')
+
+# At-rules whose body is more rules, scanned like the top level
+GROUPING_AT_RULES = ('@media', '@supports')
+
+def skip_comment_or_string(text, i, line_comments=False):
+    """Index past the comment or string starting at i, or i when there is none
+
+    line_comments also skips // comments, for scanning JavaScript with the same helpers.
+    """
+    if text.startswith('/*', i):
+        end = text.find('*/', i + 2)
+        return len(text) if end == -1 else end + 2
+    if line_comments and text.startswith('//', i):
+        end = text.find('\n', i)
+        return len(text) if end == -1 else end
+    if text[i] in '"\'`':
+        quote = text[i]
+        i += 1
+        while i < len(text) and text[i] != quote:
+            i += 2 if text[i] == '\\' else 1
+        return i + 1
+    return i
+
+def matching_close(text, i, line_comments=False):
+    """Index past the bracket that closes the one at i; len(text) when it is never closed"""
+    depth = 0
+    while i < len(text):
+        skip = skip_comment_or_string(text, i, line_comments)
+        if skip != i:
+            i = skip
+            continue
+        if text[i] in '({[':
+            depth += 1
+        elif text[i] in ')}]':
+            depth -= 1
+            if depth == 0:
+                return i + 1
+        i += 1
+    return len(text)
+
+def line_span(text, start, end):
+    """start/end widened to whole lines when nothing but whitespace shares those lines"""
+    line_start = start
+    while line_start > 0 and text[line_start - 1] in ' \t':
+        line_start -= 1
+    if line_start == 0 or text[line_start - 1] == '\n':
+        start = line_start
+    line_end = end
+    while line_end < len(text) and text[line_end] in ' \t':
+        line_end += 1
+    if line_end < len(text) and text[line_end] == '\n':
+        end = line_end + 1
+    return start, end
+
+def css_items(text, offset=0):
+    """Top-level items of a stylesheet as dicts: kind, start, end, and for blocks prelude and body
+
+    kind is 'comment', 'rule', 'media' (any grouping at-rule; its 'items' are scanned too)
+    or 'other' (@font-face, @keyframes, @import, stray braces).
+    """
+    items = []
+    i = 0
+    while i < len(text):
+        if text[i].isspace():
+            i += 1
+            continue
+        if text.startswith('/*', i):
+            end = skip_comment_or_string(text, i)
+            items.append({'kind': 'comment', 'start': offset + i, 'end': offset + end})
+            i = end
+            continue
+        if text[i] == '}':
+            # Stray brace left by an earlier edit; keep it as an opaque item
+            items.append({'kind': 'other', 'start': offset + i, 'end': offset + i + 1})
+            i += 1
+            continue
+
+        j = i
+        while j < len(text) and text[j] not in '{;}':
+            j = max(skip_comment_or_string(text, j), j + 1)
+        if j >= len(text) or text[j] != '{':
+            end = j + 1 if j < len(text) and text[j] == ';' else j
+            items.append({'kind': 'other', 'start': offset + i, 'end': offset + end})
+            i = end
+            continue
+
+        close = matching_close(text, j)
+        prelude = SPACE_PATTERN.sub(' ', text[i:j]).strip()
+        body = text[j + 1:close - 1]
+        if prelude.lower().startswith(GROUPING_AT_RULES):
+            kind = 'media'
+        else:
+            kind = 'other' if prelude.startswith('@') else 'rule'
+        item = {'kind': kind, 'start': offset + i, 'end': offset + close, 'prelude': prelude, 'body': body}
+        if kind == 'media':
+            item['items'] = css_items(body, offset + j + 1)
+        items.append(item)
+        i = close
+    return items
+
+def selector_list(prelude):
+    """'a > b, .c:not(.d, .e)' -> ['a > b', '.c:not(.d, .e)']: split on top-level commas, spacing normalized"""
+    selectors = []
+    depth = 0
+    start = 0
+    for i, char in enumerate(prelude):
+        if char in '([':
+            depth += 1
+        elif char in ')]':
+            depth -= 1
+        elif char == ',' and depth == 0:
+            selectors.append(prelude[start:i])
+            start = i + 1
+    selectors.append(prelude[start:])
+    return [COMBINATOR_PATTERN.sub(r' \1 ', SPACE_PATTERN.sub(' ', selector)).strip() for selector in selectors]
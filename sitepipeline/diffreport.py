@@ -0,0 +1,93 @@
+"""
+Dry-run reporting: what a run would change, as unified diffs or a compact per-file and per-rule patch summary
+"""
+
+import difflib
+import os
+import re
+
+RULE_NUMBER_PATTERN = re.compile(r'\d+')
+
+def patch_stats(before, after):
+    """(bytes added, bytes removed, changed blocks) between two texts
+
+    Lines are diffed first; inside each changed block the common prefix and
+    suffix are trimmed, so an attribute added to a long line counts as the
+    attribute's bytes, not the whole line.
+    """
+    old_lines = before.splitlines(keepends=True)
+    new_lines = after.splitlines(keepends=True)
+    added = removed = blocks = 0
+
+    for tag, i1, i2, j1, j2 in difflib.SequenceMatcher(None, old_lines, new_lines).get_opcodes():
+        if tag == 'equal':
+            continue
+        blocks += 1
+        old = ''.join(old_lines[i1:i2]).encode('utf-8')
+        new = ''.join(new_lines[j1:j2]).encode('utf-8')
+        prefix = len(os.path.commonprefix([old, new]))
+        suffix = len(os.path.commonprefix([old[prefix:][::-1], new[prefix:][::-1]]))
+        removed += len(old) - prefix - suffix
+        added += len(new) - prefix - suffix
+
+    return added, removed, blocks
+
+def unified_diff(before, after, file_path):
+    """git-style unified diff text for one file"""
+    return ''.join(difflib.unified_diff(before.splitlines(keepends=True), after.splitlines(keepends=True),
+                                        fromfile=f'a/{file_path}', tofile=f'b/{file_path}'))
+
+def rule_key(change):
+    """'Removed 3 cookie CSS rules' -> ('Removed N cookie CSS rules', 3)"""
+    match = RULE_NUMBER_PATTERN.search(change)
+    return RULE_NUMBER_PATTERN.sub('N', change), int(match.group()) if match else 1
+
+class DryRunReport:
+    """Per-file byte stats and per-rule edit counts for the changes a run staged"""
+
+    def __init__(self, label):
+        self.label = label
+        self.files = []  # (file_path, added, removed, blocks)
+        self.rules = {}  # rule -> [files, edits]
+        self.diffs = []
+
+    def _count_rules(self, changes):
+        for change in changes:
+            rule, edits = rule_key(change)
+            totals = self.rules.setdefault(rule, [0, 0])
+            totals[0] += 1
+            totals[1] += edits
+
+    def add(self, file_path, before, after, changes=(), with_diff=False):
+        added, removed, blocks = patch_stats(before, after)
+        self.files.append((file_path, added, removed, blocks))
+        self._count_rules(changes)
+        if with_diff:
+            self.diffs.append(unified_diff(before, after, file_path))
+
+    def add_binary(self, file_path, before, after, changes=()):
+        """Images and other non-text output: counted as a whole-file replacement, never diffed"""
+        self.files.append((file_path, len(after), len(before), 1))
+        self._count_rules(changes)
+
+    def print_report(self):
+        for diff in self.diffs:
+            print(diff, end='' if diff.endswith('\n') else '\n')
+
+        added = sum(row[1] for row in self.files)
+        removed = sum(row[2] for row in self.files)
+        blocks = sum(row[3] for row in self.files)
+
+        print("\n" + "=" * 78)
+        print(f"DRY RUN ({self.label}): {len(self.files)} file(s) would change, "
+              f"+{added:,} / -{removed:,} bytes in {blocks} block(s); nothing was written")
+        print("=" * 78)
+        if self.files:
+            print(f"{'file':<52} {'+bytes':>8} {'-bytes':>8} {'blocks':>7}")
+            for file_path, file_added, file_removed, file_blocks in self.files:
+                print(f"{file_path[:52]:<52} {file_added:>8,} {file_removed:>8,} {file_blocks:>7}")
+
+        if self.rules:
+            print(f"\n{'rule':<56} {'files':>7} {'edits':>8}")
+            for rule, (files, edits) in sorted(self.rules.items(), key=lambda item: -item[1][1]):
+                print(f"{rule[:56]:<56} {files:>7} {edits:>8}")
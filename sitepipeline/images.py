@@ -0,0 +1,133 @@
+"""
+Responsive images: each local <img> wrapped in a <picture> offering resized AVIF/WebP copies, with intrinsic size set
+The copies and image-manifest.json come from build-images.py; this module only reads the manifest and rewrites markup
+"""
+
+import json
+import os
+import posixpath
+import re
+
+from sitecore import parse
+
+IMAGE_MANIFEST_FILE = 'image-manifest.json'
+IMAGE_DIR = 'assets/images'
+
+# Widths offered in srcset; an image also gets its own width, and is never scaled up
+RESPONSIVE_WIDTHS = (320, 640, 960, 1280, 1920)
+
+# Best compression first: the browser takes the first <source> it supports
+FORMATS = {'avif': 'image/avif', 'webp': 'image/webp'}
+
+# Formats worth re-encoding; GIFs may be animated and SVGs are already resolution independent
+RASTER_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+
+# <picture data-responsive>: one this module generated and may regenerate
+RESPONSIVE_ATTRIBUTE = 'data-responsive'
+
+TAG_END_PATTERN = re.compile(r'\s*/?>$')
+
+def load_image_manifest(root='.'):
+    try:
+        with open(os.path.join(root, IMAGE_MANIFEST_FILE), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def variant_widths(width):
+    return [candidate for candidate in RESPONSIVE_WIDTHS if candidate < width] + [width]
+
+def variant_name(source, digest, width, fmt):
+    """images/hero.png -> assets/images/hero.<digest>-640w.webp"""
+    stem = os.path.splitext(os.path.basename(source))[0]
+    return f'{IMAGE_DIR}/{stem}.{digest}-{width}w.{fmt}'
+
+def image_source(src, file_path):
+    """Site-relative path of a local raster image, or None for remote, inline and vector images"""
+    if not src or src.startswith(('http:', 'https:', '//', 'data:')):
+        return None
+    path = src.split('?')[0].split('#')[0]
+    if not path.lower().endswith(RASTER_EXTENSIONS):
+        return None
+    if path.startswith('/'):
+        return posixpath.normpath(path.lstrip('/'))
+    return posixpath.normpath(posixpath.join(posixpath.dirname(file_path), path))
+
+def responsive_images(doc, file_path):
+    """(img, source, picture) for every local <img> this module handles; picture is the generated wrapper, if any"""
+    pictures = doc.find_all('picture')
+    found = []
+    for img in doc.find_all('img'):
+        source = image_source(img.get('src'), file_path)
+        if source is None:
+            continue
+        wrapper = next((picture for picture in pictures
+                        if picture.open_end <= img.start < picture.close_start), None)
+        if wrapper is not None and wrapper.get(RESPONSIVE_ATTRIBUTE) is None:
+            continue  # hand-written <picture>
+        if wrapper is None and img.get('srcset') is not None:
+            continue  # hand-written srcset
+        found.append((img, source, wrapper))
+    return found
+
+def _with_dimensions(tag, img, entry):
+    """The <img> tag with width and height added where missing, keeping the image's aspect ratio"""
+    width, height = img.get('width'), img.get('height')
+    if width is not None and height is not None:
+        return tag, False
+    if width is not None and width.isdigit():
+        height = str(round(int(width) * entry['height'] / entry['width']))
+    elif height is not None and height.isdigit():
+        width = str(round(int(height) * entry['width'] / entry['height']))
+    elif width is None and height is None:
+        width, height = str(entry['width']), str(entry['height'])
+    else:
+        return tag, False
+    added = ''.join(f' {name}="{value}"' for name, value in (('width', width), ('height', height))
+                    if img.get(name) is None)
+    end = TAG_END_PATTERN.search(tag)
+    return tag[:end.start()] + added + tag[end.start():], True
+
+def display_width(img, entry):
+    """CSS pixel width the <img> declares (directly, or through its height), else the image's own width"""
+    width, height = img.get('width'), img.get('height')
+    if width is not None and width.isdigit():
+        return int(width)
+    if width is None and height is not None and height.isdigit():
+        return round(int(height) * entry['width'] / entry['height'])
+    return entry['width']
+
+def picture_markup(tag, img, entry):
+    """(markup, dimensions added) for one <img> and its manifest entry"""
+    tag, dimensioned = _with_dimensions(tag, img, entry)
+    width = display_width(img, entry)
+    sizes = img.get('sizes') or f"(max-width: {width}px) 100vw, {width}px"
+    sources = ''.join(
+        f'<source type="{FORMATS[fmt]}" srcset="'
+        + ', '.join(f'/{path} {width}w' for width, path in entry['variants'][fmt])
+        + f'" sizes="{sizes}">'
+        for fmt in FORMATS if entry['variants'].get(fmt))
+    if not sources:
+        return tag, dimensioned
+    # One line, so no whitespace text ends up inside an inline <picture>
+    return f'<picture {RESPONSIVE_ATTRIBUTE}>{sources}{tag}</picture>', dimensioned
+
+def rewrite_images(content, file_path, manifest):
+    """Wrap the page's local images in <picture>; returns (content, stats)
+
+    stats counts pictures written and images given intrinsic width/height.
+    """
+    doc = parse(content)
+    stats = {'pictures': 0, 'dimensioned': 0}
+    edit = doc.edit()
+    for img, source, wrapper in responsive_images(doc, file_path):
+        entry = manifest.get(source)
+        if entry is None:
+            continue
+        markup, dimensioned = picture_markup(content[img.start:img.open_end], img, entry)
+        start, end = (wrapper.start, wrapper.end) if wrapper is not None else (img.start, img.open_end)
+        if content[start:end] != markup:
+            edit.replace(start, end, markup)
+            stats['pictures'] += markup.startswith('<picture')
+            stats['dimensioned'] += dimensioned
+    return edit.render(), stats
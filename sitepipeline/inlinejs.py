@@ -0,0 +1,194 @@
+"""
+Inline script analysis: the top-level statements of every inline <script>, fingerprinted so copies pasted into
+several blocks or pages can be found
+Only event handler registrations and function declarations are ever removed or moved: running either twice
+adds nothing, and a DOMContentLoaded/load handler registered from a deferred file still fires
+"""
+
+import hashlib
+import re
+import textwrap
+
+from sitepipeline.css import SPACE_PATTERN, line_span, skip_comment_or_string
+from sitepipeline.navigation import (LEADING_COMMENTS_PATTERN, LINE_COMMENT_PATTERN, MOBILE_NAV_MARKER,
+                                    NEAR_DUPLICATE_COVERAGE, coverage, js_features)
+
+SHARED_HANDLERS_FILE = 'assets/shared-handlers.js'
+
+# Script types that run as classic scripts; modules, JSON-LD and templates are left alone
+CLASSIC_SCRIPT_TYPES = ('', 'text/javascript', 'application/javascript')
+
+HANDLER_PATTERN = re.compile(r'''^(?:document|window)\.addEventListener\(\s*['"]([\w:-]+)['"]''')
+FUNCTION_PATTERN = re.compile(r'^function\s+([\w$]+)\s*\(')
+USE_STRICT_PATTERN = re.compile(r'''^(?:\s|//[^\n]*|/\*.*?\*/)*['"]use strict['"]''', re.DOTALL)
+BLOCK_COMMENT_PATTERN = re.compile(r'/\*.*?\*/', re.DOTALL)
+# A '}' ends a statement unless the statement carries on after it
+CONTINUATION_PATTERN = re.compile(r'\s*(?:[).,;(\]]|else\b|catch\b|finally\b|while\b)')
+
+# Events that have not fired yet when deferred scripts run
+DEFERRABLE_EVENTS = ('DOMContentLoaded', 'load')
+
+def statements(code, offset=0):
+    """(start, end) of each top-level statement in code, without surrounding whitespace"""
+    spans = []
+    depth = 0
+    start = None
+    i = 0
+    while i < len(code):
+        skip = skip_comment_or_string(code, i, line_comments=True)
+        if skip != i:
+            if start is None and not code.startswith(('//', '/*'), i):
+                start = i
+            i = skip
+            continue
+        char = code[i]
+        if start is None and not char.isspace() and char != ';':
+            start = i
+        if char in '({[':
+            depth += 1
+        elif char in ')}]':
+            depth -= 1
+            if depth == 0 and char == '}' and not CONTINUATION_PATTERN.match(code, i + 1):
+                spans.append((offset + start, offset + i + 1))
+                start = None
+        elif char == ';' and depth == 0 and start is not None:
+            spans.append((offset + start, offset + i + 1))
+            start = None
+        i += 1
+    if start is not None:
+        spans.append((offset + start, offset + len(code.rstrip())))
+    return spans
+
+def normalize(code):
+    """Code with comments, indentation and blank lines dropped, so reindented copies compare equal"""
+    code = LINE_COMMENT_PATTERN.sub('', BLOCK_COMMENT_PATTERN.sub('', code))
+    return '\n'.join(SPACE_PATTERN.sub(' ', line).strip() for line in code.splitlines() if line.strip())
+
+def fingerprint(code):
+    return hashlib.sha256(normalize(code).encode('utf-8')).hexdigest()[:12]
+
+def is_complete(code):
+    """True when every bracket in code is closed, in order, and the statement ends there"""
+    depth = 0
+    i = 0
+    while i < len(code):
+        skip = skip_comment_or_string(code, i, line_comments=True)
+        if skip != i:
+            i = skip
+            continue
+        if code[i] in '({[':
+            depth += 1
+        elif code[i] in ')}]':
+            depth -= 1
+            if depth < 0:
+                return False
+        i += 1
+    return depth == 0 and code.rstrip().endswith((';', '}', ')'))
+
+def inline_statements(doc):
+    """Dicts for the statements of every classic inline script in doc, in document order
+
+    Each has start, end (absolute), script (the <script> node), text, fingerprint, bytes, and kind:
+    'handler' (with the event it waits for), 'function' (with its name) or None for anything else.
+    """
+    found = []
+    for script in doc.scripts:
+        if script.get('src') is not None or (script.get('type') or '').lower() not in CLASSIC_SCRIPT_TYPES:
+            continue
+        code = doc.inner(script)
+        # Moving statements out of a strict script would change how they run
+        if USE_STRICT_PATTERN.match(code):
+            continue
+        for start, end in statements(code, script.open_end):
+            text = doc.text[start:end]
+            entry = {'start': start, 'end': end, 'script': script, 'text': text, 'fingerprint': fingerprint(text),
+                     'bytes': len(text.encode('utf-8')), 'kind': None}
+            handler = HANDLER_PATTERN.match(text)
+            function = FUNCTION_PATTERN.match(text)
+            if is_complete(text) and handler:
+                entry.update(kind='handler', event=handler.group(1))
+            elif is_complete(text) and function:
+                entry.update(kind='function', name=function.group(1))
+            found.append(entry)
+    return found
+
+def is_mobile_nav_copy(statement, mobile_nav_features):
+    return (statement['kind'] == 'handler' and MOBILE_NAV_MARKER in statement['text']
+            and coverage(js_features(statement['text']), mobile_nav_features) >= NEAR_DUPLICATE_COVERAGE)
+
+def is_shareable(statement, mobile_nav_features=frozenset()):
+    """A handler that can move to a deferred file; mobile menu copies belong to fix_all_navigation.py --migrate"""
+    return (statement['kind'] == 'handler' and statement['event'] in DEFERRABLE_EVENTS
+            and not is_mobile_nav_copy(statement, mobile_nav_features))
+
+def near_duplicates(found, threshold=NEAR_DUPLICATE_COVERAGE):
+    """(a, b, coverage) for pairs of handlers on the same event whose code mostly overlaps but differs"""
+    handlers = [statement for statement in found if statement['kind'] == 'handler']
+    features = [js_features(statement['text']) for statement in handlers]
+    pairs = []
+    for i, a in enumerate(handlers):
+        for j in range(i + 1, len(handlers)):
+            b = handlers[j]
+            if a['event'] != b['event'] or a['fingerprint'] == b['fingerprint']:
+                continue
+            smaller, larger = sorted((features[i], features[j]), key=len)
+            shared = coverage(smaller, larger)
+            if shared >= threshold:
+                pairs.append((a, b, shared))
+    return pairs
+
+def dedented(doc, statement):
+    """Statement text with the page's indentation removed"""
+    line_start = doc.text.rfind('\n', 0, statement['start']) + 1
+    return textwrap.dedent(doc.text[line_start:statement['end']]).strip()
+
+def consolidate_scripts(doc, shared=(), shared_tag=None):
+    """Drop handlers and functions repeated within one inline script, and move the shared ones out
+
+    Copies in different <script> blocks all stay: a block that fails to parse runs none of its code,
+    so an earlier copy is no guarantee the definition exists.
+
+    shared holds fingerprints of handlers that go to the file shared_tag loads. Returns (content, stats);
+    stats counts duplicate statements and handlers removed, statements moved out, and bytes.
+    """
+    content = doc.text
+    stats = {'duplicates': 0, 'duplicate_handlers': 0, 'duplicate_bytes': 0,
+             'moved': 0, 'moved_bytes': 0, 'tag_bytes': 0}
+    seen = set()
+    cuts = {}
+    for statement in inline_statements(doc):
+        if statement['kind'] is None:
+            continue
+        key = (statement['script'].start, statement['fingerprint'])
+        repeated = key in seen
+        seen.add(key)
+        if repeated:
+            stats['duplicates'] += 1
+            stats['duplicate_handlers'] += statement['kind'] == 'handler'
+            stats['duplicate_bytes'] += statement['bytes']
+        elif statement['fingerprint'] in shared:
+            stats['moved'] += 1
+            stats['moved_bytes'] += statement['bytes']
+        else:
+            continue
+        # Comment lines directly above the statement describe it
+        start = LEADING_COMMENTS_PATTERN.search(content, statement['script'].open_end, statement['start']).start()
+        cuts.setdefault(statement['script'], []).append(line_span(content, start, statement['end']))
+
+    edit = doc.edit()
+    for script, spans in cuts.items():
+        rest = content[script.open_end:script.close_start]
+        for start, end in reversed(spans):
+            rest = rest[:start - script.open_end] + rest[end - script.open_end:]
+        if normalize(rest):
+            for start, end in spans:
+                edit.replace(start, end, '')
+        else:
+            edit.replace(*line_span(content, script.start, script.end), '')
+
+    if stats['moved'] and shared_tag and shared_tag not in content:
+        body_end = content.rfind('</body>')
+        position = line_span(content, body_end, body_end)[0] if body_end != -1 else len(content)
+        edit.insert(position, f'    {shared_tag}\n')
+        stats['tag_bytes'] = len(shared_tag) + 5
+    return edit.render(), stats
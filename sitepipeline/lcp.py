@@ -0,0 +1,147 @@
+"""
+Largest contentful paint: which of a page's images its first screen shows, and the one most likely to be its LCP
+Position decides: images ahead of the first <h1> (or <main>), inside a hero or banner, or within FOLD_BYTES of
+visible markup after the heading and before the first section ends. Everything else can load lazily.
+"""
+
+import re
+
+from sitecore import parse
+from sitepipeline.critical import fold_end
+from sitepipeline.css import line_span
+from sitepipeline.images import FORMATS, RESPONSIVE_ATTRIBUTE
+
+# <link rel="preload" data-lcp>: the preload this module generated and may replace
+LCP_PRELOAD_ATTRIBUTE = 'data-lcp'
+
+# Class tokens of blocks that open a page's first screen
+FIRST_SCREEN_CLASSES = ('hero', 'banner', 'masthead', 'jumbotron', 'above-fold')
+
+# Visible markup after the heading that still fits on a first screen; script and style bodies don't count
+FOLD_BYTES = 2500
+
+# Declared sizes below this are icons and badges, never the page's largest paint
+LCP_MIN_SIZE = 100
+
+# Elements whose images are never the LCP: site chrome, and markup that doesn't render
+CHROME_TAGS = ('header', 'nav', 'footer', 'aside')
+HIDDEN_TAGS = ('noscript', 'template')
+NOT_RENDERED_TAGS = ('script', 'style', 'noscript', 'template', 'svg')
+
+DISPLAY_NONE_PATTERN = re.compile(r'display\s*:\s*none', re.IGNORECASE)
+
+def _is_first_screen_block(node):
+    return any(name in token for token in (node.get('class') or '').lower().split() for name in FIRST_SCREEN_CLASSES)
+
+def _inside(node, containers):
+    return any(container.open_end <= node.start < container.close_start for container in containers)
+
+def _size(img, name):
+    value = img.get(name) or ''
+    return int(value) if value.isdigit() else None
+
+def _is_hidden(img, hidden):
+    width, height = _size(img, 'width'), _size(img, 'height')
+    return (_inside(img, hidden) or DISPLAY_NONE_PATTERN.search(img.get('style') or '') is not None
+            or img.get('hidden') is not None or (width is not None and width <= 1)
+            or (height is not None and height <= 1))
+
+def _visible_bytes(start, end, not_rendered):
+    """Bytes of markup between start and end, less script, style and other bodies that don't render"""
+    size = end - start
+    for span_start, span_end in not_rendered:
+        size -= max(0, min(end, span_end) - max(start, span_start))
+    return size
+
+def page_images(doc):
+    """Dicts for every <img> in doc, in document order
+
+    Each has img, hidden, first_screen, hero and chrome (inside header, nav, footer or aside).
+    """
+    body = doc.body
+    if body is None:
+        return []
+    headings = doc.find_within(body, 'h1')
+    mains = doc.find_within(body, 'main')
+    anchor = headings[0].end if headings else mains[0].open_end if mains else body.open_end
+    end = fold_end(doc)
+    blocks = [node for node in doc.elements if node.start >= body.open_end and _is_first_screen_block(node)]
+    hidden = [node for tag in HIDDEN_TAGS for node in doc.find_all(tag)]
+    chrome = [node for tag in CHROME_TAGS for node in doc.find_all(tag)]
+    not_rendered = doc.spans(NOT_RENDERED_TAGS)
+
+    found = []
+    for img in doc.find_within(body, 'img'):
+        entry = {'img': img, 'hidden': _is_hidden(img, hidden), 'hero': _inside(img, blocks),
+                 'chrome': _inside(img, chrome)}
+        entry['first_screen'] = not entry['hidden'] and (
+            img.start < anchor or entry['hero']
+            or (img.start < end and _visible_bytes(anchor, img.start, not_rendered) <= FOLD_BYTES))
+        found.append(entry)
+    return found
+
+def lcp_candidate(images):
+    """The first-screen image most likely to be the page's largest paint, or None
+
+    A hero image wins; otherwise the first content image that isn't a logo, icon or declared small.
+    """
+    candidates = []
+    for entry in images:
+        img = entry['img']
+        if not entry['first_screen'] or entry['chrome']:
+            continue
+        names = ' '.join((img.get('src') or '', img.get('class') or '', img.get('alt') or '')).lower()
+        if 'logo' in names or 'icon' in names or 'avatar' in names:
+            continue
+        width, height = _size(img, 'width'), _size(img, 'height')
+        if (width is not None and width < LCP_MIN_SIZE) or (height is not None and height < LCP_MIN_SIZE):
+            continue
+        candidates.append(entry)
+    return min(candidates, key=lambda entry: (not entry['hero'], entry['img'].start), default=None)
+
+def preload_markup(doc, img):
+    """<link rel="preload"> fetching what the browser will pick for img, or None when that can't be told
+
+    For a generated <picture> that is the first (best) format's srcset; a hand-written one may pick by media query.
+    """
+    attrs = [('rel', 'preload'), ('as', 'image')]
+    wrapper = next((picture for picture in doc.find_all('picture')
+                    if picture.open_end <= img.start < picture.close_start), None)
+    source = None
+    if wrapper is not None:
+        if wrapper.get(RESPONSIVE_ATTRIBUTE) is None:
+            return None
+        source = next((node for node in doc.find_within(wrapper, 'source')
+                       if node.get('type') in FORMATS.values() and node.get('srcset')), None)
+    if source is not None:
+        attrs += [('imagesrcset', source.get('srcset')), ('imagesizes', source.get('sizes') or ''),
+                  ('type', source.get('type'))]
+    elif img.get('srcset'):
+        attrs += [('href', img.get('src') or ''), ('imagesrcset', img.get('srcset')),
+                  ('imagesizes', img.get('sizes') or '')]
+    else:
+        attrs.append(('href', img.get('src') or ''))
+    rendered = ' '.join(f'{name}="{value}"' for name, value in attrs if value)
+    return f'<link {rendered} fetchpriority="high" {LCP_PRELOAD_ATTRIBUTE}>'
+
+def lcp_preload(doc):
+    """The preload link this module generated earlier, if doc has one"""
+    return next((link for link in doc.find_all('link') if link.get(LCP_PRELOAD_ATTRIBUTE) is not None), None)
+
+def refresh_preload(content):
+    """content with an existing LCP preload pointed at what the LCP image loads now
+
+    For rewrites that change an image's markup after the preload was written; pages without one are left alone.
+    """
+    doc = parse(content)
+    preload = lcp_preload(doc)
+    if preload is None:
+        return content
+    candidate = lcp_candidate(page_images(doc))
+    markup = preload_markup(doc, candidate['img']) if candidate is not None else None
+    edit = doc.edit()
+    if markup is None:
+        edit.replace(*line_span(content, preload.start, preload.open_end), '')
+    elif content[preload.start:preload.open_end] != markup:
+        edit.replace(preload.start, preload.open_end, markup)
+    return edit.render()
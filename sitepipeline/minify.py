@@ -0,0 +1,181 @@
+"""
+Dependency-free JS and CSS minification for the site's hand-written assets
+Conservative on purpose: comments and indentation go, line breaks stay, so automatic semicolon insertion is never affected
+"""
+
+import re
+
+# After one of these (or at the start), a '/' opens a regex literal rather than dividing
+REGEX_PRECEDERS = set('(,=:[!&|?{};+-*%<>~^')
+REGEX_KEYWORDS = ('return', 'typeof', 'case', 'do', 'else', 'in', 'of', 'new', 'delete', 'void', 'throw', 'yield', 'await')
+
+IDENTIFIER_PATTERN = re.compile(r'[A-Za-z0-9_$]+$')
+
+def _regex_allowed(out):
+    """True when a '/' at this point in the output starts a regex literal"""
+    text = ''.join(out[-3:]).rstrip() if out else ''
+    if not text:
+        return True
+    if text[-1] in REGEX_PRECEDERS:
+        return True
+    word = IDENTIFIER_PATTERN.search(''.join(out[-8:]).rstrip())
+    return bool(word) and word.group() in REGEX_KEYWORDS
+
+def _separate(out, separator):
+    """Append whitespace, merging it with whitespace already at the end (a line break wins)"""
+    if out and out[-1] in (' ', '\n'):
+        if separator == '\n':
+            out[-1] = '\n'
+        return
+    out.append(separator)
+
+def _skip_string(source, i, quote):
+    """Index just past the string literal opening at i"""
+    i += 1
+    while i < len(source):
+        char = source[i]
+        if char == '\\':
+            i += 2
+            continue
+        if char == quote or (char == '\n' and quote != '`'):
+            return i + 1
+        i += 1
+    return i
+
+def _skip_regex(source, i):
+    """Index just past the regex literal (and flags) opening at i"""
+    i += 1
+    in_class = False
+    while i < len(source):
+        char = source[i]
+        if char == '\\':
+            i += 2
+            continue
+        if char == '\n':
+            return i
+        if char == '[':
+            in_class = True
+        elif char == ']':
+            in_class = False
+        elif char == '/' and not in_class:
+            i += 1
+            while i < len(source) and (source[i].isalnum() or source[i] in '_$'):
+                i += 1
+            return i
+        i += 1
+    return i
+
+def minify_js(source):
+    """Drop comments, indentation, blank lines and repeated spaces; strings, templates and regexes are copied verbatim"""
+    out = []
+    # Brace depth at which each open template literal's ${ ... } resumes the template
+    templates = []
+    depth = 0
+    i = 0
+    n = len(source)
+
+    while i < n:
+        char = source[i]
+
+        if char == '`' or (char == '}' and templates and templates[-1] == depth):
+            # Template text runs to the closing backtick or the next ${
+            if char == '}':
+                templates.pop()
+                depth -= 1
+            start = i
+            i += 1
+            while i < n:
+                if source[i] == '\\':
+                    i += 2
+                    continue
+                if source[i] == '`':
+                    i += 1
+                    break
+                if source.startswith('${', i):
+                    i += 2
+                    depth += 1
+                    templates.append(depth)
+                    break
+                i += 1
+            out.append(source[start:i])
+            continue
+
+        if char in '"\'':
+            end = _skip_string(source, i, char)
+            out.append(source[i:end])
+            i = end
+            continue
+
+        if char == '/' and i + 1 < n and source[i + 1] == '/':
+            while i < n and source[i] != '\n':
+                i += 1
+            continue
+
+        if char == '/' and i + 1 < n and source[i + 1] == '*':
+            end = source.find('*/', i + 2)
+            end = n if end == -1 else end + 2
+            # A comment that spanned lines still separates statements
+            _separate(out, '\n' if '\n' in source[i:end] else ' ')
+            i = end
+            continue
+
+        if char == '/' and _regex_allowed(out):
+            end = _skip_regex(source, i)
+            out.append(source[i:end])
+            i = end
+            continue
+
+        if char in ' \t\r\n':
+            start = i
+            while i < n and source[i] in ' \t\r\n':
+                i += 1
+            _separate(out, '\n' if '\n' in source[start:i] else ' ')
+            continue
+
+        if char == '{':
+            depth += 1
+        elif char == '}':
+            depth -= 1
+        out.append(char)
+        i += 1
+
+    return _tidy_lines(''.join(out))
+
+def _tidy_lines(text):
+    lines = (line.strip() for line in text.split('\n'))
+    return '\n'.join(line for line in lines if line) + '\n'
+
+# Comments and quoted strings in one alternation, so a quote inside a comment (or /* inside a string) is not misread
+CSS_COMMENT_OR_STRING_PATTERN = re.compile(r'/\*.*?\*/|"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'', re.DOTALL)
+CSS_SPACE_PATTERN = re.compile(r'\s+')
+# Spaces around these never matter; ':' only loses the space after it (a space before it is a descendant selector)
+CSS_PUNCTUATION_PATTERN = re.compile(r'\s*([{};,>])\s*')
+CSS_COLON_PATTERN = re.compile(r':\s+')
+CSS_LAST_SEMICOLON_PATTERN = re.compile(r';}')
+CSS_STASHED_PATTERN = re.compile('\0(\\d+)\0')
+
+def minify_css(source):
+    """Drop comments and insignificant whitespace; quoted strings are left alone"""
+    strings = []
+
+    def stash(match):
+        if match.group().startswith('/*'):
+            return ' '
+        strings.append(match.group())
+        return f'\0{len(strings) - 1}\0'
+
+    text = CSS_COMMENT_OR_STRING_PATTERN.sub(stash, source)
+    text = CSS_SPACE_PATTERN.sub(' ', text)
+    text = CSS_PUNCTUATION_PATTERN.sub(r'\1', text)
+    text = CSS_COLON_PATTERN.sub(':', text)
+    text = CSS_LAST_SEMICOLON_PATTERN.sub('}', text)
+    text = CSS_STASHED_PATTERN.sub(lambda match: strings[int(match.group(1))], text)
+    return text.strip() + '\n'
+
+def minify(file_path, source):
+    """Minify by file extension; anything else is returned unchanged"""
+    if file_path.endswith('.js'):
+        return minify_js(source)
+    if file_path.endswith('.css'):
+        return minify_css(source)
+    return source
@@ -0,0 +1,255 @@
+"""
+Shared navigation assets: finding the navigation CSS and mobile menu JS that scripts pasted inline into every page
+A block counts as a copy when most of its declarations (CSS) or code lines (JS) also appear in a known copy,
+so older near-duplicate variants are found too, while blocks that add real page-specific behaviour are left alone.
+Declarations of a copy that the shared stylesheet doesn't make, value for value, stay inline.
+"""
+
+import re
+
+from sitecore import parse
+from sitepipeline.assets import has_asset_reference, script_tag, stylesheet_tag
+from sitepipeline.css import SPACE_PATTERN, css_items, line_span, matching_close, selector_list
+
+NAVIGATION_CSS_FILE = 'assets/navigation.css'
+MOBILE_NAV_JS_FILE = 'assets/mobile-nav.js'
+
+# Share of a block's declarations / code lines that must appear in a known copy
+NEAR_DUPLICATE_COVERAGE = 0.75
+
+# Classes the global header uses; a rule is navigation CSS when its selectors only involve these
+NAV_CLASSES = {'site-header', 'site-nav', 'logo', 'nav-links', 'dropdown', 'dropdown-content', 'mobile-menu-toggle'}
+STATE_CLASSES = {'active', 'mobile-open'}
+
+CLASS_PATTERN = re.compile(r'\.([\w-]+)')
+ID_PATTERN = re.compile(r'#[\w-]')
+LINE_COMMENT_PATTERN = re.compile(r'^\s*//.*$', re.MULTILINE)
+CSS_COMMENT_PATTERN = re.compile(r'/\*.*?\*/', re.DOTALL)
+
+MOBILE_NAV_MARKER = '.mobile-menu-toggle'
+DOM_READY_PATTERN = re.compile(r'''document\.addEventListener\(\s*['"]DOMContentLoaded['"]''')
+# Comment lines directly above a handler ("// Mobile navigation functionality") go with it
+LEADING_COMMENTS_PATTERN = re.compile(r'(?:[ \t]*//[^\n]*\n)*[ \t]*\Z')
+# ...and an HTML comment labelling a script that goes as a whole
+LABEL_COMMENT_PATTERN = re.compile(r'<!--\s*Mobile Nav[^>]*-->\s*$', re.IGNORECASE)
+
+def is_navigation_selector(selector):
+    classes = set(CLASS_PATTERN.findall(selector))
+    return (bool(classes & NAV_CLASSES) and classes <= NAV_CLASSES | STATE_CLASSES
+            and not ID_PATTERN.search(selector))
+
+def is_navigation_item(item):
+    """True for a rule (or @media block of rules) that only styles the global header"""
+    if item['kind'] == 'rule':
+        return all(is_navigation_selector(selector) for selector in selector_list(item['prelude']))
+    if item['kind'] == 'media':
+        rules = [inner for inner in item['items'] if inner['kind'] != 'comment']
+        return bool(rules) and all(is_navigation_item(inner) for inner in rules)
+    return False
+
+def declarations(body):
+    """(property, value, text) for each declaration in a rule body; property and value normalized for comparing"""
+    found = []
+    for declaration in CSS_COMMENT_PATTERN.sub('', body).split(';'):
+        if ':' not in declaration:
+            continue
+        prop, value = declaration.split(':', 1)
+        found.append((prop.strip().lower(), SPACE_PATTERN.sub(' ', value).strip().lower(),
+                      SPACE_PATTERN.sub(' ', declaration).strip()))
+    return found
+
+def _media_key(item):
+    return SPACE_PATTERN.sub('', item['prelude']).lower()
+
+def css_features(items, media=''):
+    """{'media|selector|property|value'} for every declaration in items"""
+    features = set()
+    for item in items:
+        if item['kind'] == 'media':
+            features |= css_features(item['items'], _media_key(item))
+        elif item['kind'] == 'rule':
+            for selector in selector_list(item['prelude']):
+                features.update(f'{media}|{selector}|{prop}|{value}' for prop, value, _ in declarations(item['body']))
+    return features
+
+def residual_css(items, shared, media=''):
+    """(css, kept) for the declarations in items that shared (css_features of the shared stylesheet) lacks
+
+    css is one rule per line, inside its @media block; kept describes each declaration, for reports.
+    """
+    lines = []
+    kept = []
+    for item in items:
+        if item['kind'] == 'media':
+            inner, inner_kept = residual_css(item['items'], shared, _media_key(item))
+            if inner:
+                lines += [f"{item['prelude']} {{"] + [f'    {line}' for line in inner.splitlines()] + ['}']
+                kept += [f"{item['prelude']} {description}" for description in inner_kept]
+        elif item['kind'] == 'rule':
+            selectors = selector_list(item['prelude'])
+            texts = [text for prop, value, text in declarations(item['body'])
+                     if any(f'{media}|{selector}|{prop}|{value}' not in shared for selector in selectors)]
+            if texts:
+                lines.append(f"{item['prelude']} {{ {'; '.join(texts)}; }}")
+                kept += [f"{item['prelude']} {{ {text} }}" for text in texts]
+    return '\n'.join(lines), kept
+
+def _declaration_count(items):
+    return sum(_declaration_count(item['items']) if item['kind'] == 'media' else len(declarations(item['body']))
+               for item in items if item['kind'] in ('media', 'rule'))
+
+def js_features(code):
+    """Code lines of a script with comments and indentation dropped"""
+    code = LINE_COMMENT_PATTERN.sub('', code)
+    return {SPACE_PATTERN.sub(' ', line).strip() for line in code.splitlines() if line.strip()}
+
+def coverage(features, known):
+    return len(features & known) / len(features) if features else 0.0
+
+def navigation_css_runs(css, known, offset=0):
+    """(start, end, is_copy, rules) for each run of navigation rules in css; is_copy when it duplicates known CSS
+
+    Comments inside a run, and directly above it, are part of the run.
+    """
+    runs = []
+    run = []
+
+    def close_run():
+        rules = [item for item in run if item['kind'] != 'comment']
+        if rules:
+            is_copy = coverage(css_features(rules), known) >= NEAR_DUPLICATE_COVERAGE
+            runs.append((run[0]['start'], rules[-1]['end'], is_copy, rules))
+        run.clear()
+
+    for item in css_items(css, offset):
+        if item['kind'] == 'comment' or is_navigation_item(item):
+            run.append(item)
+        else:
+            # Comments just before a non-navigation rule describe that rule
+            while run and run[-1]['kind'] == 'comment':
+                run.pop()
+            close_run()
+    close_run()
+    return runs
+
+def mobile_nav_handlers(code, known, offset=0):
+    """(start, end) of each DOMContentLoaded handler in code that is a copy of the known mobile menu script
+
+    A handler an earlier edit cut short (never closed) runs to the end of the script.
+    """
+    handlers = []
+    last_end = 0
+    for match in DOM_READY_PATTERN.finditer(code):
+        if match.start() < last_end:
+            continue
+        end = matching_close(code, code.index('(', match.start()), line_comments=True)
+        if end < len(code) and code[end] == ';':
+            end += 1
+        handler = code[match.start():end]
+        if MOBILE_NAV_MARKER not in handler or coverage(js_features(handler), known) < NEAR_DUPLICATE_COVERAGE:
+            continue
+        start = LEADING_COMMENTS_PATTERN.search(code, 0, match.start()).start()
+        handlers.append((offset + start, offset + end))
+        last_end = end
+    return handlers
+
+def _without(text, spans, offset):
+    """text (which starts at offset) with the given spans cut out"""
+    parts = []
+    last = offset
+    for start, end in spans:
+        parts.append(text[last - offset:start - offset])
+        last = end
+    parts.append(text[last - offset:])
+    return ''.join(parts)
+
+def extract_shared_navigation(content, known_css, known_js, manifest=None, shared_css=None):
+    """Replace inlined navigation CSS and mobile menu JS with one stylesheet link and one deferred script
+
+    known_css and known_js are the features (css_features / js_features) of every known copy; shared_css
+    those of the shared stylesheet (default: known_css). Declarations of a copy it lacks stay inline.
+    Returns (content, stats); stats counts the blocks and bytes removed and the tag bytes added, and
+    lists the declarations kept inline.
+    """
+    shared_css = known_css if shared_css is None else shared_css
+    doc = parse(content)
+    edit = doc.edit()
+    stats = {'css_blocks': 0, 'css_bytes': 0, 'js_blocks': 0, 'js_bytes': 0, 'tag_bytes': 0, 'kept': []}
+    link_at = None  # (first <style> with a copy, offset to split it at or None)
+
+    def cut(start, end, replacement=''):
+        """Replace whole lines; replacement lines take the indentation of the first line cut"""
+        line_start, line_end = line_span(content, start, end)
+        if replacement:
+            indent = content[line_start:start]
+            replacement = '\n'.join(indent + line for line in replacement.splitlines())
+            replacement += '\n' if line_end > end else ''
+        edit.replace(line_start, line_end, replacement)
+        return len(content[line_start:line_end].encode('utf-8')) - len(replacement.encode('utf-8'))
+
+    for style in doc.find_all('style'):
+        css = doc.inner(style)
+        runs = navigation_css_runs(css, known_css, style.open_end)
+        blocks = []
+        for start, end, is_copy, rules in runs:
+            if not is_copy:
+                continue
+            residual, kept = residual_css(rules, shared_css)
+            # Every declaration kept: nothing is shared, as with what an earlier migration left inline
+            if len(kept) < _declaration_count(rules):
+                blocks.append((start, end, residual))
+                stats['kept'] += kept
+        if not blocks:
+            continue
+        stats['css_blocks'] += len(blocks)
+        spans = [(start, end) for start, end, _ in blocks]
+        if _without(css, spans, style.open_end).strip() or any(residual for _, _, residual in blocks):
+            for start, end, residual in blocks:
+                stats['css_bytes'] += cut(start, end, residual)
+        else:
+            # Nothing but navigation CSS: the whole <style> element goes
+            stats['css_bytes'] += cut(style.start, style.end)
+        if link_at is None:
+            # Navigation rules the page keeps must still follow the shared ones, as they did the copy
+            kept_before = any(start < spans[0][0] for start, _, is_copy, _ in runs if not is_copy)
+            link_at = (style, spans[0][0] if kept_before else None)
+
+    for script in doc.scripts:
+        if script.get('src') or script.get('type', 'text/javascript') not in ('text/javascript', 'module'):
+            continue
+        code = doc.inner(script)
+        if MOBILE_NAV_MARKER not in code:
+            continue
+        handlers = mobile_nav_handlers(code, known_js, script.open_end)
+        if not handlers:
+            continue
+        stats['js_blocks'] += len(handlers)
+        if LINE_COMMENT_PATTERN.sub('', _without(code, handlers, script.open_end)).strip():
+            for start, end in handlers:
+                stats['js_bytes'] += cut(start, end)
+        else:
+            label = LABEL_COMMENT_PATTERN.search(content, max(0, script.start - 200), script.start)
+            stats['js_bytes'] += cut(label.start() if label else script.start, script.end)
+
+    if not edit.changed:
+        return content, stats
+
+    if stats['css_blocks'] and not has_asset_reference(content, NAVIGATION_CSS_FILE):
+        style, split_at = link_at
+        link = stylesheet_tag(NAVIGATION_CSS_FILE, manifest)
+        line_start = line_span(content, style.start, style.start)[0]
+        indent = content[line_start:style.start]
+        if split_at is None:
+            # Ahead of the page's own styles, so whatever is left of them still overrides the shared rules
+            tag = f'{indent}{link}\n'
+            edit.insert(line_start, tag)
+        else:
+            tag = f'{indent}</style>\n{indent}{link}\n{indent}{doc.text[style.start:style.open_end]}\n'
+            edit.insert(line_span(content, split_at, split_at)[0], tag)
+        stats['tag_bytes'] += len(tag.encode('utf-8'))
+    if stats['js_blocks'] and not has_asset_reference(content, MOBILE_NAV_JS_FILE):
+        tag = f"    {script_tag(MOBILE_NAV_JS_FILE, defer=True, manifest=manifest)}\n"
+        body_end = content.rfind('</body>')
+        edit.insert(line_span(content, body_end, body_end)[0] if body_end != -1 else len(content), tag)
+        stats['tag_bytes'] += len(tag.encode('utf-8'))
+    return edit.render(), stats
@@ -0,0 +1,59 @@
+"""
+Process-pool driver for per-file transforms
+Fans process_file-style functions out across cores with deterministic, in-order results
+"""
+
+import contextlib
+import io
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+def default_jobs():
+    return os.cpu_count() or 1
+
+def add_jobs_argument(parser):
+    parser.add_argument('--jobs', '-j', type=int, default=1,
+                        help='worker processes (0 = one per CPU, default: 1)')
+
+def resolve_jobs(jobs):
+    return default_jobs() if not jobs or jobs < 1 else jobs
+
+def _run_captured(func, item):
+    """Run one call in a worker, capturing what it prints so the parent can replay it in order"""
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        try:
+            return func(item), None, output.getvalue()
+        except Exception as e:
+            return None, str(e), output.getvalue()
+
+def run_parallel(func, items, jobs=1, chunksize=None):
+    """Apply func to every item; yield (item, result, error) in input order
+
+    func must be picklable (a module-level function or a bound method of a
+    picklable object). Work is scheduled in chunks so small pages don't pay
+    one IPC round trip each. Anything func prints is replayed by the parent
+    in input order, so logs read the same as a serial run.
+    """
+    items = list(items)
+    jobs = min(resolve_jobs(jobs), max(1, len(items)))
+
+    if jobs == 1:
+        for item in items:
+            try:
+                yield item, func(item), None
+            except Exception as e:
+                yield item, None, str(e)
+        return
+
+    if chunksize is None:
+        # About four chunks per worker balances stragglers against IPC overhead
+        chunksize = max(1, len(items) // (jobs * 4))
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        outcomes = executor.map(_run_captured, itertools.repeat(func), items, chunksize=chunksize)
+        for item, (result, error, output) in zip(items, outcomes):
+            if output:
+                print(output, end='')
+            yield item, result, error
@@ -0,0 +1,210 @@
+"""
+Dead CSS pruning for the inline <style> blocks of a page
+A rule goes when none of its selectors can match the page's markup, or when later rules with the same selectors
+in the same @media context override every declaration it makes. Names the page's scripts mention count as present,
+so classes and ids added at runtime keep their rules
+"""
+
+import functools
+import os
+import re
+
+from sitecore import parse
+from sitepipeline.critical import CRITICAL_ATTRIBUTE
+from sitepipeline.css import SPACE_PATTERN, css_items, line_span, selector_list, skip_comment_or_string
+from sitepipeline.selectors import SelectorIndex
+
+# String literals in script code, and the names inside them a script may put on an element
+STRING_LITERAL_PATTERN = re.compile(r'"(?:[^"\\\n]|\\.)*"|\'(?:[^\'\\\n]|\\.)*\'|`(?:[^`\\]|\\.)*`')
+NAME_PATTERN = re.compile(r'[A-Za-z_][\w-]*')
+
+# A value some browsers reject, so it cannot be trusted to override an earlier declaration
+VENDOR_VALUE_PATTERN = re.compile(r'(?<![\w-])-(?:webkit|moz|ms|o)-')
+
+# Script types that hold data rather than code
+DATA_SCRIPT_TYPES = ('application/ld+json', 'application/json')
+
+def script_names(code):
+    """Names in a script's string literals: the class, id and attribute names it may set at runtime"""
+    names = set()
+    for literal in STRING_LITERAL_PATTERN.findall(code):
+        names.update(NAME_PATTERN.findall(literal[1:-1]))
+    return names
+
+@functools.lru_cache(maxsize=None)
+def _file_script_names(path, mtime):
+    with open(path, 'r', encoding='utf-8') as f:
+        return frozenset(script_names(f.read()))
+
+def page_script_names(doc, file_path, root='.'):
+    """Names the page's inline scripts, linked local scripts and on* handlers mention
+
+    Raises FileNotFoundError for a local script that is not on disk: without it nothing is known to be unused.
+    """
+    names = set()
+    for script in doc.scripts:
+        if (script.get('type') or '').lower() in DATA_SCRIPT_TYPES:
+            continue
+        src = script.get('src')
+        if src is None:
+            names |= script_names(doc.inner(script))
+            continue
+        if src.startswith(('http:', 'https:', '//')):
+            continue
+        src = src.split('?')[0].split('#')[0]
+        if src.startswith('/'):
+            path = os.path.join(root, src.lstrip('/'))
+        else:
+            path = os.path.join(root, os.path.dirname(file_path), src)
+        names |= _file_script_names(path, os.path.getmtime(path))
+    for node in doc.elements:
+        for attribute, value in node.attrs.items():
+            if attribute.startswith('on') and value:
+                names |= script_names(value)
+    return names
+
+def declarations(body):
+    """{property: important} for each declaration in a rule body that can override an earlier one"""
+    result = {}
+    start = depth = i = 0
+    while i <= len(body):
+        if i < len(body):
+            skip = skip_comment_or_string(body, i)
+            if skip != i:
+                i = skip
+                continue
+            if body[i] in '([':
+                depth += 1
+            elif body[i] in ')]':
+                depth -= 1
+        if i == len(body) or (body[i] == ';' and depth == 0):
+            name, colon, value = body[start:i].partition(':')
+            name = name.strip().lower()
+            if colon and name and not VENDOR_VALUE_PATTERN.search(value):
+                important = value.replace(' ', '').lower().endswith('!important')
+                result[name] = result.get(name, False) or important
+            start = i + 1
+        i += 1
+    return result
+
+def _context(item, outer):
+    return outer + (SPACE_PATTERN.sub(' ', item['prelude']).lower(),)
+
+def _collect_rules(items, context, rules):
+    after_stray_brace = False
+    for item in items:
+        # A browser reads a stray '}' as the start of the next rule's selector, so that rule already never
+        # applies; it stays, or removing it would leave the brace to swallow the one after
+        if item['kind'] == 'rule' and not after_stray_brace:
+            rules.append((item, context))
+        elif item['kind'] == 'media':
+            _collect_rules(item['items'], _context(item, context), rules)
+        if item['kind'] != 'comment':
+            after_stray_brace = item['kind'] == 'other' and item['end'] - item['start'] == 1
+
+def _plan(items, removed):
+    """Spans to cut from items; also whether nothing but comments would be left"""
+    spans = []
+    kept_any = False
+    comment = None
+    section_kept = True
+    section_removed = False
+
+    def close_section():
+        if comment is not None and section_removed and not section_kept:
+            spans.append((comment['start'], comment['end']))
+
+    for item in items:
+        if item['kind'] == 'comment':
+            close_section()
+            comment, section_kept, section_removed = item, False, False
+            continue
+        if item['kind'] == 'media':
+            inner, empty = _plan(item['items'], removed)
+            gone = empty and any(child['kind'] != 'comment' for child in item['items'])
+            if gone:
+                spans.append((item['start'], item['end']))
+            else:
+                spans.extend(inner)
+        else:
+            gone = item['start'] in removed
+            if gone:
+                spans.append((item['start'], item['end']))
+        section_removed = section_removed or gone
+        section_kept = section_kept or not gone
+        kept_any = kept_any or not gone
+    close_section()
+    return spans, not kept_any
+
+def prune_css(content, file_path, root='.'):
+    """Remove dead and overridden rules from a page's inline styles; returns (content, stats)
+
+    stats counts dead rules, overridden rules, selectors dropped from lists that still apply,
+    <style> blocks left as critical CSS (run build-critical-css.py --inline first to prune those)
+    and bytes removed.
+    """
+    doc = parse(content)
+    index = SelectorIndex(doc.elements, page_script_names(doc, file_path, root))
+    stats = {'dead': 0, 'overridden': 0, 'selectors': 0, 'critical_blocks': 0, 'bytes': 0}
+
+    styles = []
+    for style in doc.find_all('style'):
+        if style.get(CRITICAL_ATTRIBUTE) is not None:
+            stats['critical_blocks'] += 1
+            continue
+        media = SPACE_PATTERN.sub(' ', style.get('media') or 'all').lower()
+        styles.append((style, css_items(doc.inner(style), style.open_end), (media,)))
+
+    rules = []
+    for style, items, context in styles:
+        _collect_rules(items, context, rules)
+
+    matches = {}
+    removed = set()
+    live_rules = []
+    rewrites = []
+    for item, context in rules:
+        selectors = selector_list(item['prelude'])
+        for selector in selectors:
+            if selector not in matches:
+                matches[selector] = index.matches(selector)
+        live = [selector for selector in selectors if matches[selector]]
+        if not live or not item['body'].strip():
+            removed.add(item['start'])
+            stats['dead'] += 1
+            continue
+        if len(live) < len(selectors):
+            stats['selectors'] += len(selectors) - len(live)
+            brace = content.index('{', item['start'])
+            prelude = content[item['start']:brace]
+            rewrites.append((item['start'], brace, ', '.join(live) + prelude[len(prelude.rstrip()):]))
+        live_rules.append((item, (context, tuple(live))))
+
+    # Later rules win, so walk backwards collecting what each selector list already sets
+    overridden_by = {}
+    for item, key in reversed(live_rules):
+        declared = declarations(item['body'])
+        later = overridden_by.setdefault(key, {})
+        if declared and all(name in later and later[name] >= important for name, important in declared.items()):
+            removed.add(item['start'])
+            stats['overridden'] += 1
+        for name, important in declared.items():
+            later[name] = later.get(name, False) or important
+
+    cuts = []
+    for style, items, context in styles:
+        spans, empty = _plan(items, removed)
+        if empty and any(item['kind'] != 'comment' for item in items):
+            spans = [(style.start, style.end)]
+        cuts.extend(line_span(content, start, end) for start, end in spans)
+
+    edit = doc.edit()
+    for start, end in cuts:
+        edit.replace(start, end, '')
+    for start, end, prelude in rewrites:
+        if not any(cut_start <= start < cut_end for cut_start, cut_end in cuts):
+            edit.replace(start, end, prelude)
+
+    new_content = edit.render()
+    stats['bytes'] = len(content.encode('utf-8')) - len(new_content.encode('utf-8'))
+    return new_content, stats
@@ -0,0 +1,201 @@
+"""
+Fused pipeline runner: one read and at most one write per page for any set of stages
+"""
+
+import os
+import time
+
+from patterns import REGISTRY
+from sitecore import find_html_files
+from .cache import content_hash
+from .parallel import run_parallel
+from .stages import get_stages
+from .transaction import Transaction, write_text
+
+class StageStats:
+    """Per-stage totals across a run"""
+
+    def __init__(self, name):
+        self.name = name
+        self.seconds = 0.0
+        self.files_changed = 0
+        self.changes = 0
+        self.errors = 0
+
+class PipelineResult:
+    """Outcome of a pipeline run"""
+
+    def __init__(self, stages):
+        self.stage_stats = {stage.name: StageStats(stage.name) for stage in stages}
+        self.files_processed = 0
+        self.files_skipped = 0
+        self.files_written = []
+        self.changes = {}
+        self.errors = []
+        self.seconds = 0.0
+        self.run_id = None
+        self.dry_run = False
+
+def process_page(stages, content, file_path, root='.'):
+    """Stream one page of the site at root through every stage in memory
+
+    Returns (content, stage_results) where stage_results is a list of
+    (stage_name, seconds, changed, changes, error) tuples in stage order.
+    """
+    stage_results = []
+
+    for stage in stages:
+        if not stage.applies_to(file_path):
+            continue
+
+        start = time.perf_counter()
+        try:
+            new_content, changes = stage.apply(content, file_path, root)
+            error = None
+        except Exception as e:
+            new_content, changes, error = content, [], str(e)
+        elapsed = time.perf_counter() - start
+
+        changed = new_content != content
+        stage_results.append((stage.name, elapsed, changed, changes, error))
+        content = new_content
+
+    return content, stage_results
+
+def record_page(result, file_path, stage_results):
+    """Fold one page's stage results into the run totals"""
+    result.files_processed += 1
+    page_changes = []
+
+    for stage_name, elapsed, changed, changes, error in stage_results:
+        stats = result.stage_stats[stage_name]
+        stats.seconds += elapsed
+        if error:
+            stats.errors += 1
+            result.errors.append((file_path, stage_name, error))
+        if changed:
+            stats.files_changed += 1
+            stats.changes += len(changes)
+            page_changes.extend(f'[{stage_name}] {change}' for change in changes)
+
+    if page_changes:
+        result.changes[file_path] = page_changes
+    return page_changes
+
+def _pipeline_task(task):
+    """Worker entry point: run the named stages over one page's content"""
+    stage_names, root, file_path, content = task
+    with REGISTRY.file_scope(file_path):
+        new_content, stage_results = process_page(get_stages(stage_names), content, file_path, root)
+    return (new_content if new_content != content else None), stage_results
+
+def run_pipeline(stages, root='.', files=None, cache=None, jobs=1, dry_run=None):
+    """Read each page once, run all stages over it, and write it back only if it changed
+
+    With a BuildCache, pages whose content and stage fingerprints match the
+    manifest are skipped without running any stage. With jobs > 1 the stage
+    work is spread over a process pool; reads, writes and the manifest stay
+    in this process and results are applied in file order. All writes go
+    through one Transaction: either every changed page is swapped in, or
+    (on an exception) none is. With dry_run ('stat' or 'diff') nothing is
+    written and the cache is left as it was; the changes are reported instead.
+    """
+    start = time.perf_counter()
+    result = PipelineResult(stages)
+    result.dry_run = bool(dry_run)
+    html_files = files if files is not None else find_html_files(root)
+    fingerprints = {stage.name: stage.fingerprint(root) for stage in stages} if cache else None
+    stage_names = [stage.name for stage in stages]
+
+    pending = []
+    digests = {}
+    for file_path in html_files:
+        full_path = os.path.join(root, file_path)
+
+        if cache and cache.is_fresh_stat(file_path, os.stat(full_path), fingerprints):
+            result.files_skipped += 1
+            continue
+
+        with open(full_path, 'r', encoding='utf-8') as f:
+            content = f.read()
+
+        if cache:
+            digest = digests[file_path] = content_hash(content)
+            if cache.is_fresh(file_path, digest, fingerprints):
+                # Touched but unchanged: refresh size/mtime so the next run skips the read
+                cache.record(file_path, digest, os.stat(full_path), fingerprints, content_changed=False)
+                result.files_skipped += 1
+                continue
+
+        pending.append((stage_names, root, file_path, content))
+
+    # Pages only change on disk when the transaction commits, so cache entries wait for it
+    to_record = []
+    with Transaction('sitepipeline ' + ','.join(stage_names), root=root, verbose=False, dry_run=dry_run) as tx:
+        for (_, _, file_path, _), outcome, error in run_parallel(_pipeline_task, pending, jobs=jobs):
+            full_path = os.path.join(root, file_path)
+            if error:
+                result.files_processed += 1
+                result.errors.append((file_path, 'pipeline', error))
+                if cache:
+                    cache.forget(file_path)
+                continue
+
+            new_content, stage_results = outcome
+            page_changes = record_page(result, file_path, stage_results)
+
+            if new_content is not None:
+                write_text(full_path, new_content, page_changes)
+                result.files_written.append(file_path)
+
+            if cache:
+                failed = any(stage_error for _, _, _, _, stage_error in stage_results)
+                if failed:
+                    cache.forget(file_path)
+                else:
+                    digest = content_hash(new_content) if new_content is not None else digests[file_path]
+                    to_record.append((file_path, digest, new_content is not None))
+
+    if tx.files:
+        result.run_id = tx.run_id
+
+    if dry_run:
+        result.seconds = time.perf_counter() - start
+        return result
+
+    for file_path, digest, content_changed in to_record:
+        cache.record(file_path, digest, os.stat(os.path.join(root, file_path)), fingerprints, content_changed)
+
+    if cache:
+        cache.save()
+
+    result.seconds = time.perf_counter() - start
+    return result
+
+def print_report(result):
+    """Per-stage timing and changed-file counts"""
+    print("\n" + "=" * 60)
+    print("SITE PIPELINE SUMMARY")
+    print("=" * 60)
+    print(f"\n{'Stage':<20} {'Time (s)':>10} {'Files changed':>15} {'Errors':>8}")
+    for stats in result.stage_stats.values():
+        print(f"{stats.name:<20} {stats.seconds:>10.3f} {stats.files_changed:>15} {stats.errors:>8}")
+
+    print(f"\nFiles processed: {result.files_processed}")
+    print(f"Files skipped (cached): {result.files_skipped}")
+    print(f"Files {'that would be ' if result.dry_run else ''}written: {len(result.files_written)}")
+    print(f"Total time: {result.seconds:.2f}s (stage time is summed across workers)")
+    if result.run_id:
+        print(f"Snapshot: run {result.run_id} (undo with: python -m sitepipeline restore --run {result.run_id})")
+
+    if result.files_written:
+        print("\nModified files (first 10):")
+        for file_path in result.files_written[:10]:
+            print(f"  - {file_path}")
+        if len(result.files_written) > 10:
+            print(f"  ... and {len(result.files_written) - 10} more files")
+
+    if result.errors:
+        print("\nErrors:")
+        for file_path, stage_name, error in result.errors:
+            print(f"  - {file_path} [{stage_name}]: {error}")
@@ -0,0 +1,116 @@
+"""
+Selector matching against a page's markup without a browser
+A selector matches when each of its compound parts matches some element; how those elements are related is
+not checked, and syntax this does not model counts as a match, so every answer errs toward "may match"
+"""
+
+import re
+
+# States that cannot apply before the visitor interacts with the page
+INTERACTION_PSEUDO_CLASSES = {'hover', 'focus', 'active', 'focus-within', 'focus-visible', 'visited'}
+
+COMPOUND_PART_PATTERN = re.compile(r'''
+    (?P<tag>[a-zA-Z][\w-]*|\*)
+  | \.(?P<class>[\w-]+)
+  | \#(?P<id>[\w-]+)
+  | \[\s*(?P<attr>[\w-]+)\s*(?:[~|^$*]?=\s*(?P<value>"[^"]*"|'[^']*'|[^\]\s]*)\s*(?:[iIsS]\s*)?)?\]
+  | ::?(?P<pseudo>[\w-]+)(?P<args>\((?:[^()]|\([^()]*\))*\))?
+''', re.VERBOSE)
+
+def compounds(selector):
+    """'nav > ul li.active' -> ['nav', 'ul', 'li.active']: the parts between combinators"""
+    parts = []
+    depth = 0
+    current = ''
+    for char in selector:
+        if char in '([':
+            depth += 1
+        elif char in ')]':
+            depth -= 1
+        if depth == 0 and (char.isspace() or char in '>+~'):
+            if current:
+                parts.append(current)
+            current = ''
+        else:
+            current += char
+    if current:
+        parts.append(current)
+    return parts
+
+def parse_compound(compound):
+    """(tag, classes, id, attributes, pseudos) for 'a.btn#buy[href]:hover', or None for syntax this does not model"""
+    tag, classes, element_id, attributes, pseudos = None, set(), None, set(), set()
+    position = 0
+    for match in COMPOUND_PART_PATTERN.finditer(compound):
+        if match.start() != position or (match.group('tag') and position):
+            return None
+        position = match.end()
+        if match.group('tag'):
+            tag = match.group('tag').lower()
+        elif match.group('class'):
+            classes.add(match.group('class'))
+        elif match.group('id'):
+            element_id = match.group('id')
+        elif match.group('attr'):
+            attributes.add(match.group('attr').lower())
+        else:
+            pseudos.add(match.group('pseudo').lower())
+    return (tag, classes, element_id, attributes, pseudos) if position == len(compound) else None
+
+class SelectorIndex:
+    """Tags, classes, ids and attributes of a set of elements, indexed once per page
+
+    dynamic holds names scripts may add at runtime (class, id or attribute names);
+    names ending in '-' are prefixes, for scripts that build class names by concatenation.
+    """
+
+    def __init__(self, nodes, dynamic=()):
+        self.elements = []
+        self.by_class = {}
+        self.by_id = {}
+        self.by_tag = {}
+        self.dynamic = {name for name in dynamic if not name.endswith('-')}
+        self.dynamic_prefixes = tuple(name for name in dynamic if name.endswith('-'))
+        for node in nodes:
+            entry = (node.tag, set((node.get('class') or '').split()), node.get('id'), set(node.attrs))
+            self.elements.append(entry)
+            for name in entry[1]:
+                self.by_class.setdefault(name, []).append(entry)
+            if entry[2]:
+                self.by_id.setdefault(entry[2], []).append(entry)
+            self.by_tag.setdefault(node.tag, []).append(entry)
+
+    def is_dynamic(self, name):
+        return name in self.dynamic or name.startswith(self.dynamic_prefixes)
+
+    def matches_compound(self, compound, interactive=True):
+        """Whether some element can match compound; interactive=False treats :hover and friends as never matching"""
+        parsed = parse_compound(compound)
+        if parsed is None:
+            return True
+        tag, classes, element_id, attributes, pseudos = parsed
+        if not interactive and pseudos & INTERACTION_PSEUDO_CLASSES:
+            return False
+        # Anything a script may add could end up on any element
+        classes = {name for name in classes if not self.is_dynamic(name)}
+        attributes = {name for name in attributes if not self.is_dynamic(name)}
+        if element_id and self.is_dynamic(element_id):
+            element_id = None
+        if tag == '*':
+            tag = None
+
+        if element_id:
+            candidates = self.by_id.get(element_id, [])
+        elif classes:
+            candidates = self.by_class.get(next(iter(classes)), [])
+        elif tag:
+            candidates = self.by_tag.get(tag, [])
+        else:
+            candidates = self.elements
+        return any((not tag or tag == node_tag) and classes <= node_classes
+                   and (not element_id or element_id == node_id) and attributes <= node_attributes
+                   for node_tag, node_classes, node_id, node_attributes in candidates)
+
+    def matches(self, selector, interactive=True):
+        parts = compounds(selector)
+        return bool(parts) and all(self.matches_compound(part, interactive) for part in parts)
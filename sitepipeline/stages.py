@@ -0,0 +1,210 @@
+"""
+Stage registry for the fused maintenance pipeline
+Each stage wraps one script's per-file transform as content in, content out
+"""
+
+import ast
+import hashlib
+import json
+import os
+
+import linkgraph
+import sitecore
+from sitecore import load_script
+from .assets import MANIFEST_FILE, load_manifest
+from .images import IMAGE_MANIFEST_FILE, load_image_manifest
+
+SITE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def _module_file(name, package=None):
+    """Site-local file behind an imported module name (sitepipeline.lcp, .css, sitecore), or None"""
+    if name.startswith('.'):
+        name = f"{package}{name}" if name.strip('.') else package
+    path = os.path.join(SITE_ROOT, *name.split('.'))
+    for candidate in (f'{path}.py', os.path.join(path, '__init__.py')):
+        if os.path.isfile(candidate):
+            return candidate
+    return None
+
+def source_files(path):
+    """path plus every site-local module it imports, directly or through another one, sorted
+
+    Found by reading import statements, so a helper the stage reaches through a shared module
+    (implement-technical-seo.py -> sitepipeline/lcp.py -> sitepipeline/images.py) counts as well.
+    """
+    found = set()
+    pending = [os.path.abspath(path)]
+    while pending:
+        file_path = pending.pop()
+        if file_path in found:
+            continue
+        found.add(file_path)
+        with open(file_path, 'r', encoding='utf-8') as f:
+            tree = ast.parse(f.read(), file_path)
+        package = os.path.relpath(os.path.dirname(file_path), SITE_ROOT).replace(os.sep, '.')
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                names = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom):
+                base = '.' * node.level + (node.module or '')
+                # from sitepipeline import lcp imports a submodule, from .assets import x a module
+                names = [base] + [f"{base}{'' if base.endswith('.') else '.'}{alias.name}" for alias in node.names]
+            else:
+                continue
+            for name in names:
+                module_file = _module_file(name, package)
+                # A package's __init__ only re-exports; the submodules the stage really uses are followed instead
+                if module_file and not module_file.endswith('__init__.py'):
+                    pending.append(module_file)
+    return sorted(found)
+
+class Stage:
+    """A named per-file transform backed by one of the maintenance scripts"""
+
+    def __init__(self, name, script, description, transform, skip_files=(), config=(), version=1, inputs=()):
+        self.name = name
+        self.script = script
+        self.description = description
+        self.transform = transform
+        self.skip_files = set(skip_files)
+        self.config = tuple(config)
+        self.version = version
+        self.inputs = tuple(inputs)
+        self._module = None
+        self._fingerprint = None
+
+    @property
+    def module(self):
+        """The backing script, imported on first use and kept warm afterwards"""
+        if self._module is None:
+            self._module = load_script(self.script)
+        return self._module
+
+    def fingerprint(self, root='.'):
+        """Hash of the stage version, its config values, the code behind it and its input files under root
+
+        Any change to the rules (APP_REVIEWS, NAVIGATION_HTML, ...), to the
+        script or any site module it imports (sitecore, linkgraph, the
+        sitepipeline helpers, patterns), or to an input such as the site's
+        asset manifest changes the fingerprint, which marks every cached page
+        stale for this stage.
+        """
+        if self._fingerprint is None:
+            digest = hashlib.sha256(f'{self.name}:{self.version}'.encode('utf-8'))
+            for name in self.config:
+                value = getattr(self.module, name)
+                digest.update(name.encode('utf-8'))
+                digest.update(json.dumps(value, sort_keys=True, default=repr).encode('utf-8'))
+            sources = set(source_files(self.module.__file__)) | {sitecore.__file__, linkgraph.__file__}
+            for source_path in sorted(sources):
+                with open(source_path, 'rb') as f:
+                    digest.update(f.read())
+            self._fingerprint = digest.hexdigest()[:16]
+        if not self.inputs:
+            return self._fingerprint
+        # Read on every run: a rebuilt manifest must mark pages stale without a restart
+        digest = hashlib.sha256(self._fingerprint.encode('utf-8'))
+        for name in self.inputs:
+            digest.update(name.encode('utf-8'))
+            try:
+                with open(os.path.join(root, name), 'rb') as f:
+                    digest.update(f.read())
+            except OSError:
+                digest.update(b'missing')
+        return digest.hexdigest()[:16]
+
+    def applies_to(self, file_path):
+        return file_path.split('/')[-1] not in self.skip_files and file_path not in self.skip_files
+
+    def apply(self, content, file_path, root='.'):
+        """Run the transform on a page of the site at root; returns (content, changes)"""
+        return self.transform(self.module, content, file_path, root)
+
+STAGES = {}
+
+# Order used by `run all`: structure first, then SEO and links, then injected scripts
+DEFAULT_ORDER = []
+
+def register_stage(name, script, description, skip_files=(), config=(), version=1, inputs=()):
+    def decorator(func):
+        STAGES[name] = Stage(name, script, description, func, skip_files, config, version, inputs)
+        DEFAULT_ORDER.append(name)
+        return func
+    return decorator
+
+def get_stages(names):
+    """Resolve a comma-separated list (or 'all') into Stage objects, in the given order"""
+    if isinstance(names, str):
+        names = [name.strip() for name in names.split(',') if name.strip()]
+    if names == ['all']:
+        names = DEFAULT_ORDER
+
+    unknown = [name for name in names if name not in STAGES]
+    if unknown:
+        raise KeyError(f"Unknown stage(s): {', '.join(unknown)}. Available: {', '.join(STAGES)}")
+    return [STAGES[name] for name in names]
+
+@register_stage('navigation', 'fix_all_navigation.py',
+                'Global navigation HTML, shared navigation CSS/mobile JS tags and affiliate disclosure placement',
+                config=('NAVIGATION_HTML',), version=2, inputs=(MANIFEST_FILE,))
+def navigation_stage(module, content, file_path, root):
+    if module.has_complete_navigation(content):
+        return content, []
+    new_content = module.add_navigation_to_content(content, load_manifest(root))
+    return new_content, ['Added complete navigation'] if new_content != content else []
+
+# Before seo, so the LCP preload seo writes matches the <picture> the browser actually fetches from
+@register_stage('images', 'build-images.py',
+                'Local <img> tags wrapped in <picture> with AVIF/WebP srcsets, intrinsic width/height',
+                version=2, inputs=(IMAGE_MANIFEST_FILE,))
+def images_stage(module, content, file_path, root):
+    new_content, stats = module.rewrite_page_images(content, file_path, load_image_manifest(root))
+    return new_content, [f"Wrapped {stats['pictures']} images in <picture>"] if new_content != content else []
+
+@register_stage('seo', 'implement-technical-seo.py',
+                'Meta tags, canonical, Open Graph/Twitter, image and external link attributes',
+                version=2)
+def seo_stage(module, content, file_path, root):
+    return module.TechnicalSEOOptimizer().optimize_content(content, file_path)
+
+@register_stage('linking', 'implement-internal-linking.py',
+                'Phase 2 linking: breadcrumbs, category links, app names, related reviews',
+                config=('APP_REVIEWS', 'CATEGORY_PAGES'))
+def linking_stage(module, content, file_path, root):
+    new_content = module.apply_internal_linking(content, file_path)
+    return new_content, ['Applied internal linking rules'] if new_content != content else []
+
+@register_stage('advanced-linking', 'implement-advanced-linking.py',
+                'Phase 3 linking: cross-category, store size, integrations, hub pages',
+                config=('CROSS_CATEGORY_LINKS', 'STORE_SIZE_LINKS', 'INTEGRATION_PATTERNS'))
+def advanced_linking_stage(module, content, file_path, root):
+    new_content = module.apply_advanced_linking(content, file_path)
+    return new_content, ['Applied advanced link patterns'] if new_content != content else []
+
+@register_stage('analytics', 'fix-analytics.py',
+                'GA placeholder IDs, duplicate gtag tags/configs, analytics-config.js',
+                version=2, inputs=(MANIFEST_FILE,))
+def analytics_stage(module, content, file_path, root):
+    return module.fix_analytics_content(content, load_manifest(root))
+
+@register_stage('email-capture', 'add-email-capture.py',
+                'email-capture.js before </body>',
+                skip_files=('building-shopify-empire-guide.html',),
+                version=2, inputs=(MANIFEST_FILE,))
+def email_capture_stage(module, content, file_path, root):
+    new_content, added = module.add_email_capture_to_content(content, load_manifest(root))
+    return new_content, ['Added email-capture.js'] if added else []
+
+@register_stage('cookie-consent', 'add-global-cookie-consent.py',
+                'Global cookie consent stylesheet and script',
+                version=2, inputs=(MANIFEST_FILE,))
+def cookie_consent_stage(module, content, file_path, root):
+    new_content = module.add_cookie_consent_to_content(content, load_manifest(root))
+    return new_content, ['Added cookie consent assets'] if new_content != content else []
+
+@register_stage('assets', 'build-assets.py',
+                'Script and stylesheet tags pointed at the fingerprinted asset copies',
+                version=2, inputs=(MANIFEST_FILE,))
+def assets_stage(module, content, file_path, root):
+    new_content, changed = module.rewrite_asset_references(content, load_manifest(root))
+    return new_content, [f'Rewrote {changed} asset references'] if changed else []
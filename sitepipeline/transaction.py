@@ -0,0 +1,375 @@
+"""
+Transactional writes for the maintenance scripts
+Pages are staged next to their targets and swapped in with os.replace on commit; each run leaves one compressed snapshot of what it replaced
+With --dry-run the staged pages are diffed against the originals and discarded instead
+"""
+
+import contextlib
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+import zipfile
+
+from .diffreport import DryRunReport
+
+SNAPSHOT_DIR = os.path.join('.sitecache', 'snapshots')
+
+# Set while a transaction is open so worker processes stage into the same run
+TRANSACTION_ENV = 'SITEPIPELINE_TRANSACTION'
+DRY_RUN_ENV = 'SITEPIPELINE_DRY_RUN'
+
+DRY_RUN_MODES = ('stat', 'diff')
+
+SNAPSHOT_VERSION = 1
+
+def blob_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+def staged_path(file_path, run_id):
+    """Hidden temp file beside the target, so the final os.replace never crosses filesystems"""
+    directory, name = os.path.split(os.path.abspath(file_path))
+    return os.path.join(directory, f'.{name}.{run_id}.tmp')
+
+def _ensure_directory(file_path):
+    """Create the target's directory, so a build can write into an output folder that doesn't exist yet"""
+    os.makedirs(os.path.dirname(os.path.abspath(file_path)), exist_ok=True)
+
+def _atomic_write_bytes(file_path, data):
+    _ensure_directory(file_path)
+    tmp_path = staged_path(file_path, f'{os.getpid()}')
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, file_path)
+
+def _journal(staging_dir, entry):
+    """Append one staged change; each process keeps its own journal so no locking is needed"""
+    with open(os.path.join(staging_dir, f'journal-{os.getpid()}.jsonl'), 'a', encoding='utf-8') as f:
+        f.write(json.dumps(entry) + '\n')
+
+def _stage_target(file_path):
+    """(staging_dir, temp path) for a write inside the open transaction, or None outside one"""
+    staging_dir = os.environ.get(TRANSACTION_ENV)
+    if not staging_dir:
+        return None
+    if os.environ.get(DRY_RUN_ENV):
+        # Dry runs never write inside the site tree, not even temp files
+        path = os.path.abspath(file_path)
+        return staging_dir, os.path.join(staging_dir, hashlib.sha1(path.encode('utf-8')).hexdigest())
+    _ensure_directory(file_path)
+    return staging_dir, staged_path(file_path, os.path.basename(staging_dir)[:-len('.staging')])
+
+def write_bytes(file_path, data, changes=()):
+    """Write a file through the open transaction, or atomically on its own when there is none
+
+    changes are the rule messages behind the edit; dry runs count them per rule.
+    """
+    target = _stage_target(file_path)
+    if not target:
+        _atomic_write_bytes(file_path, data)
+        return
+
+    staging_dir, tmp_path = target
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    _journal(staging_dir, {'path': os.path.abspath(file_path), 'staged': tmp_path, 'changes': list(changes)})
+
+@contextlib.contextmanager
+def open_text(file_path, changes=()):
+    """Like write_text, for output produced in pieces: yields a file to write to
+
+    The text is staged (or, outside a transaction, swapped in atomically)
+    only when the block exits cleanly; on an exception it is dropped.
+    """
+    target = _stage_target(file_path)
+    if not target:
+        _ensure_directory(file_path)
+    tmp_path = target[1] if target else staged_path(file_path, f'{os.getpid()}')
+    try:
+        with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+            yield f
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    if target:
+        _journal(target[0], {'path': os.path.abspath(file_path), 'staged': tmp_path, 'changes': list(changes)})
+    else:
+        os.replace(tmp_path, file_path)
+
+def write_text(file_path, content, changes=()):
+    write_bytes(file_path, content.encode('utf-8'), changes)
+
+def remove_file(file_path):
+    """Delete a file on commit (immediately when no transaction is open)"""
+    staging_dir = os.environ.get(TRANSACTION_ENV)
+    if not staging_dir:
+        os.remove(file_path)
+        return
+    _journal(staging_dir, {'path': os.path.abspath(file_path), 'staged': None, 'changes': []})
+
+def new_run_id():
+    now = time.time()
+    return f"{time.strftime('%Y%m%d-%H%M%S', time.localtime(now))}-{int(now * 1000) % 1000:03d}-{os.getpid()}"
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+def read_journals(staging_dir):
+    """{absolute path: journal entry}; 'staged' is the temp path, or None for a delete. Last write wins"""
+    entries = {}
+    for name in sorted(os.listdir(staging_dir)):
+        if not name.startswith('journal-'):
+            continue
+        with open(os.path.join(staging_dir, name), 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    entries[entry['path']] = entry
+    return entries
+
+def discard_staging(staging_dir):
+    """Drop an uncommitted run: its temp files and the staging directory"""
+    if os.path.isdir(staging_dir):
+        for entry in read_journals(staging_dir).values():
+            if entry['staged'] and os.path.exists(entry['staged']):
+                os.remove(entry['staged'])
+        shutil.rmtree(staging_dir, ignore_errors=True)
+
+def add_dry_run_argument(parser):
+    parser.add_argument('--dry-run', nargs='?', const='stat', choices=DRY_RUN_MODES,
+                        help="compute every change in memory and report it without writing: "
+                             "'stat' (default) for byte counts per file and rule, 'diff' for unified diffs too")
+
+def dry_run_mode(argv=None):
+    """Take --dry-run[=stat|diff] out of the command line; returns the mode or None
+
+    Lets every script's entry point open its Transaction in dry-run mode
+    without each script's own argument parsing having to know about it.
+    """
+    argv = sys.argv if argv is None else argv
+    mode = None
+    for index in range(len(argv) - 1, 0, -1):
+        arg = argv[index]
+        if arg == '--dry-run':
+            mode = mode or 'stat'
+            if index + 1 < len(argv) and argv[index + 1] in DRY_RUN_MODES:
+                mode = argv.pop(index + 1)
+            argv.pop(index)
+        elif arg.startswith('--dry-run='):
+            mode = arg.split('=', 1)[1]
+            if mode not in DRY_RUN_MODES:
+                raise SystemExit(f"--dry-run must be one of: {', '.join(DRY_RUN_MODES)}")
+            argv.pop(index)
+    return mode
+
+class Transaction:
+    """All page writes made inside the block become visible together, or not at all
+
+    While open, write_text()/write_bytes()/remove_file() (from this process
+    or any worker it starts) only stage changes. On a clean exit the
+    originals of every changed file are packed into one deflated,
+    content-addressed snapshot (.sitecache/snapshots/<run>.zip) and then
+    each staged file is swapped in with os.replace. On an exception the
+    staged files are discarded and the site is left exactly as it was.
+    """
+
+    def __init__(self, label=None, root='.', verbose=True, dry_run=None):
+        self.label = label or os.path.basename(sys.argv[0] or 'python')
+        self.root = os.path.abspath(root)
+        self.verbose = verbose
+        self.run_id = new_run_id()
+        self.snapshot_dir = os.path.join(self.root, SNAPSHOT_DIR)
+        self.staging_dir = os.path.join(self.snapshot_dir, f'{self.run_id}.staging')
+        self.dry_run = dry_run
+        self.snapshot_path = None
+        self.files = []
+        self.report = None
+
+    def __enter__(self):
+        if os.environ.get(TRANSACTION_ENV):
+            raise RuntimeError("A transaction is already open in this process")
+        self.discard_stale()
+        os.makedirs(self.staging_dir)
+        os.environ[TRANSACTION_ENV] = self.staging_dir
+        if self.dry_run:
+            os.environ[DRY_RUN_ENV] = self.dry_run
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        os.environ.pop(TRANSACTION_ENV, None)
+        os.environ.pop(DRY_RUN_ENV, None)
+        succeeded = exc_type is None or (exc_type is SystemExit and exc.code in (None, 0))
+        if succeeded and self.dry_run:
+            self.report_dry_run()
+        elif succeeded:
+            self.commit()
+        else:
+            discard_staging(self.staging_dir)
+            if self.verbose:
+                print(f"\nTransaction {self.run_id} rolled back: no files were changed")
+        return False
+
+    def discard_stale(self):
+        """Clean up staging left behind by runs that died before committing"""
+        if not os.path.isdir(self.snapshot_dir):
+            return
+        for name in os.listdir(self.snapshot_dir):
+            if not name.endswith('.staging'):
+                continue
+            pid = name[:-len('.staging')].rsplit('-', 1)[-1]
+            if pid.isdigit() and not _pid_alive(int(pid)):
+                discard_staging(os.path.join(self.snapshot_dir, name))
+
+    def relative(self, path):
+        return os.path.relpath(path, self.root).replace(os.sep, '/')
+
+    def report_dry_run(self):
+        """Diff every staged page against what is on disk, print the report, and discard the staging"""
+        self.report = DryRunReport(self.label)
+        for path, entry in sorted(read_journals(self.staging_dir).items()):
+            before = after = b''
+            if os.path.exists(path):
+                with open(path, 'rb') as f:
+                    before = f.read()
+            if entry['staged']:
+                with open(entry['staged'], 'rb') as f:
+                    after = f.read()
+            if before == after:
+                continue
+            try:
+                self.report.add(self.relative(path), before.decode('utf-8'), after.decode('utf-8'),
+                                entry.get('changes', ()), with_diff=self.dry_run == 'diff')
+            except UnicodeDecodeError:
+                self.report.add_binary(self.relative(path), before, after, entry.get('changes', ()))
+        discard_staging(self.staging_dir)
+        self.report.print_report()
+
+    def commit(self):
+        """Snapshot the originals, then swap every staged file into place"""
+        changes = {path: entry['staged'] for path, entry in read_journals(self.staging_dir).items()}
+        manifest = {}
+        tmp_snapshot = os.path.join(self.snapshot_dir, f'{self.run_id}.zip.tmp')
+
+        with zipfile.ZipFile(tmp_snapshot, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+            stored = set()
+            for path, staged in sorted(changes.items()):
+                original = before = None
+                if os.path.exists(path):
+                    with open(path, 'rb') as f:
+                        original = f.read()
+                    before = blob_hash(original)
+
+                after = None
+                if staged:
+                    with open(staged, 'rb') as f:
+                        after = blob_hash(f.read())
+                if before == after:
+                    # Written back unchanged: nothing to swap or to undo
+                    if staged:
+                        os.remove(staged)
+                    continue
+
+                if before is not None and before not in stored:
+                    archive.writestr(f'objects/{before}', original)
+                    stored.add(before)
+                manifest[self.relative(path)] = {'before': before, 'after': after, 'path': path, 'staged': staged}
+
+            archive.writestr('manifest.json', json.dumps({
+                'version': SNAPSHOT_VERSION,
+                'run': self.run_id,
+                'label': self.label,
+                'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'files': {name: {'before': entry['before'], 'after': entry['after']}
+                          for name, entry in manifest.items()},
+            }, indent=1, sort_keys=True))
+
+        if manifest:
+            # The snapshot is complete on disk before the first page is replaced
+            self.snapshot_path = os.path.join(self.snapshot_dir, f'{self.run_id}.zip')
+            os.replace(tmp_snapshot, self.snapshot_path)
+        else:
+            os.remove(tmp_snapshot)
+
+        for name, entry in manifest.items():
+            if entry['staged']:
+                os.replace(entry['staged'], entry['path'])
+            else:
+                os.remove(entry['path'])
+            self.files.append(name)
+
+        shutil.rmtree(self.staging_dir, ignore_errors=True)
+
+        if self.verbose and self.files:
+            print(f"\nCommitted {len(self.files)} file(s) as run {self.run_id}; "
+                  f"undo with: python -m sitepipeline restore --run {self.run_id}")
+
+def snapshot_path(run_id, root='.'):
+    return os.path.join(os.path.abspath(root), SNAPSHOT_DIR, f'{run_id}.zip')
+
+def read_snapshot_manifest(path):
+    with zipfile.ZipFile(path) as archive:
+        return json.loads(archive.read('manifest.json'))
+
+def list_runs(root='.'):
+    """Manifests of every committed run, oldest first"""
+    directory = os.path.join(os.path.abspath(root), SNAPSHOT_DIR)
+    if not os.path.isdir(directory):
+        return []
+    return [read_snapshot_manifest(os.path.join(directory, name))
+            for name in sorted(os.listdir(directory)) if name.endswith('.zip')]
+
+def resolve_run(run_id, root='.'):
+    """Run id for 'latest', or the id itself once its snapshot is known to exist"""
+    if run_id == 'latest':
+        runs = list_runs(root)
+        if not runs:
+            raise FileNotFoundError("No snapshots have been recorded yet")
+        return runs[-1]['run']
+    if not os.path.exists(snapshot_path(run_id, root)):
+        raise FileNotFoundError(f"No snapshot for run {run_id!r} in {os.path.join(root, SNAPSHOT_DIR)}")
+    return run_id
+
+def restore_run(run_id, root='.', force=False, dry_run=None):
+    """Put back every file a run changed; returns (restored, skipped)
+
+    Only the files listed in the run's manifest are touched. A file edited
+    again since the run is skipped unless force is set. The restore itself
+    is a transaction, so it can be undone the same way.
+    """
+    run_id = resolve_run(run_id, root)
+    restored = []
+    skipped = []
+
+    with zipfile.ZipFile(snapshot_path(run_id, root)) as archive:
+        manifest = json.loads(archive.read('manifest.json'))
+        with Transaction(f'restore {run_id}', root=root, dry_run=dry_run) as tx:
+            for name, entry in sorted(manifest['files'].items()):
+                path = os.path.join(tx.root, name)
+                current = None
+                if os.path.exists(path):
+                    with open(path, 'rb') as f:
+                        current = blob_hash(f.read())
+
+                if current == entry['before']:
+                    continue
+                if current != entry['after'] and not force:
+                    skipped.append(name)
+                    continue
+
+                if entry['before'] is None:
+                    remove_file(path)
+                else:
+                    write_bytes(path, archive.read(f"objects/{entry['before']}"))
+                restored.append(name)
+
+    return restored, skipped
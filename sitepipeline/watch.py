@@ -0,0 +1,180 @@
+"""
+Watch mode: re-run the per-page stages on pages as they are saved
+Stages, compiled rules and the build cache stay warm in this process, so a save costs one page's transforms
+"""
+
+import os
+import time
+
+from sitecore import find_html_files
+from .cache import BuildCache
+from .runner import run_pipeline
+
+# What a writer saving a page wants re-applied straight away; every save re-runs them, so only stages
+# that leave their own output alone belong here (linking adds another contextual link each pass)
+DEFAULT_WATCH_STAGES = 'seo,email-capture,cookie-consent'
+
+# Run once through each stage at startup so lazily built matchers exist before the first save
+WARMUP_PAGE = '<html><head><title>warm</title></head><body><p>warm</p></body></html>'
+
+def is_site_page(file_path):
+    """Same rule as find_html_files, for a single root-relative path"""
+    parts = file_path.split('/')
+    return (file_path.endswith('.html')
+            and 'TEMPLATE' not in parts[-1].upper()
+            and not any(part.startswith('.') or part in ('node_modules', '__pycache__') for part in parts[:-1]))
+
+def stat_signature(full_path):
+    """(mtime_ns, size), or None when the file is gone"""
+    try:
+        stat = os.stat(full_path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+class PollingWatcher:
+    """Finds saved pages by comparing mtime and size across full-tree scans"""
+
+    name = 'polling'
+
+    def __init__(self, root, interval=0.5):
+        self.root = root
+        self.interval = interval
+        self.state = self.scan()
+
+    def scan(self):
+        return {file_path: stat_signature(os.path.join(self.root, file_path))
+                for file_path in find_html_files(self.root)}
+
+    def wait(self, timeout=None):
+        """Root-relative paths changed since the last call; empty if timeout passes first"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = self.interval if deadline is None else min(self.interval, deadline - time.monotonic())
+            if remaining > 0:
+                time.sleep(remaining)
+            current = self.scan()
+            changed = {file_path for file_path, signature in current.items() if self.state.get(file_path) != signature}
+            self.state = current
+            if changed or (deadline is not None and time.monotonic() >= deadline):
+                return changed
+
+    def close(self):
+        pass
+
+class InotifyWatcher:
+    """Kernel change notifications via the optional inotify_simple package (Linux only)"""
+
+    name = 'inotify'
+
+    def __init__(self, root):
+        import inotify_simple  # optional: polling is used when it is missing
+
+        self.flags = inotify_simple.flags
+        self.root = root
+        self.inotify = inotify_simple.INotify()
+        self.mask = self.flags.CLOSE_WRITE | self.flags.MOVED_TO | self.flags.CREATE
+        self.directories = {}
+        for dirpath, dirs, _ in os.walk(root):
+            dirs[:] = [d for d in dirs if not d.startswith('.') and d not in ('node_modules', '__pycache__')]
+            self.add_directory(dirpath)
+
+    def add_directory(self, dirpath):
+        self.directories[self.inotify.add_watch(dirpath, self.mask)] = dirpath
+
+    def wait(self, timeout=None):
+        changed = set()
+        events = self.inotify.read(timeout=None if timeout is None else int(timeout * 1000))
+        for event in events:
+            dirpath = self.directories.get(event.wd)
+            if dirpath is None or not event.name:
+                continue
+            full_path = os.path.join(dirpath, event.name)
+            if event.mask & self.flags.ISDIR:
+                if not event.name.startswith('.'):
+                    self.add_directory(full_path)
+                continue
+            file_path = os.path.relpath(full_path, self.root).replace(os.sep, '/')
+            if is_site_page(file_path):
+                changed.add(file_path)
+        return changed
+
+    def close(self):
+        self.inotify.close()
+
+def make_watcher(root, interval=0.5, use_inotify=True):
+    if use_inotify:
+        try:
+            return InotifyWatcher(root)
+        except (ImportError, OSError):
+            pass
+    return PollingWatcher(root, interval)
+
+def warm_stages(stages):
+    """Import every stage's script and hash its rules now, so the first save is as fast as the rest"""
+    for stage in stages:
+        stage.module
+        stage.fingerprint()
+        try:
+            stage.apply(WARMUP_PAGE, 'index.html')
+        except Exception:
+            pass  # a real page will surface the error with its path
+
+def collect_batch(watcher, debounce):
+    """Block until pages change, then keep gathering until debounce seconds pass without a new save"""
+    batch = set(watcher.wait())
+    while True:
+        more = watcher.wait(timeout=debounce)
+        if not more:
+            return batch
+        batch |= more
+
+def watch(stages, root='.', interval=0.5, debounce=0.3, use_inotify=True, max_batches=None):
+    """Apply stages to each page when it is saved; runs until interrupted (or max_batches batches)
+
+    Pages rewritten by the stages themselves are not picked up again: their
+    post-commit signature is remembered and matching events are dropped.
+    """
+    warm_stages(stages)
+    cache = BuildCache(root)
+    watcher = make_watcher(root, interval, use_inotify)
+    known = {file_path: stat_signature(os.path.join(root, file_path)) for file_path in find_html_files(root)}
+
+    print(f"Watching {len(known)} pages under {os.path.abspath(root)} ({watcher.name}); "
+          f"stages: {', '.join(stage.name for stage in stages)}. Ctrl+C to stop.")
+
+    batches = 0
+    try:
+        while max_batches is None or batches < max_batches:
+            batch = collect_batch(watcher, debounce)
+
+            changed = []
+            for file_path in sorted(batch):
+                signature = stat_signature(os.path.join(root, file_path))
+                if signature is not None and signature != known.get(file_path):
+                    known[file_path] = signature
+                    changed.append(file_path)
+            if not changed:
+                continue
+
+            start = time.perf_counter()
+            result = run_pipeline(stages, root=root, files=changed, cache=cache)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            batches += 1
+
+            for file_path in result.files_written:
+                known[file_path] = stat_signature(os.path.join(root, file_path))
+
+            print(f"[{time.strftime('%H:%M:%S')}] {len(changed)} saved, {len(result.files_written)} updated "
+                  f"in {elapsed_ms:.1f} ms")
+            for file_path in changed:
+                changes = result.changes.get(file_path, [])
+                print(f"  - {file_path}: {', '.join(changes) if changes else 'up to date'}")
+            for file_path, stage_name, error in result.errors:
+                print(f"  ! {file_path} [{stage_name}]: {error}")
+            if result.run_id:
+                print(f"    undo: python -m sitepipeline restore --run {result.run_id}")
+    except KeyboardInterrupt:
+        print("\nStopped watching")
+    finally:
+        watcher.close()
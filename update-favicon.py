@@ -10,6 +10,8 @@ import re
 import sys
 from pathlib import Path
 
+from sitepipeline.transaction import Transaction, dry_run_mode, write_text
+
 # Configuration
 target_directory = "."
 new_favicon_url = "https://imagedelivery.net/mYndgAUf_CYgFA1HoO_-GQ/43e7272a-fb53-44aa-f0f2-7656a83bc700/public"
@@ -66,8 +68,7 @@ def process_html_file(file_path):
 
         if updated:
             # Write updated content back to file
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(new_content)
+            write_text(file_path, new_content)
             print(f"  - Updated favicon reference")
             return True
         else:
@@ -123,4 +124,5 @@ def main():
     print(f"New favicon URL: {new_favicon_url}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    with Transaction(dry_run=dry_run_mode()):
+        main()
\ No newline at end of file
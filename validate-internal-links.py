@@ -4,50 +4,44 @@ Quality Assurance Validation for Internal Linking Implementation
 Following internal-linking-implementation.md quality checklist
 """
 
-import os
 import re
+import sys
 import glob
+import json
+import bisect
+import argparse
 from urllib.parse import urljoin, urlparse
 from collections import defaultdict, Counter
+from contextlib import redirect_stdout
 
-def extract_internal_links(content, file_path):
-    """Extract all internal links from HTML content"""
+from sitecore import read_document
+from linkgraph import LinkGraph, extract_links, page_route, route_exists
+from sitepipeline.parallel import add_jobs_argument, run_parallel
+
+def extract_internal_links(doc, file_path):
+    """Extract all internal links from a parsed page"""
     links = []
 
-    # Find all href attributes
-    link_pattern = r'<a[^>]+href=["\']([^"\']+)["\'][^>]*>(.*?)</a>'
-    matches = re.findall(link_pattern, content, re.DOTALL | re.IGNORECASE)
+    for anchor in doc.anchors:
+        href = anchor.get('href')
+        if not href:
+            continue
 
-    for href, anchor_text in matches:
         # Skip external links, mailto, tel, etc.
         if href.startswith(('http://', 'https://', 'mailto:', 'tel:', '#')):
             continue
 
-        # Clean anchor text
-        anchor_text = re.sub(r'<[^>]+>', '', anchor_text).strip()
-
         links.append({
             'url': href,
-            'anchor_text': anchor_text,
+            'anchor_text': doc.text_of(anchor),
             'source_file': file_path
         })
 
     return links
 
-def check_link_exists(url):
-    """Check if target file exists for internal link"""
-    # Convert URL to file path
-    if url.startswith('/'):
-        url = url[1:]  # Remove leading slash
-
-    # Handle index.html default
-    if url.endswith('/'):
-        url += 'index.html'
-    elif not url.endswith('.html'):
-        url += '/index.html'
-
-    file_path = url.replace('/', os.sep)
-    return os.path.exists(file_path)
+def check_link_exists(url, source_file='index.html'):
+    """Check if target page exists for internal link (O(1) lookup in the site route set)"""
+    return route_exists(url, page_route(source_file))
 
 def analyze_anchor_text_quality(anchor_text):
     """Analyze anchor text for quality and variety"""
@@ -77,17 +71,20 @@ def analyze_anchor_text_quality(anchor_text):
 
     return quality_score, issues
 
-def check_link_density(content):
+def check_link_density(doc):
     """Check link density per content section"""
-    # Remove script, style, and other non-content tags
-    content_only = re.sub(r'<(script|style|nav|header|footer)[^>]*>.*?</\1>', '', content, flags=re.DOTALL | re.IGNORECASE)
+    # Leave out script, style, and other non-content regions
+    excluded = doc.spans(('script', 'style', 'nav', 'header', 'footer'))
 
     # Count words
-    text_content = re.sub(r'<[^>]+>', '', content_only)
+    text_content = re.sub(r'<[^>]+>', '', doc.text_outside(excluded))
     words = len(text_content.split())
 
-    # Count internal links
-    internal_links = len(re.findall(r'<a[^>]+href=["\'][^"\']*["\'][^>]*>', content_only))
+    # Count links that sit in the content regions
+    internal_links = sum(
+        1 for anchor in doc.anchors
+        if 'href' in anchor.attrs and not in_spans(anchor.start, excluded)
+    )
 
     if words > 0:
         link_density = (internal_links / words) * 1000  # Links per 1000 words
@@ -95,47 +92,58 @@ def check_link_density(content):
     else:
         return 0, internal_links, words
 
-def validate_content_flow(content):
+def in_spans(offset, spans):
+    """True when offset falls inside one of the sorted, merged spans"""
+    index = bisect.bisect_right(spans, (offset, float('inf'))) - 1
+    return index >= 0 and offset < spans[index][1]
+
+def validate_content_flow(doc):
     """Check that links don't disrupt content flow"""
     issues = []
 
     # Check for links in headings (should be minimal)
-    heading_links = re.findall(r'<h[1-6][^>]*>.*?<a[^>]*>.*?</a>.*?</h[1-6]>', content, re.DOTALL)
+    heading_links = [heading for heading in doc.headings if doc.find_within(heading, 'a')]
     if len(heading_links) > 2:
         issues.append(f"Too many links in headings ({len(heading_links)})")
 
     # Check for paragraph with too many links
-    paragraphs = re.findall(r'<p[^>]*>(.*?)</p>', content, re.DOTALL)
-    for i, para in enumerate(paragraphs):
-        para_links = len(re.findall(r'<a[^>]+href=', para))
+    for i, para in enumerate(doc.paragraphs):
+        para_links = sum(1 for anchor in doc.find_within(para, 'a') if 'href' in anchor.attrs)
         if para_links > 2:
             issues.append(f"Paragraph {i+1} has {para_links} links (max recommended: 1)")
 
     # Check for consecutive links (might be spammy)
-    consecutive_links = re.findall(r'</a>\s*<a[^>]+href=', content)
-    if len(consecutive_links) > 3:
-        issues.append(f"Too many consecutive links ({len(consecutive_links)})")
+    consecutive_links = 0
+    previous = None
+    for anchor in doc.anchors:
+        if previous is not None and 'href' in anchor.attrs and not doc.text[previous.end:anchor.start].strip():
+            consecutive_links += 1
+        previous = anchor
+    if consecutive_links > 3:
+        issues.append(f"Too many consecutive links ({consecutive_links})")
 
     return issues
 
 def analyze_single_file(file_path):
     """Analyze a single HTML file for link quality"""
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
+        # Tokenize once; every check below queries the same node index
+        doc = read_document(file_path)
 
         results = {
             'file': file_path,
-            'links': extract_internal_links(content, file_path),
-            'link_density': check_link_density(content),
-            'content_flow_issues': validate_content_flow(content),
+            'links': extract_internal_links(doc, file_path),
+            # Graph edges from the same parse, so the link graph never reads the page again
+            'edges': extract_links(doc, page_route(file_path)),
+            'link_density': check_link_density(doc),
+            'content_flow_issues': validate_content_flow(doc),
             'broken_links': [],
             'anchor_text_issues': []
         }
 
         # Check for broken links
         for link in results['links']:
-            if not check_link_exists(link['url']):
+            if not check_link_exists(link['url'], file_path):
                 results['broken_links'].append(link)
 
         # Analyze anchor text quality
@@ -154,12 +162,105 @@ def analyze_single_file(file_path):
     except Exception as e:
         return {'file': file_path, 'error': str(e)}
 
-def generate_quality_report(all_results):
+class QualityReport:
+    """Running totals for the quality report, updated one page result at a time
+
+    Only counters are kept, never the per-page result dicts, so memory stays
+    flat however many pages are analyzed.
+    """
+
+    def __init__(self):
+        self.total_files = 0
+        self.total_links = 0
+        self.broken_links = 0
+        self.files_with_issues = 0
+        self.high_density_files = 0
+        self.low_density_files = 0
+        self.anchor_text_counter = Counter()
+        self.generic_anchors = 0
+        self.broken_urls = Counter()
+        self.total_flow_issues = 0
+
+    def add(self, result):
+        self.total_files += 1
+        self.total_links += len(result.get('links', []))
+        self.broken_links += len(result.get('broken_links', []))
+        if result.get('content_flow_issues', []) or result.get('anchor_text_issues', []):
+            self.files_with_issues += 1
+
+        if 'link_density' in result:
+            density, links, words = result['link_density']
+            if density > 8:  # More than 8 links per 1000 words
+                self.high_density_files += 1
+            elif density < 2:  # Less than 2 links per 1000 words
+                self.low_density_files += 1
+
+        for link in result.get('links', []):
+            self.anchor_text_counter[link['anchor_text'].lower()] += 1
+            if any(generic in link['anchor_text'].lower() for generic in ['click here', 'read more', 'here']):
+                self.generic_anchors += 1
+
+        for link in result.get('broken_links', []):
+            self.broken_urls[link['url']] += 1
+
+        self.total_flow_issues += len(result.get('content_flow_issues', []))
+
+    @property
+    def quality_score(self):
+        return max(0, 100 - (self.broken_links / max(self.total_links, 1) * 100)
+                   - (self.files_with_issues / max(self.total_files, 1) * 20))
+
+    def summary(self, graph=None, threshold=75):
+        """Aggregate record written after the last page"""
+        summary = {
+            'type': 'summary',
+            'files_analyzed': self.total_files,
+            'total_links': self.total_links,
+            'broken_links': self.broken_links,
+            'files_with_issues': self.files_with_issues,
+            'high_density_files': self.high_density_files,
+            'low_density_files': self.low_density_files,
+            'unique_anchor_texts': len(self.anchor_text_counter),
+            'repeated_anchor_texts': sum(1 for count in self.anchor_text_counter.values() if count > 5),
+            'generic_anchor_texts': self.generic_anchors,
+            'top_broken_urls': self.broken_urls.most_common(10),
+            'content_flow_issues': self.total_flow_issues,
+            'quality_score': round(self.quality_score, 1),
+            'threshold': threshold,
+            'passed': self.quality_score >= threshold,
+        }
+        if graph is not None:
+            summary['orphan_pages'] = graph.orphans()
+        return summary
+
+def page_record(result):
+    """One NDJSON line per analyzed page"""
+    record = {'type': 'page', 'file': result['file']}
+    if 'error' in result:
+        record['error'] = result['error']
+        return record
+
+    density, links, words = result['link_density']
+    record.update({
+        'links': len(result['links']),
+        'words': words,
+        'link_density': round(density, 2),
+        'broken_links': [{'url': link['url'], 'anchor_text': link['anchor_text']} for link in result['broken_links']],
+        'content_flow_issues': result['content_flow_issues'],
+        'anchor_text_issues': result['anchor_text_issues'],
+    })
+    return record
+
+def generate_quality_report(all_results, graph=None):
     """Generate comprehensive quality assurance report"""
-    total_files = len(all_results)
-    total_links = sum(len(r.get('links', [])) for r in all_results)
-    broken_links = sum(len(r.get('broken_links', [])) for r in all_results)
-    files_with_issues = sum(1 for r in all_results if r.get('content_flow_issues', []) or r.get('anchor_text_issues', []))
+    if isinstance(all_results, QualityReport):
+        report = all_results
+    else:
+        report = QualityReport()
+        for result in all_results:
+            report.add(result)
+
+    total_files = report.total_files
 
     print("\n" + "="*60)
     print("INTERNAL LINKING QUALITY ASSURANCE REPORT")
@@ -167,62 +268,45 @@ def generate_quality_report(all_results):
 
     print(f"\n📊 OVERVIEW:")
     print(f"   Files analyzed: {total_files}")
-    print(f"   Total internal links: {total_links}")
-    print(f"   Broken links: {broken_links}")
-    print(f"   Files with quality issues: {files_with_issues}")
+    print(f"   Total internal links: {report.total_links}")
+    print(f"   Broken links: {report.broken_links}")
+    print(f"   Files with quality issues: {report.files_with_issues}")
 
     # Link density analysis
     print(f"\n🔗 LINK DENSITY ANALYSIS:")
-    high_density_files = 0
-    low_density_files = 0
-
-    for result in all_results:
-        if 'link_density' in result:
-            density, links, words = result['link_density']
-            if density > 8:  # More than 8 links per 1000 words
-                high_density_files += 1
-            elif density < 2:  # Less than 2 links per 1000 words
-                low_density_files += 1
-
-    print(f"   High density files (>8 links/1000 words): {high_density_files}")
-    print(f"   Low density files (<2 links/1000 words): {low_density_files}")
-    print(f"   Optimal density files: {total_files - high_density_files - low_density_files}")
+    print(f"   High density files (>8 links/1000 words): {report.high_density_files}")
+    print(f"   Low density files (<2 links/1000 words): {report.low_density_files}")
+    print(f"   Optimal density files: {total_files - report.high_density_files - report.low_density_files}")
 
     # Anchor text analysis
     print(f"\n📝 ANCHOR TEXT QUALITY:")
-    anchor_text_counter = Counter()
-    generic_anchors = 0
-
-    for result in all_results:
-        for link in result.get('links', []):
-            anchor_text_counter[link['anchor_text'].lower()] += 1
-            if any(generic in link['anchor_text'].lower() for generic in ['click here', 'read more', 'here']):
-                generic_anchors += 1
-
-    repeated_anchors = sum(1 for count in anchor_text_counter.values() if count > 5)
-    print(f"   Unique anchor texts: {len(anchor_text_counter)}")
+    repeated_anchors = sum(1 for count in report.anchor_text_counter.values() if count > 5)
+    print(f"   Unique anchor texts: {len(report.anchor_text_counter)}")
     print(f"   Over-repeated anchors (>5 uses): {repeated_anchors}")
-    print(f"   Generic anchor texts: {generic_anchors}")
+    print(f"   Generic anchor texts: {report.generic_anchors}")
 
     # Most common broken links
-    if broken_links > 0:
-        print(f"\n❌ BROKEN LINKS ({broken_links} total):")
-        broken_urls = Counter()
-        for result in all_results:
-            for link in result.get('broken_links', []):
-                broken_urls[link['url']] += 1
-
-        for url, count in broken_urls.most_common(10):
+    if report.broken_links > 0:
+        print(f"\n❌ BROKEN LINKS ({report.broken_links} total):")
+        for url, count in report.broken_urls.most_common(10):
             print(f"   {url} (appears in {count} files)")
 
+    # Pages nothing links to
+    if graph is not None:
+        orphans = graph.orphans()
+        print(f"\n🧭 LINK GRAPH:")
+        print(f"   Pages: {len(graph.pages)}")
+        print(f"   Orphan pages (no inbound links): {len(orphans)}")
+        for route in orphans[:10]:
+            print(f"   {route}")
+
     # Content flow issues
     print(f"\n📋 CONTENT FLOW ANALYSIS:")
-    total_flow_issues = sum(len(r.get('content_flow_issues', [])) for r in all_results)
-    print(f"   Files with content flow issues: {files_with_issues}")
-    print(f"   Total content flow issues: {total_flow_issues}")
+    print(f"   Files with content flow issues: {report.files_with_issues}")
+    print(f"   Total content flow issues: {report.total_flow_issues}")
 
     # Quality score
-    quality_percentage = max(0, 100 - (broken_links / max(total_links, 1) * 100) - (files_with_issues / total_files * 20))
+    quality_percentage = report.quality_score
     print(f"\n🎯 OVERALL QUALITY SCORE: {quality_percentage:.1f}/100")
 
     if quality_percentage >= 90:
@@ -236,37 +320,72 @@ def generate_quality_report(all_results):
 
     return quality_percentage
 
-def main():
-    """Run comprehensive quality assurance validation"""
-    print("Running Internal Linking Quality Assurance...")
-
-    # Find all HTML files
-    html_files = glob.glob("**/*.html", recursive=True)
-    html_files = [f for f in html_files if 'TEMPLATE' not in f.upper()]
-
-    all_results = []
-
-    print(f"\nAnalyzing {len(html_files)} files...")
-
-    for i, file_path in enumerate(html_files):
-        if i % 20 == 0:  # Progress indicator
-            print(f"Progress: {i}/{len(html_files)} files analyzed")
+def open_ndjson(path):
+    if path == '-':
+        return sys.stdout
+    return open(path, 'w', encoding='utf-8')
 
-        result = analyze_single_file(file_path)
-        all_results.append(result)
-
-    # Generate comprehensive report
-    quality_score = generate_quality_report(all_results)
-
-    # Save detailed results for debugging
-    print(f"\nValidation complete!")
+def main(argv=None):
+    """Run comprehensive quality assurance validation"""
+    parser = argparse.ArgumentParser(description="Internal linking quality assurance")
+    add_jobs_argument(parser)
+    parser.add_argument('--ndjson', metavar='FILE',
+                        help="stream one JSON record per page plus a final summary to FILE ('-' for stdout)")
+    parser.add_argument('--threshold', type=float, default=75,
+                        help='minimum quality score for a passing (exit 0) run (default: 75)')
+    args = parser.parse_args(argv)
+
+    # With NDJSON on stdout, the human-readable report moves to stderr
+    human = sys.stderr if args.ndjson == '-' else sys.stdout
+    stream = open_ndjson(args.ndjson) if args.ndjson else None
 
-    if quality_score >= 75:
-        print("✅ Internal linking implementation passes quality assurance")
-        return True
-    else:
-        print("⚠️  Internal linking implementation needs improvements before deployment")
-        return False
+    try:
+        with redirect_stdout(human):
+            print("Running Internal Linking Quality Assurance...")
+
+            # Find all HTML files
+            html_files = glob.glob("**/*.html", recursive=True)
+            html_files = [f for f in html_files if 'TEMPLATE' not in f.upper()]
+
+            report = QualityReport()
+            outbound = {}
+
+            print(f"\nAnalyzing {len(html_files)} files...")
+
+            results = run_parallel(analyze_single_file, html_files, jobs=args.jobs)
+            for i, (file_path, result, error) in enumerate(results):
+                if i % 20 == 0:  # Progress indicator
+                    print(f"Progress: {i}/{len(html_files)} files analyzed")
+
+                result = result if not error else {'file': file_path, 'error': error}
+                report.add(result)
+                outbound[page_route(file_path)] = result.get('edges', [])
+                if stream:
+                    stream.write(json.dumps(page_record(result)) + '\n')
+                    stream.flush()
+
+            # Generate comprehensive report
+            graph = LinkGraph.from_links(outbound)
+            quality_score = generate_quality_report(report, graph)
+
+            if stream:
+                stream.write(json.dumps(report.summary(graph, args.threshold)) + '\n')
+                stream.flush()
+                if stream is not sys.stdout:
+                    print(f"\nDetailed results written to {args.ndjson}")
+
+            print(f"\nValidation complete!")
+
+            if quality_score >= args.threshold:
+                print("✅ Internal linking implementation passes quality assurance")
+                return True
+            else:
+                print("⚠️  Internal linking implementation needs improvements before deployment")
+                return False
+    finally:
+        if stream and stream is not sys.stdout:
+            stream.close()
 
 if __name__ == "__main__":
-    success = main()
\ No newline at end of file
+    success = main()
+    sys.exit(0 if success else 1)